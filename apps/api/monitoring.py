@@ -1,5 +1,8 @@
 import time
 import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
 from django.utils import timezone
 from django.core.cache import cache
 from rest_framework.response import Response
@@ -10,40 +13,247 @@ import json
 logger = logging.getLogger(__name__)
 
 
+# Limites superiores (ms) dos buckets do histograma de latência
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+SLOW_REQUEST_MS = 1000
+SLOW_REQUESTS_KEPT = 100
+METRICS_TTL = 60 * 60 * 25  # mantém as últimas 24 horas completas
+ALL_ENDPOINTS = '*'
+
+
+def _hour_key(dt=None):
+    return (dt or timezone.now()).strftime('%Y%m%d%H')
+
+
+def _bucket_label(duration_ms):
+    for limit in LATENCY_BUCKETS_MS:
+        if duration_ms <= limit:
+            return 'inf' if limit == float('inf') else str(limit)
+    return 'inf'
+
+
+def _bucket_limit(label):
+    return float('inf') if label == 'inf' else float(label)
+
+
+def estimate_percentile(histogram, percentile):
+    """
+    Estima o percentil (0-100) a partir dos buckets {label: contagem},
+    interpolando linearmente dentro do bucket. O último bucket (inf) usa o
+    limite anterior como estimativa.
+    """
+    total = sum(histogram.values())
+    if not total:
+        return 0
+    target = total * percentile / 100
+    seen = 0
+    lower = 0
+    for limit in LATENCY_BUCKETS_MS:
+        label = 'inf' if limit == float('inf') else str(limit)
+        count = histogram.get(label, 0)
+        if count and seen + count >= target:
+            if limit == float('inf'):
+                return lower
+            return round(lower + (limit - lower) * (target - seen) / count, 2)
+        seen += count
+        if limit != float('inf'):
+            lower = limit
+    return lower
+
+
+class LocalMetricsStore:
+    """
+    Agregados em memória do processo, protegidos por lock. Usado quando o
+    cache padrão não é o django-redis (ex.: LocMemCache em DEBUG).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hours = {}
+
+    def _hour(self, hour):
+        data = self._hours.get(hour)
+        if data is None:
+            data = {
+                'count': defaultdict(int),
+                'errors': defaultdict(int),
+                'duration': defaultdict(float),
+                'status': defaultdict(int),
+                'latency': defaultdict(int),
+                'slow': [],
+            }
+            self._hours[hour] = data
+            # Descarta horas antigas
+            for old in sorted(self._hours)[:-25]:
+                del self._hours[old]
+        return data
+
+    def record(self, hour, endpoint, status_code, duration_ms, slow_entry=None):
+        bucket = _bucket_label(duration_ms)
+        with self._lock:
+            data = self._hour(hour)
+            for name in (endpoint, ALL_ENDPOINTS):
+                data['count'][name] += 1
+                data['duration'][name] += duration_ms
+                data['latency'][f'{name}|{bucket}'] += 1
+                if status_code >= 400:
+                    data['errors'][name] += 1
+            data['status'][str(status_code)] += 1
+            if slow_entry:
+                data['slow'].append(slow_entry)
+                data['slow'].sort(key=lambda entry: entry['duration_ms'], reverse=True)
+                del data['slow'][SLOW_REQUESTS_KEPT:]
+
+    def read(self, hour):
+        with self._lock:
+            data = self._hours.get(hour)
+            if data is None:
+                return None
+            return {
+                name: (list(values) if name == 'slow' else dict(values))
+                for name, values in data.items()
+            }
+
+
+class RedisMetricsStore:
+    """
+    Agregados por hora em hashes do Redis, atualizados com HINCRBY em um
+    único pipeline por requisição: sem leitura-modificação-escrita e sem
+    perda de dados entre workers.
+    """
+
+    prefix = 'api_metrics'
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    def _key(self, hour, name):
+        return f'{self.prefix}:{hour}:{name}'
+
+    def record(self, hour, endpoint, status_code, duration_ms, slow_entry=None):
+        bucket = _bucket_label(duration_ms)
+        pipe = self.redis.pipeline(transaction=False)
+        for name in (endpoint, ALL_ENDPOINTS):
+            pipe.hincrby(self._key(hour, 'count'), name, 1)
+            pipe.hincrbyfloat(self._key(hour, 'duration'), name, duration_ms)
+            pipe.hincrby(self._key(hour, 'latency'), f'{name}|{bucket}', 1)
+            if status_code >= 400:
+                pipe.hincrby(self._key(hour, 'errors'), name, 1)
+        pipe.hincrby(self._key(hour, 'status'), str(status_code), 1)
+        if slow_entry:
+            slow_key = self._key(hour, 'slow')
+            pipe.zadd(slow_key, {json.dumps(slow_entry): slow_entry['duration_ms']})
+            pipe.zremrangebyrank(slow_key, 0, -(SLOW_REQUESTS_KEPT + 1))
+        for name in ('count', 'duration', 'latency', 'errors', 'status', 'slow'):
+            pipe.expire(self._key(hour, name), METRICS_TTL)
+        pipe.execute()
+
+    def read(self, hour):
+        pipe = self.redis.pipeline(transaction=False)
+        for name in ('count', 'errors', 'duration', 'status', 'latency'):
+            pipe.hgetall(self._key(hour, name))
+        pipe.zrevrange(self._key(hour, 'slow'), 0, SLOW_REQUESTS_KEPT - 1)
+        count, errors, duration, status_codes, latency, slow = pipe.execute()
+        if not count:
+            return None
+
+        def decode(mapping, cast):
+            return {
+                (key.decode() if isinstance(key, bytes) else key): cast(value)
+                for key, value in mapping.items()
+            }
+
+        return {
+            'count': decode(count, int),
+            'errors': decode(errors, int),
+            'duration': decode(duration, float),
+            'status': decode(status_codes, int),
+            'latency': decode(latency, int),
+            'slow': [json.loads(entry) for entry in slow],
+        }
+
+
+_local_store = LocalMetricsStore()
+
+
+def get_metrics_store():
+    try:
+        from django_redis import get_redis_connection
+        return RedisMetricsStore(get_redis_connection('default'))
+    except Exception:
+        return _local_store
+
+
+def _merge(hours_data):
+    """Soma os agregados de várias horas"""
+    merged = {name: defaultdict(int) for name in ('count', 'errors', 'duration', 'status', 'latency')}
+    slow = []
+    for data in hours_data:
+        if not data:
+            continue
+        for name in merged:
+            for key, value in data.get(name, {}).items():
+                merged[name][key] += value
+        slow.extend(data.get('slow', []))
+    result = {name: dict(values) for name, values in merged.items()}
+    result['slow'] = slow
+    return result
+
+
+def _histogram(latency, endpoint):
+    prefix = f'{endpoint}|'
+    return {key[len(prefix):]: value for key, value in latency.items() if key.startswith(prefix)}
+
+
+def _latency_summary(latency, endpoint):
+    histogram = _histogram(latency, endpoint)
+    return {
+        'p50': estimate_percentile(histogram, 50),
+        'p95': estimate_percentile(histogram, 95),
+        'p99': estimate_percentile(histogram, 99),
+    }
+
+
 class APIMetrics:
-    """Sistema de métricas para a API"""
+    """Sistema de métricas para a API (agregados por hora)"""
     
+    @staticmethod
+    def endpoint_name(request):
+        """
+        Nome do endpoint para agregação: a rota resolvida (ex.:
+        /api/v1/server/top-pvp/) em vez do path cru, para que ids na URL
+        não criem uma série por recurso.
+        """
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and match.route:
+            return f"{request.method} /{match.route}"
+        return f"{request.method} {request.path}"
+
     @staticmethod
     def record_request(request, response, duration):
         """Registra métricas de uma requisição"""
         try:
-            # Métricas básicas
-            metrics = {
-                'timestamp': timezone.now().isoformat(),
-                'path': request.path,
-                'method': request.method,
-                'status_code': response.status_code,
-                'duration_ms': round(duration * 1000, 2),
-                'user_agent': request.META.get('HTTP_USER_AGENT', ''),
-                'ip': APIMetrics.get_client_ip(request),
-                'user_id': getattr(request.user, 'id', None) if request.user.is_authenticated else None,
-            }
-            
-            # Armazena no cache para análise
-            cache_key = f"api_metrics_{timezone.now().strftime('%Y%m%d_%H')}"
-            existing_metrics = cache.get(cache_key, [])
-            existing_metrics.append(metrics)
+            duration_ms = round(duration * 1000, 2)
+            endpoint = APIMetrics.endpoint_name(request)
             
-            # Mantém apenas as últimas 1000 métricas por hora
-            if len(existing_metrics) > 1000:
-                existing_metrics = existing_metrics[-1000:]
+            slow_entry = None
+            if duration_ms > SLOW_REQUEST_MS:
+                user = getattr(request, 'user', None)
+                slow_entry = {
+                    'timestamp': timezone.now().isoformat(),
+                    'path': request.path,
+                    'method': request.method,
+                    'status_code': response.status_code,
+                    'duration_ms': duration_ms,
+                    'ip': APIMetrics.get_client_ip(request),
+                    'user_id': user.id if user is not None and user.is_authenticated else None,
+                }
             
-            cache.set(cache_key, existing_metrics, 3600)  # 1 hora
+            get_metrics_store().record(_hour_key(), endpoint, response.status_code, duration_ms, slow_entry)
             
             # Log para análise
             logger.info(
-                f"API Request: {request.method} {request.path} - {response.status_code} - {duration:.3f}s",
-                extra=metrics
+                f"API Request: {request.method} {request.path} - {response.status_code} - {duration:.3f}s"
             )
             
         except Exception as e:
@@ -58,105 +268,60 @@ class APIMetrics:
         else:
             ip = request.META.get('REMOTE_ADDR')
         return ip
+
+    @staticmethod
+    def get_hours_data(hours):
+        """Agregados das últimas `hours` horas (incluindo a atual)"""
+        now = timezone.now()
+        store = get_metrics_store()
+        return _merge(store.read(_hour_key(now - timedelta(hours=offset))) for offset in range(hours))
+
+    @staticmethod
+    def build_stats(data, period):
+        total_requests = data['count'].get(ALL_ENDPOINTS, 0)
+        if not total_requests:
+            return {
+                'total_requests': 0,
+                'avg_response_time': 0,
+                'status_codes': {},
+                'endpoints': {},
+                'error_rate': 0,
+                'latency_ms': {'p50': 0, 'p95': 0, 'p99': 0},
+                'period': period,
+            }
+        
+        total_duration = data['duration'].get(ALL_ENDPOINTS, 0)
+        error_count = data['errors'].get(ALL_ENDPOINTS, 0)
+        endpoints = {
+            endpoint: count for endpoint, count in data['count'].items() if endpoint != ALL_ENDPOINTS
+        }
+        
+        return {
+            'total_requests': total_requests,
+            'avg_response_time': round(total_duration / total_requests, 2),
+            'status_codes': data['status'],
+            'endpoints': endpoints,
+            'error_rate': round((error_count / total_requests) * 100, 2),
+            'latency_ms': _latency_summary(data['latency'], ALL_ENDPOINTS),
+            'period': period,
+        }
     
     @staticmethod
     def get_hourly_stats():
-        """Obtém estatísticas da última hora"""
+        """Obtém estatísticas da hora atual"""
         try:
-            cache_key = f"api_metrics_{timezone.now().strftime('%Y%m%d_%H')}"
-            metrics = cache.get(cache_key, [])
-            
-            if not metrics:
-                return {
-                    'total_requests': 0,
-                    'avg_response_time': 0,
-                    'status_codes': {},
-                    'endpoints': {},
-                    'error_rate': 0,
-                }
-            
-            total_requests = len(metrics)
-            total_duration = sum(m['duration_ms'] for m in metrics)
-            avg_response_time = total_duration / total_requests if total_requests > 0 else 0
-            
-            # Conta códigos de status
-            status_codes = {}
-            for m in metrics:
-                status = m['status_code']
-                status_codes[status] = status_codes.get(status, 0) + 1
-            
-            # Conta endpoints
-            endpoints = {}
-            for m in metrics:
-                path = m['path']
-                endpoints[path] = endpoints.get(path, 0) + 1
-            
-            # Calcula taxa de erro
-            error_count = sum(1 for m in metrics if m['status_code'] >= 400)
-            error_rate = (error_count / total_requests) * 100 if total_requests > 0 else 0
-            
-            return {
-                'total_requests': total_requests,
-                'avg_response_time': round(avg_response_time, 2),
-                'status_codes': status_codes,
-                'endpoints': endpoints,
-                'error_rate': round(error_rate, 2),
-                'period': 'last_hour',
-            }
-            
+            return APIMetrics.build_stats(APIMetrics.get_hours_data(1), 'last_hour')
         except Exception as e:
             logger.error(f"Error getting hourly stats: {e}")
             return {'error': str(e)}
     
     @staticmethod
     def get_daily_stats():
-        """Obtém estatísticas do dia atual"""
+        """Obtém estatísticas das horas do dia atual"""
         try:
-            # Busca métricas de todas as horas do dia
-            daily_metrics = []
-            for hour in range(24):
-                cache_key = f"api_metrics_{timezone.now().strftime('%Y%m%d')}_{hour:02d}"
-                metrics = cache.get(cache_key, [])
-                daily_metrics.extend(metrics)
-            
-            if not daily_metrics:
-                return {
-                    'total_requests': 0,
-                    'avg_response_time': 0,
-                    'status_codes': {},
-                    'endpoints': {},
-                    'error_rate': 0,
-                }
-            
-            total_requests = len(daily_metrics)
-            total_duration = sum(m['duration_ms'] for m in daily_metrics)
-            avg_response_time = total_duration / total_requests if total_requests > 0 else 0
-            
-            # Conta códigos de status
-            status_codes = {}
-            for m in daily_metrics:
-                status = m['status_code']
-                status_codes[status] = status_codes.get(status, 0) + 1
-            
-            # Conta endpoints
-            endpoints = {}
-            for m in daily_metrics:
-                path = m['path']
-                endpoints[path] = endpoints.get(path, 0) + 1
-            
-            # Calcula taxa de erro
-            error_count = sum(1 for m in daily_metrics if m['status_code'] >= 400)
-            error_rate = (error_count / total_requests) * 100 if total_requests > 0 else 0
-            
-            return {
-                'total_requests': total_requests,
-                'avg_response_time': round(avg_response_time, 2),
-                'status_codes': status_codes,
-                'endpoints': endpoints,
-                'error_rate': round(error_rate, 2),
-                'period': 'today',
-            }
-            
+            # As chaves horárias usam o mesmo relógio de timezone.now()
+            hours = timezone.now().hour + 1
+            return APIMetrics.build_stats(APIMetrics.get_hours_data(hours), 'today')
         except Exception as e:
             logger.error(f"Error getting daily stats: {e}")
             return {'error': str(e)}
@@ -269,19 +434,9 @@ class APIPerformance:
     
     @staticmethod
     def get_slow_queries(limit=10):
-        """Obtém as queries mais lentas"""
+        """Obtém as requisições mais lentas das últimas 24 horas"""
         try:
-            # Busca métricas das últimas 24 horas
-            slow_queries = []
-            for hour in range(24):
-                cache_key = f"api_metrics_{timezone.now().strftime('%Y%m%d')}_{hour:02d}"
-                metrics = cache.get(cache_key, [])
-                
-                # Filtra queries lentas (> 1 segundo)
-                slow = [m for m in metrics if m['duration_ms'] > 1000]
-                slow_queries.extend(slow)
-            
-            # Ordena por duração e retorna as mais lentas
+            slow_queries = APIMetrics.get_hours_data(24)['slow']
             slow_queries.sort(key=lambda x: x['duration_ms'], reverse=True)
             return slow_queries[:limit]
             
@@ -291,36 +446,26 @@ class APIPerformance:
     
     @staticmethod
     def get_endpoint_performance():
-        """Obtém performance por endpoint"""
+        """Obtém performance por endpoint nas últimas 24 horas"""
         try:
-            # Busca métricas das últimas 24 horas
+            data = APIMetrics.get_hours_data(24)
             endpoint_metrics = {}
-            for hour in range(24):
-                cache_key = f"api_metrics_{timezone.now().strftime('%Y%m%d')}_{hour:02d}"
-                metrics = cache.get(cache_key, [])
-                
-                for m in metrics:
-                    path = m['path']
-                    if path not in endpoint_metrics:
-                        endpoint_metrics[path] = {
-                            'count': 0,
-                            'total_duration': 0,
-                            'errors': 0,
-                        }
-                    
-                    endpoint_metrics[path]['count'] += 1
-                    endpoint_metrics[path]['total_duration'] += m['duration_ms']
-                    
-                    if m['status_code'] >= 400:
-                        endpoint_metrics[path]['errors'] += 1
-            
-            # Calcula médias
-            for path, data in endpoint_metrics.items():
-                data['avg_duration'] = round(data['total_duration'] / data['count'], 2)
-                data['error_rate'] = round((data['errors'] / data['count']) * 100, 2)
+            for endpoint, count in data['count'].items():
+                if endpoint == ALL_ENDPOINTS or not count:
+                    continue
+                total_duration = data['duration'].get(endpoint, 0)
+                errors = data['errors'].get(endpoint, 0)
+                endpoint_metrics[endpoint] = {
+                    'count': count,
+                    'total_duration': round(total_duration, 2),
+                    'errors': errors,
+                    'avg_duration': round(total_duration / count, 2),
+                    'error_rate': round((errors / count) * 100, 2),
+                    'latency_ms': _latency_summary(data['latency'], endpoint),
+                }
             
             return endpoint_metrics
             
         except Exception as e:
             logger.error(f"Error getting endpoint performance: {e}")
-            return {} 
\ No newline at end of file
+            return {}
@@ -31,6 +31,7 @@ from .schema import ServerAPISchema, AuthAPISchema, UserAPISchema, SearchAPISche
 
 from utils.dynamic_import import get_query_class
 from apps.lineage.server.decorators import endpoint_enabled
+from apps.lineage.server.utils.siege import get_castle_participants, get_siege_castles
 from apps.lineage.server.models import ApiEndpointToggle
 from apps.main.notification.models import PushSubscription
 from rest_framework_simplejwt.authentication import JWTAuthentication
@@ -605,14 +606,8 @@ class SiegeView(GenericAPIView):
         Retorna o status dos cercos
         """
         try:
-            cache_key = 'api_siege'
-            cached_data = cache.get(cache_key)
-            
-            if cached_data is None:
-                data = LineageStats.siege()
-                cache.set(cache_key, data, 300)
-            else:
-                data = cached_data
+            # Mesma visão montada (e cacheada) das páginas de cerco
+            data = get_siege_castles()
             
             # Processa os dados para o formato esperado pelo serializer
             processed_data = []
@@ -673,14 +668,8 @@ class SiegeParticipantsView(GenericAPIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            cache_key = f'api_siege_participants_{castle_id}'
-            cached_data = cache.get(cache_key)
-            
-            if cached_data is None:
-                data = LineageStats.siege_participants(castle_id=castle_id)
-                cache.set(cache_key, data, 300)
-            else:
-                data = cached_data
+            # Todos os castelos vêm de uma consulta em lote, cacheada em conjunto
+            data = get_castle_participants(castle_id)
             
             serializer = self.get_serializer(data, many=True)
             return Response(serializer.data)
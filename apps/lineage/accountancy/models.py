@@ -1,3 +1,86 @@
 from django.db import models
+from django.utils.translation import gettext_lazy as _
+from core.models import BaseModel
 
-# Create your models here.
+
+class ResumoSaldos(BaseModel):
+    """
+    Resumo materializado do relatório de saldos, gerado todas as noites
+    (tasks.gerar_resumo_saldos). O dashboard e os totais sem filtro leem a
+    linha mais recente em vez de agregar todas as carteiras.
+    """
+    total_usuarios = models.PositiveIntegerField(_("Total de Usuários"), default=0)
+    total_saldo_wallet = models.DecimalField(_("Saldo em Carteiras"), max_digits=14, decimal_places=2, default=0)
+    total_saldo_bonus = models.DecimalField(_("Saldo de Bônus"), max_digits=14, decimal_places=2, default=0)
+    total_saldo_calculado = models.DecimalField(_("Saldo Calculado"), max_digits=14, decimal_places=2, default=0)
+    total_diferenca = models.DecimalField(_("Diferença Total"), max_digits=14, decimal_places=2, default=0)
+    total_transacoes = models.PositiveIntegerField(_("Total de Transações"), default=0)
+    consistente = models.PositiveIntegerField(_("Consistentes"), default=0)
+    pequena_discrepancia = models.PositiveIntegerField(_("Pequenas Discrepâncias"), default=0)
+    discrepancia = models.PositiveIntegerField(_("Discrepâncias"), default=0)
+    sem_carteira = models.PositiveIntegerField(_("Sem Carteira"), default=0)
+
+    class Meta:
+        verbose_name = _("Resumo de Saldos")
+        verbose_name_plural = _("Resumos de Saldos")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at']),
+        ]
+
+    @classmethod
+    def atual(cls):
+        return cls.objects.order_by('-created_at').first()
+
+    @classmethod
+    def gerar(cls):
+        from .reports.saldo import resumo_saldos, saldos_usuarios_queryset
+
+        dados = resumo_saldos(saldos_usuarios_queryset())
+        status_contador = dados.pop('status_contador')
+        dados.pop('total_saldo_total')
+        return cls.objects.create(**dados, **status_contador)
+
+    def as_resumo(self):
+        """Mesmo formato de reports.saldo.resumo_saldos"""
+        return {
+            'total_usuarios': self.total_usuarios,
+            'total_saldo_wallet': self.total_saldo_wallet,
+            'total_saldo_bonus': self.total_saldo_bonus,
+            'total_saldo_total': self.total_saldo_wallet + self.total_saldo_bonus,
+            'total_saldo_calculado': self.total_saldo_calculado,
+            'total_diferenca': self.total_diferenca,
+            'total_transacoes': self.total_transacoes,
+            'status_contador': {
+                'consistente': self.consistente,
+                'pequena_discrepancia': self.pequena_discrepancia,
+                'discrepancia': self.discrepancia,
+                'sem_carteira': self.sem_carteira,
+            },
+            'gerado_em': self.created_at,
+        }
+
+    def __str__(self):
+        return f"Resumo de saldos de {self.created_at:%d/%m/%Y %H:%M}"
+
+
+class FluxoCaixaDiario(BaseModel):
+    """
+    Totais diários de TransacaoWallet, gravados só para dias encerrados (antes
+    de hoje). Transações recebem a data na criação, então um dia encerrado não
+    muda mais; o relatório soma estas linhas e agrega ao vivo apenas os dias
+    ainda não fechados (normalmente só hoje).
+    """
+    data = models.DateField(_("Data"), unique=True)
+    entradas = models.DecimalField(_("Entradas"), max_digits=14, decimal_places=2, default=0)
+    saidas = models.DecimalField(_("Saídas"), max_digits=14, decimal_places=2, default=0)
+    num_entradas = models.PositiveIntegerField(_("Número de Entradas"), default=0)
+    num_saidas = models.PositiveIntegerField(_("Número de Saídas"), default=0)
+
+    class Meta:
+        verbose_name = _("Fluxo de Caixa Diário")
+        verbose_name_plural = _("Fluxo de Caixa Diário")
+        ordering = ['-data']
+
+    def __str__(self):
+        return f"Fluxo de caixa de {self.data:%d/%m/%Y}"
@@ -1,43 +1,120 @@
 from apps.lineage.wallet.models import TransacaoWallet
-from django.db.models import Sum, Count
+from django.db.models import Sum, Count, Max, Q
 from django.db.models.functions import TruncDate
+from django.utils import timezone
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 
-def fluxo_caixa_por_dia():
+
+def _inicio_do_dia(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def agregar_por_dia(data_inicio=None, data_fim=None):
+    """
+    Entradas e saídas por dia em uma única consulta agrupada, restrita ao
+    intervalo [data_inicio, data_fim] (datas locais) pelo campo indexado.
+    Retorna {data: {'entrada', 'saida', 'num_entradas', 'num_saidas'}}.
+    """
+    transacoes = TransacaoWallet.objects.all()
+    if data_inicio:
+        transacoes = transacoes.filter(data__gte=_inicio_do_dia(data_inicio))
+    if data_fim:
+        transacoes = transacoes.filter(data__lt=_inicio_do_dia(data_fim + timedelta(days=1)))
+
+    entrada = Q(tipo='ENTRADA')
+    saida = Q(tipo='SAIDA')
     # Renomeando a anotação para evitar conflito com o campo 'data'
-    transacoes = TransacaoWallet.objects.annotate(data_truncada=TruncDate('data'))
-
-    entradas = transacoes.filter(tipo='ENTRADA').values('data_truncada').annotate(
-        total=Sum('valor'),
-        quantidade=Count('id')
-    ).order_by('-data_truncada')
-
-    saidas = transacoes.filter(tipo='SAIDA').values('data_truncada').annotate(
-        total=Sum('valor'),
-        quantidade=Count('id')
-    ).order_by('-data_truncada')
-
-    # Junta os dados por data
-    dias = {}
-    for entrada in entradas:
-        dias[entrada['data_truncada']] = {
-            'entrada': entrada['total'],
-            'saida': Decimal('0.00'),
-            'num_entradas': entrada['quantidade'],
-            'num_saidas': 0
+    linhas = transacoes.annotate(data_truncada=TruncDate('data')).values('data_truncada').annotate(
+        entrada=Sum('valor', filter=entrada),
+        saida=Sum('valor', filter=saida),
+        num_entradas=Count('id', filter=entrada),
+        num_saidas=Count('id', filter=saida),
+    ).order_by()
+
+    return {
+        linha['data_truncada']: {
+            'entrada': linha['entrada'] or Decimal('0.00'),
+            'saida': linha['saida'] or Decimal('0.00'),
+            'num_entradas': linha['num_entradas'],
+            'num_saidas': linha['num_saidas'],
         }
+        for linha in linhas
+    }
 
-    for saida in saidas:
-        if saida['data_truncada'] in dias:
-            dias[saida['data_truncada']]['saida'] = saida['total']
-            dias[saida['data_truncada']]['num_saidas'] = saida['quantidade']
-        else:
-            dias[saida['data_truncada']] = {
-                'entrada': Decimal('0.00'),
-                'saida': saida['total'],
-                'num_entradas': 0,
-                'num_saidas': saida['quantidade']
-            }
+
+def fechar_dias(reconstruir=False):
+    """
+    Grava os totais dos dias encerrados que ainda não estão em
+    FluxoCaixaDiario. Na primeira execução (ou com reconstruir=True)
+    percorre todo o histórico; depois só os dias desde o último fechado.
+    Retorna quantos dias foram gravados.
+    """
+    from ..models import FluxoCaixaDiario
+
+    hoje = timezone.localdate()
+    if reconstruir:
+        FluxoCaixaDiario.objects.all().delete()
+        ultimo = None
+    else:
+        ultimo = FluxoCaixaDiario.objects.aggregate(ultimo=Max('data'))['ultimo']
+
+    data_inicio = ultimo + timedelta(days=1) if ultimo else None
+    data_fim = hoje - timedelta(days=1)
+    if data_inicio and data_inicio > data_fim:
+        return 0
+
+    dias = agregar_por_dia(data_inicio, data_fim)
+    FluxoCaixaDiario.objects.bulk_create(
+        [
+            FluxoCaixaDiario(
+                data=data,
+                entradas=valores['entrada'],
+                saidas=valores['saida'],
+                num_entradas=valores['num_entradas'],
+                num_saidas=valores['num_saidas'],
+            )
+            for data, valores in dias.items()
+            if data < hoje
+        ],
+        ignore_conflicts=True,
+    )
+    return len(dias)
+
+
+def totais_por_dia(data_inicio=None, data_fim=None):
+    """Dias fechados lidos de FluxoCaixaDiario mais os dias abertos agregados ao vivo"""
+    from ..models import FluxoCaixaDiario
+
+    fechados = FluxoCaixaDiario.objects.all()
+    if data_inicio:
+        fechados = fechados.filter(data__gte=data_inicio)
+    if data_fim:
+        fechados = fechados.filter(data__lte=data_fim)
+
+    dias = {
+        linha['data']: {
+            'entrada': linha['entradas'],
+            'saida': linha['saidas'],
+            'num_entradas': linha['num_entradas'],
+            'num_saidas': linha['num_saidas'],
+        }
+        for linha in fechados.values('data', 'entradas', 'saidas', 'num_entradas', 'num_saidas')
+    }
+
+    ultimo_fechado = FluxoCaixaDiario.objects.aggregate(ultimo=Max('data'))['ultimo']
+    abertos_desde = ultimo_fechado + timedelta(days=1) if ultimo_fechado else None
+    if data_inicio and (abertos_desde is None or data_inicio > abertos_desde):
+        abertos_desde = data_inicio
+    if data_fim is None or abertos_desde is None or abertos_desde <= data_fim:
+        for data, valores in agregar_por_dia(abertos_desde, data_fim).items():
+            dias.setdefault(data, valores)
+
+    return dias
+
+
+def fluxo_caixa_por_dia(data_inicio=None, data_fim=None):
+    dias = totais_por_dia(data_inicio, data_fim)
 
     # Converte pra lista ordenada por data decrescente e calcula saldo acumulado
     relatorio = []
@@ -1,7 +1,22 @@
 from apps.lineage.wallet.models import Wallet, TransacaoWallet
-from django.db.models import Sum, Count, Max, Min
+from apps.main.home.models import User
+from django.db.models import (
+    Sum, Count, Max, Min, Q, F, Value, Case, When, CharField, DecimalField, ExpressionWrapper,
+)
+from django.db.models.functions import Coalesce
 from decimal import Decimal
 
+STATUS_SALDO = ('consistente', 'pequena_discrepancia', 'discrepancia', 'sem_carteira')
+
+_DECIMAL = DecimalField(max_digits=14, decimal_places=2)
+_ZERO = Value(Decimal('0.00'), output_field=_DECIMAL)
+_CENTAVO = Decimal('0.01')
+
+
+def _centavos(valor):
+    # SQLite soma decimais como REAL; normaliza para não exibir resíduos
+    return Decimal(valor).quantize(_CENTAVO)
+
 
 def saldo_usuario(usuario):
     try:
@@ -84,3 +99,107 @@ def saldo_usuario(usuario):
         'data_criacao': data_criacao,
         'status': status
     }
+
+
+def saldos_usuarios_queryset():
+    """
+    Saldo de todos os usuários em uma única consulta agrupada: User com
+    LEFT JOIN em Wallet e TransacaoWallet, somas por tipo e status calculado
+    no banco (mesmas faixas de saldo_usuario), então filtros de status e
+    saldo viram HAVING e a paginação busca só a página pedida.
+    """
+    entrada = Q(wallet__transacoes__tipo='ENTRADA')
+    saida = Q(wallet__transacoes__tipo='SAIDA')
+    return (
+        User.objects
+        .annotate(
+            total_entradas=Coalesce(Sum('wallet__transacoes__valor', filter=entrada), _ZERO),
+            total_saidas=Coalesce(Sum('wallet__transacoes__valor', filter=saida), _ZERO),
+            num_transacoes=Count('wallet__transacoes'),
+            num_entradas=Count('wallet__transacoes', filter=entrada),
+            num_saidas=Count('wallet__transacoes', filter=saida),
+            ultima_transacao=Max('wallet__transacoes__data'),
+            primeira_transacao=Min('wallet__transacoes__data'),
+        )
+        .annotate(
+            saldo_wallet=Coalesce(F('wallet__saldo'), _ZERO),
+            saldo_bonus=Coalesce(F('wallet__saldo_bonus'), _ZERO),
+            data_criacao=F('wallet__created_at'),
+            saldo_calculado=ExpressionWrapper(F('total_entradas') - F('total_saidas'), output_field=_DECIMAL),
+        )
+        .annotate(
+            saldo_total=ExpressionWrapper(F('saldo_wallet') + F('saldo_bonus'), output_field=_DECIMAL),
+            diferenca=ExpressionWrapper(F('saldo_wallet') - F('saldo_calculado'), output_field=_DECIMAL),
+        )
+        .annotate(
+            status=Case(
+                When(wallet__isnull=True, then=Value('sem_carteira')),
+                # Tolerância de 1 centavo
+                When(diferenca__gte=Decimal('-0.01'), diferenca__lte=Decimal('0.01'), then=Value('consistente')),
+                # Tolerância de 1 real
+                When(diferenca__gte=Decimal('-1.00'), diferenca__lte=Decimal('1.00'), then=Value('pequena_discrepancia')),
+                default=Value('discrepancia'),
+                output_field=CharField(),
+            )
+        )
+        .order_by('id')
+    )
+
+
+def filtrar_saldos(queryset, usuario=None, status=None, saldo_minimo=None, saldo_maximo=None):
+    if usuario:
+        queryset = queryset.filter(username__icontains=usuario)
+    if status:
+        queryset = queryset.filter(status=status)
+    if saldo_minimo is not None:
+        queryset = queryset.filter(saldo_total__gte=saldo_minimo)
+    if saldo_maximo is not None:
+        queryset = queryset.filter(saldo_total__lte=saldo_maximo)
+    return queryset
+
+
+def resumo_saldos(queryset):
+    """Totais e contagem por status do queryset, em uma consulta"""
+    dados = queryset.aggregate(
+        total_usuarios=Count('id'),
+        total_saldo_wallet=Coalesce(Sum('saldo_wallet'), _ZERO),
+        total_saldo_bonus=Coalesce(Sum('saldo_bonus'), _ZERO),
+        total_saldo_calculado=Coalesce(Sum('saldo_calculado'), _ZERO),
+        total_diferenca=Coalesce(Sum('diferenca'), _ZERO),
+        total_transacoes=Coalesce(Sum('num_transacoes'), 0),
+        **{status: Count('id', filter=Q(status=status)) for status in STATUS_SALDO}
+    )
+    for campo in ('total_saldo_wallet', 'total_saldo_bonus', 'total_saldo_calculado', 'total_diferenca'):
+        dados[campo] = _centavos(dados[campo])
+    dados['total_saldo_total'] = dados['total_saldo_wallet'] + dados['total_saldo_bonus']
+    dados['status_contador'] = {status: dados.pop(status) for status in STATUS_SALDO}
+    return dados
+
+
+def linha_saldo(usuario):
+    """Linha do relatório a partir de um usuário anotado por saldos_usuarios_queryset"""
+    saldo_calculado = _centavos(usuario.saldo_calculado)
+    diferenca = _centavos(usuario.diferenca)
+    if saldo_calculado > 0:
+        percentual_diferenca = (diferenca / saldo_calculado) * 100
+    else:
+        percentual_diferenca = Decimal('0.00') if diferenca == 0 else Decimal('100.00')
+
+    return {
+        'usuario': usuario.username,
+        'saldo_wallet': _centavos(usuario.saldo_wallet),
+        'saldo_bonus': _centavos(usuario.saldo_bonus),
+        'saldo_total': _centavos(usuario.saldo_total),
+        'saldo_calculado': saldo_calculado,
+        'diferenca': diferenca,
+        'percentual_diferenca': percentual_diferenca,
+        'num_transacoes': usuario.num_transacoes,
+        'num_entradas': usuario.num_entradas,
+        'num_saidas': usuario.num_saidas,
+        'total_entradas': _centavos(usuario.total_entradas),
+        'total_saidas': _centavos(usuario.total_saidas),
+        'ultima_transacao': usuario.ultima_transacao,
+        'primeira_transacao': usuario.primeira_transacao,
+        'data_criacao': usuario.data_criacao,
+        'status': usuario.status,
+    }
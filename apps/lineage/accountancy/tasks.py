@@ -0,0 +1,22 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def gerar_resumo_saldos():
+    from .models import ResumoSaldos
+
+    resumo = ResumoSaldos.gerar()
+    logger.info(f"Resumo de saldos gerado: {resumo.total_usuarios} usuários, {resumo.discrepancia} discrepâncias")
+    return resumo.id
+
+
+@shared_task
+def fechar_fluxo_caixa():
+    from .reports.fluxo_caixa import fechar_dias
+
+    dias = fechar_dias()
+    logger.info(f"Fluxo de caixa: {dias} dia(s) encerrado(s)")
+    return dias
@@ -1,8 +1,9 @@
 from django.shortcuts import render
+from django.http import HttpResponse
 from django.contrib.admin.views.decorators import staff_member_required
 from django.core.paginator import Paginator
 from django.db.models import Q
-from apps.main.home.models import User
+import csv
 import json
 
 from .forms import (
@@ -11,7 +12,8 @@ from .forms import (
     FluxoCaixaFilterForm,
     ReconciliacaoWalletFilterForm,
 )
-from .reports.saldo import saldo_usuario
+from .models import ResumoSaldos
+from .reports.saldo import filtrar_saldos, linha_saldo, resumo_saldos, saldos_usuarios_queryset
 from .reports.fluxo_caixa import fluxo_caixa_por_dia
 from .reports.pedidos_pagamentos import pedidos_pagamentos_resumo
 from .reports.reconciliacao_wallet import reconciliacao_wallet_transacoes
@@ -21,111 +23,58 @@ from .reports.reconciliacao_wallet import reconciliacao_wallet_transacoes
 def relatorio_saldo_usuarios(request):
     # Inicializa o formulário de filtros
     filter_form = SaldoUsuariosFilterForm(request.GET)
-    
-    # Obtém todos os usuários
-    usuarios = User.objects.all()
-    
-    # Aplica filtro de usuário (busca por username) se existir
-    usuario_filter = None
-    if filter_form.is_valid():
-        usuario_filter = filter_form.cleaned_data.get('usuario')
-        if usuario_filter:
-            usuarios = usuarios.filter(username__icontains=usuario_filter)
-    
-    # Processa TODOS os usuários para calcular totais e contadores
-    # Mas filtra por status e saldo
-    relatorio_completo = []
-    total_saldo_wallet = 0
-    total_saldo_bonus = 0
-    total_saldo_calculado = 0
-    total_diferenca = 0
-    total_transacoes = 0
-    
-    status_filter = None
-    saldo_minimo = None
-    saldo_maximo = None
-    if filter_form.is_valid():
-        status_filter = filter_form.cleaned_data.get('status')
-        saldo_minimo = filter_form.cleaned_data.get('saldo_minimo')
-        saldo_maximo = filter_form.cleaned_data.get('saldo_maximo')
 
-    for usuario in usuarios:
-        info = saldo_usuario(usuario)
-        
-        # Aplica filtros de status e saldo após calcular
-        if status_filter and info.get('status') != status_filter:
-            continue
-        
-        saldo_total_usuario = info.get('saldo_wallet', 0) + info.get('saldo_bonus', 0)
-        if saldo_minimo is not None and saldo_total_usuario < saldo_minimo:
-            continue
-        if saldo_maximo is not None and saldo_total_usuario > saldo_maximo:
-            continue
-        
-        relatorio_completo.append({
-            'usuario': usuario.username,
-            **info
-        })
-        
-        # Acumula totais (apenas usuários filtrados que passaram nos filtros)
-        total_saldo_wallet += float(info.get('saldo_wallet', 0))
-        total_saldo_bonus += float(info.get('saldo_bonus', 0))
-        total_saldo_calculado += float(info.get('saldo_calculado', 0))
-        total_diferenca += float(info.get('diferenca', 0))
-        total_transacoes += info.get('num_transacoes', 0)
+    # Saldos de todos os usuários em uma consulta agrupada (filtros viram SQL)
+    todos = saldos_usuarios_queryset()
+    usuarios = todos
+    filtros = {}
+    if filter_form.is_valid():
+        filtros = {
+            campo: filter_form.cleaned_data.get(campo)
+            for campo in ('usuario', 'status', 'saldo_minimo', 'saldo_maximo')
+        }
+        filtros = {campo: valor for campo, valor in filtros.items() if valor not in (None, '')}
+        usuarios = filtrar_saldos(todos, **filtros)
 
-    # Calcula contadores de status para TODOS os usuários (sem filtros)
-    todos_usuarios = User.objects.all()
-    todos_contadores = {'consistente': 0, 'pequena_discrepancia': 0, 'discrepancia': 0, 'sem_carteira': 0}
-    for usuario_geral in todos_usuarios:
-        info_geral = saldo_usuario(usuario_geral)
-        status_geral = info_geral.get('status', 'sem_carteira')
-        if status_geral in todos_contadores:
-            todos_contadores[status_geral] += 1
+    # Totais e contadores de status de TODOS os usuários vêm do resumo
+    # noturno quando existir; com filtros, os totais são dos filtrados
+    snapshot = ResumoSaldos.atual()
+    resumo_geral = snapshot.as_resumo() if snapshot else None
+    if filtros:
+        resumo = resumo_saldos(usuarios)
+        resumo['status_contador'] = (resumo_geral or resumo_saldos(todos))['status_contador']
+    else:
+        resumo = resumo_geral or resumo_saldos(todos)
 
-    resumo = {
-        'total_usuarios': len(relatorio_completo),  # Usuários filtrados
-        'total_saldo_wallet': total_saldo_wallet,
-        'total_saldo_bonus': total_saldo_bonus,
-        'total_saldo_total': total_saldo_wallet + total_saldo_bonus,
-        'total_saldo_calculado': total_saldo_calculado,
-        'total_diferenca': total_diferenca,
-        'total_transacoes': total_transacoes,
-        'status_contador': todos_contadores,  # Contadores de todos os usuários
-    }
-    
-    # Paginação
-    paginator = Paginator(relatorio_completo, 50)
+    # Paginação: só a página atual é buscada e montada
+    paginator = Paginator(usuarios, 50)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
     return render(request, 'accountancy/relatorio_saldo.html', {
-        'relatorio': list(page_obj),
+        'relatorio': [linha_saldo(usuario) for usuario in page_obj],
         'resumo': resumo,
         'page_obj': page_obj,
         'filter_form': filter_form,
     })
 
 
+def _periodo_fluxo_caixa(filter_form):
+    if filter_form.is_valid():
+        return filter_form.cleaned_data.get('data_inicio'), filter_form.cleaned_data.get('data_fim')
+    return None, None
+
+
 @staff_member_required
 def relatorio_fluxo_caixa(request):
     # Inicializa o formulário de filtros
     filter_form = FluxoCaixaFilterForm(request.GET)
-    
-    # Obtém dados do fluxo de caixa
-    dados = fluxo_caixa_por_dia()
+
+    # Obtém dados do fluxo de caixa (dias fechados + hoje), já no período filtrado
+    data_inicio, data_fim = _periodo_fluxo_caixa(filter_form)
+    dados = fluxo_caixa_por_dia(data_inicio, data_fim)
     relatorio = dados['relatorio']
     resumo = dados['resumo']
-    
-    # Aplica filtros de data se o formulário for válido
-    if filter_form.is_valid():
-        data_inicio = filter_form.cleaned_data.get('data_inicio')
-        data_fim = filter_form.cleaned_data.get('data_fim')
-        
-        if data_inicio:
-            relatorio = [item for item in relatorio if item['data'] >= data_inicio]
-        if data_fim:
-            relatorio = [item for item in relatorio if item['data'] <= data_fim]
 
     labels = [str(item['data'].strftime('%d/%m')) for item in relatorio]
     entradas = [float(item['entradas']) for item in relatorio]
@@ -156,6 +105,29 @@ def relatorio_fluxo_caixa(request):
     return render(request, 'accountancy/relatorio_fluxo_caixa.html', context)
 
 
+@staff_member_required
+def relatorio_fluxo_caixa_csv(request):
+    filter_form = FluxoCaixaFilterForm(request.GET)
+    data_inicio, data_fim = _periodo_fluxo_caixa(filter_form)
+    relatorio = fluxo_caixa_por_dia(data_inicio, data_fim)['relatorio']
+
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="fluxo_caixa.csv"'
+    writer = csv.writer(response)
+    writer.writerow(['data', 'entradas', 'saidas', 'saldo', 'saldo_acumulado', 'num_entradas', 'num_saidas'])
+    for item in relatorio:
+        writer.writerow([
+            item['data'].isoformat(),
+            item['entradas'],
+            item['saidas'],
+            item['saldo'],
+            item['saldo_acumulado'],
+            item['num_entradas'],
+            item['num_saidas'],
+        ])
+    return response
+
+
 @staff_member_required
 def relatorio_pedidos_pagamentos(request):
     # Inicializa o formulário de filtros
@@ -308,4 +280,7 @@ def relatorio_reconciliacao_wallet(request):
 
 @staff_member_required
 def dashboard_accountancy(request):
-    return render(request, 'accountancy/dashboard.html')
+    snapshot = ResumoSaldos.atual()
+    return render(request, 'accountancy/dashboard.html', {
+        'resumo_saldos': snapshot.as_resumo() if snapshot else None,
+    })
@@ -29,6 +29,10 @@ class Auction(BaseModel):
     class Meta:
         verbose_name = _("Auction")
         verbose_name_plural = _("Auctions")
+        indexes = [
+            # Encerramento automático: leilões abertos por data de término
+            models.Index(fields=['status', 'end_time']),
+        ]
 
 
 class Bid(BaseModel):
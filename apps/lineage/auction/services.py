@@ -1,4 +1,8 @@
+import logging
+
+from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 from django.utils.translation import gettext as _
 from .models import Bid
 from apps.lineage.wallet.models import Wallet
@@ -6,6 +10,8 @@ from apps.lineage.wallet.signals import aplicar_transacao
 from apps.lineage.inventory.models import InventoryItem, Inventory
 from apps.lineage.auction.models import Auction
 
+logger = logging.getLogger(__name__)
+
 
 @transaction.atomic
 def place_bid(auction, bidder, bid_amount, character_name):
@@ -67,6 +73,11 @@ def finish_auction(auction: Auction):
     if auction.is_active:
         raise ValueError(_("Leilão ainda está ativo."))
 
+    # Relê o status travado: evita pagar o vendedor / entregar o item duas vezes
+    status = Auction.objects.select_for_update().values_list('status', flat=True).get(pk=auction.pk)
+    if status != 'pending':
+        raise ValueError(_("Leilão já encerrado."))
+
     if auction.highest_bidder:
         # Transfere o dinheiro para o vendedor
         seller_wallet, created = Wallet.objects.get_or_create(usuario=auction.seller)
@@ -127,3 +138,64 @@ def finish_auction(auction: Auction):
         # Marca como expirado
         auction.status = 'finished'
         auction.save()
+
+
+def _claim_expired(batch_size, exclude_ids=()):
+    """
+    Trava um lote de leilões abertos e vencidos. Com skip_locked, linhas já
+    travadas por outro worker são puladas em vez de esperar, então vários
+    workers dividem a fila sem encerrar o mesmo leilão.
+    """
+    return list(
+        Auction.objects
+        .select_for_update(skip_locked=True)
+        .filter(status='pending', end_time__lte=timezone.now())
+        .exclude(id__in=exclude_ids)
+        .order_by('end_time')[:batch_size]
+    )
+
+
+def settle_expired_auctions(batch_size=None, max_batches=None) -> int:
+    """
+    Encerra os leilões vencidos em lotes, cada lote em uma transação. Um
+    leilão com erro é registrado e ignorado até a próxima execução, sem
+    desfazer os demais do lote. Retorna a quantidade encerrada.
+    """
+    batch_size = batch_size or getattr(settings, 'AUCTION_SETTLE_BATCH_SIZE', 50)
+    failed = set()
+    settled = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            auctions = _claim_expired(batch_size, exclude_ids=failed)
+            for auction in auctions:
+                try:
+                    finish_auction(auction)
+                    settled += 1
+                except Exception as e:
+                    failed.add(auction.id)
+                    logger.error(_('Erro ao encerrar leilão %(id)s: %(erro)s') % {
+                        'id': auction.id,
+                        'erro': str(e)
+                    })
+        batches += 1
+        if len(auctions) < batch_size:
+            break
+
+    return settled
+
+
+def settle_auction(auction_id) -> bool:
+    """Encerra um único leilão se ele estiver aberto e vencido (tarefa com ETA)"""
+    with transaction.atomic():
+        auction = (
+            Auction.objects
+            .select_for_update(skip_locked=True)
+            .filter(id=auction_id, status='pending', end_time__lte=timezone.now())
+            .first()
+        )
+        if auction is None:
+            return False
+        finish_auction(auction)
+    return True
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Auction
+
+
+@receiver(post_save, sender=Auction)
+def agendar_encerramento_leilao(sender, instance, created, **kwargs):
+    """
+    Agenda o encerramento exato do leilão no end_time. O beat de minuto em
+    minuto continua como rede de segurança caso a tarefa se perca.
+    """
+    if not created or not getattr(settings, 'AUCTION_EXPIRY_ETA_ENABLED', False):
+        return
+
+    from .tasks import encerrar_leilao
+
+    auction_id, end_time = instance.id, instance.end_time
+    transaction.on_commit(lambda: encerrar_leilao.apply_async(args=[auction_id], eta=end_time), robust=True)
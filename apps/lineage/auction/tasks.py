@@ -7,21 +7,25 @@ logger = logging.getLogger(__name__)
 
 @shared_task
 def encerrar_leiloes_expirados():
-    from .services import finish_auction
-    from .models import Auction
-    from django.utils.timezone import now
-
-    expirados = Auction.objects.filter(end_time__lte=now())
-    count = expirados.count()
-
-    for leilao in expirados:
-        try:
-            if leilao.is_active():
-                finish_auction(leilao)
-        except Exception as e:
-            logger.error(_('Erro ao encerrar leilão %(id)s: %(erro)s') % {
-                'id': leilao.id,
-                'erro': str(e)
-            })
+    from .services import settle_expired_auctions
+
+    count = settle_expired_auctions()
 
     logger.info(_('%(qtd)d leilões encerrados automaticamente.') % {'qtd': count})
+    return count
+
+
+@shared_task
+def encerrar_leilao(auction_id):
+    """Agendada com ETA no end_time do leilão (AUCTION_EXPIRY_ETA_ENABLED)"""
+    from .services import settle_auction
+
+    try:
+        return settle_auction(auction_id)
+    except Exception as e:
+        # O beat de encerrar_leiloes_expirados tenta de novo
+        logger.error(_('Erro ao encerrar leilão %(id)s: %(erro)s') % {
+            'id': auction_id,
+            'erro': str(e)
+        })
+        return False
@@ -5,7 +5,7 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from .models import Auction
 from apps.lineage.inventory.models import InventoryItem
-from .services import place_bid, finish_auction
+from .services import place_bid, finish_auction, settle_expired_auctions
 from apps.lineage.inventory.models import Inventory
 from datetime import timedelta
 from decimal import Decimal, InvalidOperation
@@ -29,18 +29,10 @@ LineageServices = get_query_class("LineageServices")
 
 @conditional_otp_required
 def listar_leiloes(request):
-    now = timezone.now()
-
-    expired_auctions = Auction.objects.filter(
-        status='pending',
-        end_time__lte=now
-    )
+    # Mesmo caminho do beat: trava os leilões vencidos, sem encerrar em dobro
+    settle_expired_auctions(max_batches=1)
 
-    for auction in expired_auctions:
-        try:
-            finish_auction(auction)
-        except Exception as e:
-            print(f"Erro ao finalizar leilão {auction.id}: {e}")
+    now = timezone.now()
 
     leiloes_ativos = Auction.objects.filter(end_time__gt=now, status='pending')
     leiloes_finalizados = Auction.objects.filter(status='finished')
@@ -44,6 +44,14 @@ class PrizeAdmin(BaseModelAdmin):
     display_enchant.short_description = _('Enchant')
 
 
+@admin.register(WeightsSnapshot)
+class WeightsSnapshotAdmin(BaseModelAdmin):
+    list_display = ('hash', 'created_at')
+    search_fields = ('hash',)
+    readonly_fields = ('hash', 'data', 'created_at', 'updated_at')
+    ordering = ('-created_at',)
+
+
 @admin.register(SpinHistory)
 class SpinHistoryAdmin(BaseModelAdmin):
     list_display = ('user', 'prize', 'created_at', 'fail_chance', 'get_prize_rarity')
@@ -57,7 +65,7 @@ class SpinHistoryAdmin(BaseModelAdmin):
             'fields': ('user', 'prize')
         }),
         (_('Auditoria'), {
-            'fields': ('fail_chance', 'seed', 'weights_snapshot'),
+            'fields': ('fail_chance', 'seed', 'weights_hash', 'weights_snapshot'),
             'classes': ('collapse',)
         }),
         (_('Data'), {
@@ -0,0 +1,250 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.lineage.games.choices import RARITY_CHOICES
+from apps.lineage.games.models import Prize, GameConfig, BoxType, Item
+from apps.lineage.games.services.prize_sampler import AliasTable, RouletteTable, BoxTable, DEFAULT_FAIL_CHANCE
+
+FAIL = 'falha'
+RARITIES = [rarity for rarity, _ in RARITY_CHOICES]
+# Prize.rarity tem default legado em português (COMUM)
+LEGACY_RARITIES = {'comum': 'common', 'rara': 'rare', 'epica': 'epic', 'lendaria': 'legendary'}
+
+
+def _parse_pairs(values, option, key_type, value_type):
+    pairs = {}
+    for raw in values or []:
+        key, sep, value = raw.partition('=')
+        try:
+            if not sep:
+                raise ValueError
+            pairs[key_type(key.strip())] = value_type(value)
+        except ValueError:
+            raise CommandError(f'{option} inválido: "{raw}" (use chave=valor)')
+    return pairs
+
+
+def _rarity(value):
+    value = value.lower()
+    value = LEGACY_RARITIES.get(value, value)
+    if value not in RARITIES:
+        raise ValueError
+    return value
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulação de Monte Carlo (NumPy) da roleta ou de um tipo de caixa: distribuição por prêmio e '
+        'por raridade e valor esperado, para conferir uma configuração antes de publicá-la.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spins', type=int, default=1_000_000, help='Giros simulados da roleta (padrão: 1000000)')
+        parser.add_argument('--box-type', type=int, help='Simula o tipo de caixa informado em vez da roleta')
+        parser.add_argument('--boxes', type=int, default=100_000, help='Caixas simuladas com --box-type (padrão: 100000)')
+        parser.add_argument('--fail-chance', type=float, help='Chance de falha (%%) no lugar da do GameConfig')
+        parser.add_argument(
+            '--weight', action='append', metavar='PRIZE_ID=PESO',
+            help='Peso de um prêmio no lugar do cadastrado (pode repetir)',
+        )
+        parser.add_argument(
+            '--value', action='append', metavar='RARIDADE=VALOR',
+            help='Valor de um prêmio da raridade, para o valor esperado (pode repetir)',
+        )
+        parser.add_argument('--cost', type=float, help='Custo de um giro/caixa (padrão: ficha de 0.10 ou preço da caixa)')
+        parser.add_argument('--seed', type=int, help='Seed do gerador, para repetir a simulação')
+        parser.add_argument('--chunk', type=int, default=1_000_000, help='Sorteios por lote vetorizado (padrão: 1000000)')
+
+    def handle(self, *args, **options):
+        try:
+            import numpy as np
+        except ImportError:
+            raise CommandError('NumPy não está instalado. Use: pip install numpy')
+
+        self.np = np
+        self.rng = np.random.default_rng(options['seed'])
+        self.chunk = max(1, options['chunk'])
+        self.values = _parse_pairs(options['value'], '--value', _rarity, float)
+
+        if options['box_type'] is not None:
+            self.simulate_box(options)
+        else:
+            self.simulate_roulette(options)
+
+    # ---------------------------------------------------------------- roleta
+
+    def simulate_roulette(self, options):
+        np = self.np
+        spins = options['spins']
+        if spins <= 0:
+            raise CommandError('--spins deve ser maior que zero.')
+
+        prizes = list(Prize.objects.select_related('item').order_by('id'))
+        if not prizes:
+            raise CommandError('Nenhum prêmio cadastrado.')
+
+        overrides = _parse_pairs(options['weight'], '--weight', int, int)
+        unknown = set(overrides) - {p.id for p in prizes}
+        if unknown:
+            raise CommandError(f'Prêmios inexistentes em --weight: {sorted(unknown)}')
+        for prize in prizes:
+            # Só na memória: a configuração cadastrada não muda
+            prize.weight = overrides.get(prize.id, prize.weight)
+
+        fail_chance = options['fail_chance']
+        if fail_chance is None:
+            cfg = GameConfig.objects.first()
+            fail_chance = cfg.fail_chance if cfg else DEFAULT_FAIL_CHANCE
+        if not 0 <= fail_chance <= 100:
+            raise CommandError('--fail-chance deve estar entre 0 e 100.')
+
+        try:
+            roulette = RouletteTable(prizes, fail_chance)
+        except ValueError as e:
+            raise CommandError(str(e))
+        table = roulette.table
+
+        started = time.monotonic()
+        counts = self._sample_alias(table, spins)
+        elapsed = time.monotonic() - started
+
+        names = [(p.item.name if p.item else p.name) for p in prizes] + [FAIL.capitalize()]
+        rarities = [LEGACY_RARITIES.get(p.rarity.lower(), p.rarity.lower()) for p in prizes] + [FAIL]
+        weights = [p['weight'] for p in roulette.snapshot['prizes']] + [roulette.snapshot['fail_weight']]
+        expected = np.array(table.probabilities())
+        observed = counts / spins
+
+        self.stdout.write(
+            f'Roleta: {spins} giros em {elapsed:.2f}s ({spins / max(elapsed, 1e-9):,.0f} giros/s), '
+            f'falha {fail_chance}%, configuração {roulette.snapshot_hash[:12]}'
+        )
+        self.stdout.write(f"\n{'Prêmio':<32} {'Raridade':<10} {'Peso':>10} {'Esperado':>10} {'Obtido':>10} {'z':>7}")
+        for i, name in enumerate(names):
+            self.stdout.write(
+                f'{name[:32]:<32} {rarities[i]:<10} {weights[i]:>10.2f} {expected[i]:>10.4%} '
+                f'{observed[i]:>10.4%} {self._z_score(counts[i], spins, expected[i]):>7.2f}'
+            )
+
+        self._write_rarities(rarities, expected, observed)
+        cost = options['cost'] if options['cost'] is not None else 0.10
+        self._write_expected_value(rarities, expected, counts, spins, cost, 'giro')
+
+    # ---------------------------------------------------------------- caixas
+
+    def simulate_box(self, options):
+        boxes = options['boxes']
+        if boxes <= 0:
+            raise CommandError('--boxes deve ser maior que zero.')
+
+        try:
+            box_type = BoxType.objects.get(pk=options['box_type'])
+        except BoxType.DoesNotExist:
+            raise CommandError(f"Tipo de caixa {options['box_type']} não encontrado.")
+        try:
+            table = BoxTable(box_type)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        items = Item.objects.in_bulk([item_id for ids in table.candidates.values() for item_id in ids])
+
+        started = time.monotonic()
+        rows = []
+        lost = 0
+        for rarity, count in table.boosters.items():
+            candidates = table.candidates.get(rarity) or []
+            if count <= 0:
+                continue
+            if not candidates:
+                # populate_box_with_items pula a raridade: a caixa sai com menos boosters
+                lost += count
+                continue
+            # Cada caixa sorteia `count` itens uniformes entre os candidatos da raridade
+            counts = self._sample_uniform(len(candidates), boxes * count)
+            for index, item_id in enumerate(candidates):
+                rows.append((items[item_id].name, rarity, count / len(candidates), counts[index] / boxes))
+        elapsed = time.monotonic() - started
+
+        boosters = sum(table.boosters.values())
+        self.stdout.write(
+            f'Caixa "{box_type.name}": {boxes} caixas em {elapsed:.2f}s, '
+            f'{boosters} boosters por caixa ({boosters - lost} com itens disponíveis)'
+        )
+        if lost:
+            self.stdout.write(self.style.WARNING(f'{lost} booster(s) por caixa sem itens candidatos na raridade.'))
+
+        self.stdout.write(f"\n{'Item':<32} {'Raridade':<10} {'Esperado/caixa':>15} {'Obtido/caixa':>13}")
+        for name, rarity, expected, observed in rows:
+            self.stdout.write(f'{name[:32]:<32} {rarity:<10} {expected:>15.4f} {observed:>13.4f}')
+
+        self.stdout.write('\nItens por caixa, por raridade:')
+        for rarity, count in table.boosters.items():
+            available = count if table.candidates.get(rarity) else 0
+            self.stdout.write(f'  {rarity:<10} {available}')
+
+        if self.values:
+            ev = sum(count * self.values.get(rarity, 0.0)
+                     for rarity, count in table.boosters.items() if table.candidates.get(rarity))
+            cost = options['cost'] if options['cost'] is not None else float(box_type.price)
+            self._write_ev_line(ev, 0.0, cost, 'caixa')
+
+    # --------------------------------------------------------------- sorteio
+
+    def _sample_alias(self, table: AliasTable, total: int):
+        """Contagem por índice de `total` sorteios vetorizados na tabela de alias"""
+        np = self.np
+        prob = np.array(table.prob)
+        alias = np.array(table.alias)
+        n = len(prob)
+        counts = np.zeros(n, dtype=np.int64)
+        remaining = total
+        while remaining:
+            size = min(self.chunk, remaining)
+            index = self.rng.integers(0, n, size=size)
+            outcome = np.where(self.rng.random(size) < prob[index], index, alias[index])
+            counts += np.bincount(outcome, minlength=n)
+            remaining -= size
+        return counts
+
+    def _sample_uniform(self, n: int, total: int):
+        np = self.np
+        counts = np.zeros(n, dtype=np.int64)
+        remaining = total
+        while remaining:
+            size = min(self.chunk, remaining)
+            counts += np.bincount(self.rng.integers(0, n, size=size), minlength=n)
+            remaining -= size
+        return counts
+
+    # -------------------------------------------------------------- relatório
+
+    def _z_score(self, count, total, p):
+        variance = total * p * (1 - p)
+        return 0.0 if variance <= 0 else (count - total * p) / variance ** 0.5
+
+    def _write_rarities(self, rarities, expected, observed):
+        self.stdout.write('\nDistribuição por raridade:')
+        for rarity in RARITIES + [FAIL]:
+            exp = sum(expected[i] for i, r in enumerate(rarities) if r == rarity)
+            obs = sum(observed[i] for i, r in enumerate(rarities) if r == rarity)
+            if exp or obs:
+                self.stdout.write(f'  {rarity:<10} esperado {exp:>9.4%}  obtido {obs:>9.4%}')
+
+    def _write_expected_value(self, rarities, expected, counts, total, cost, unit):
+        if not self.values:
+            self.stdout.write('\nInforme --value RARIDADE=VALOR para calcular o valor esperado.')
+            return
+        np = self.np
+        values = np.array([self.values.get(rarity, 0.0) for rarity in rarities])
+        ev = float((expected * values).sum())
+        observed_ev = float((counts * values).sum() / total)
+        # Erro padrão da média dos valores obtidos nos giros simulados
+        variance = float((counts * (values - observed_ev) ** 2).sum() / total)
+        self._write_ev_line(ev, (variance / total) ** 0.5, cost, unit, observed_ev)
+
+    def _write_ev_line(self, ev, stderr, cost, unit, observed_ev=None):
+        self.stdout.write(f'\nValor esperado por {unit}: {ev:.4f}')
+        if observed_ev is not None:
+            self.stdout.write(f'Valor obtido na simulação: {observed_ev:.4f} (± {1.96 * stderr:.4f}, 95%)')
+        if cost:
+            self.stdout.write(f'Custo por {unit}: {cost:.4f}  retorno: {ev / cost:.2%}  margem: {cost - ev:.4f}')
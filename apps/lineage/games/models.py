@@ -42,6 +42,9 @@ class SpinHistory(BaseModel):
     # Auditoria do giro
     seed = models.BigIntegerField(null=True, blank=True, verbose_name=_("Random Seed"))
     fail_chance = models.PositiveIntegerField(null=True, blank=True, verbose_name=_("Fail Chance (%)"))
+    # Hash do WeightsSnapshot usado no giro (o JSON é gravado uma vez por configuração)
+    weights_hash = models.CharField(max_length=64, null=True, blank=True, db_index=True, verbose_name=_("Weights Hash"))
+    # Legado: snapshot completo por giro, mantido para os registros antigos
     weights_snapshot = models.TextField(null=True, blank=True, verbose_name=_("Weights Snapshot (JSON)"))
 
     def __str__(self):
@@ -52,6 +55,19 @@ class SpinHistory(BaseModel):
         verbose_name_plural = _("Spin Histories")
 
 
+class WeightsSnapshot(BaseModel):
+    """Pesos da roleta em um giro, gravados uma vez por configuração (sha256 do JSON)"""
+    hash = models.CharField(max_length=64, unique=True, verbose_name=_("Hash"))
+    data = models.TextField(verbose_name=_("Weights (JSON)"))
+
+    def __str__(self):
+        return self.hash
+
+    class Meta:
+        verbose_name = _("Weights Snapshot")
+        verbose_name_plural = _("Weights Snapshots")
+
+
 class GameConfig(BaseModel):
     """Configurações do módulo de jogos (roleta, etc)."""
     fail_chance = models.PositiveIntegerField(default=20, verbose_name=_("Fail Chance (%)"))
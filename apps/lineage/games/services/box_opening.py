@@ -1,5 +1,5 @@
-import random
 from apps.lineage.games.models import *
+from .prize_sampler import new_rng
 
 def open_box(user, box_id):
     try:
@@ -8,12 +8,12 @@ def open_box(user, box_id):
         return None, "Caixa não encontrada."
 
     # Pega apenas boosters que ainda não foram usados
-    items = list(box.items.filter(opened=False))
+    items = list(box.items.select_related('item').filter(opened=False))
     if not items:
         return None, "Sem boosters disponíveis na caixa."
 
     # Sorteia um booster com base na probabilidade
-    selected_item = random.choices(
+    selected_item = new_rng().choices(
         items,
         weights=[item.probability for item in items],
         k=1
@@ -0,0 +1,281 @@
+"""
+Sorteio dos prêmios da roleta e dos itens das caixas.
+
+As tabelas de sorteio são montadas uma vez por configuração e ficam em
+memória no processo:
+- roleta: prêmios + falha em uma tabela de alias (Vose), com sorteio O(1)
+  por giro em vez de recarregar os prêmios e refazer a lista de pesos;
+- caixas: candidatos por raridade e quantidade de boosters de cada tipo de
+  caixa, sem consultar os itens permitidos a cada booster.
+
+Alterações em Prize, GameConfig, Item e BoxType (admin ou painel)
+incrementam uma versão compartilhada no cache (ver signals.py); cada worker
+confere a versão a cada poucos segundos e remonta as tabelas quando ela muda.
+
+Cada sorteio usa a sua própria instância de random.Random, semeada pelo
+secrets, sem reseed do módulo random global. Na roleta a seed fica no
+SpinHistory junto com o hash do snapshot de pesos (WeightsSnapshot, gravado
+uma vez por configuração), o que basta para refazer o giro (replay_spin).
+"""
+import json
+import time
+import random
+import hashlib
+import secrets
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Chave compartilhada entre workers; incrementada quando a configuração muda
+SAMPLER_VERSION_KEY = 'games:sampler_version'
+# Intervalo (s) entre consultas à versão compartilhada
+SAMPLER_VERSION_CHECK_INTERVAL = 10
+
+DEFAULT_FAIL_CHANCE = 20
+
+
+def new_rng(seed: Optional[int] = None) -> random.Random:
+    """Gerador próprio do sorteio; sem seed, semeado pelo secrets"""
+    return random.Random(secrets.randbits(63) if seed is None else seed)
+
+
+class AliasTable:
+    """
+    Tabela de alias de Vose: montagem O(n), sorteio O(1) com um índice
+    uniforme e um teste de moeda. prob/alias também servem para a simulação
+    vetorizada (simulate_prizes).
+    """
+
+    __slots__ = ('weights', 'total', 'prob', 'alias')
+
+    def __init__(self, weights: Sequence[float]):
+        weights = [float(w) for w in weights]
+        total = sum(weights)
+        if not weights or total <= 0 or any(w < 0 for w in weights):
+            raise ValueError("Pesos inválidos para o sorteio.")
+
+        n = len(weights)
+        scaled = [w * n / total for w in weights]
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # O que sobra nas listas tem probabilidade 1 (a menos de arredondamento)
+
+        self.weights = weights
+        self.total = total
+        self.prob = prob
+        self.alias = alias
+
+    def __len__(self):
+        return len(self.prob)
+
+    def sample(self, rng: random.Random) -> int:
+        i = rng.randrange(len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+    def probabilities(self) -> List[float]:
+        return [w / self.total for w in self.weights]
+
+
+def fail_weight_for(prize_weights: Sequence[float], fail_chance) -> float:
+    """Peso da falha para que ela saia em fail_chance% dos giros (fail_chance < 100)"""
+    return float(sum(prize_weights)) * (fail_chance / (100 - fail_chance))
+
+
+def snapshot_data(prizes, weights, fail_chance, fail_weight) -> dict:
+    """Pesos efetivamente usados na tabela, para o replay_spin refazer o mesmo sorteio"""
+    return {
+        'prizes': [{'id': p.id, 'weight': weight} for p, weight in zip(prizes, weights)],
+        'fail_chance': fail_chance,
+        'fail_weight': fail_weight,
+    }
+
+
+def snapshot_hash(data: dict) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+
+class RouletteTable:
+    """Prêmios da roleta + falha (último índice) prontos para sortear"""
+
+    def __init__(self, prizes, fail_chance):
+        self.prizes = list(prizes)
+        self.fail_chance = fail_chance
+        weights = [p.weight for p in self.prizes]
+        if fail_chance >= 100:
+            # Só a falha tem peso
+            weights, fail_weight = [0] * len(weights), 1.0
+        else:
+            fail_weight = fail_weight_for(weights, fail_chance)
+        self.table = AliasTable(weights + [fail_weight])
+        self.snapshot = snapshot_data(self.prizes, weights, fail_chance, fail_weight)
+        self.snapshot_json = json.dumps(self.snapshot)
+        self.snapshot_hash = snapshot_hash(self.snapshot)
+        self._snapshot_saved = False
+
+    def ensure_snapshot(self):
+        """Grava o WeightsSnapshot desta configuração (uma vez por processo)"""
+        from ..models import WeightsSnapshot
+
+        if self._snapshot_saved:
+            return
+        WeightsSnapshot.objects.get_or_create(hash=self.snapshot_hash, defaults={'data': self.snapshot_json})
+
+        def saved():
+            self._snapshot_saved = True
+
+        # Só marca depois do commit: se o giro for desfeito, a próxima chamada grava de novo
+        transaction.on_commit(saved)
+
+    def spin(self, seed: Optional[int] = None):
+        """(prêmio ou None para falha, seed usada)"""
+        seed = secrets.randbits(63) if seed is None else seed
+        index = self.table.sample(new_rng(seed))
+        return (self.prizes[index] if index < len(self.prizes) else None), seed
+
+
+def replay_spin(data: dict, seed: int) -> Optional[int]:
+    """Refaz um giro a partir do snapshot e da seed; retorna o id do prêmio ou None"""
+    prizes = data['prizes']
+    table = AliasTable([p['weight'] for p in prizes] + [data['fail_weight']])
+    index = table.sample(new_rng(seed))
+    return prizes[index]['id'] if index < len(prizes) else None
+
+
+def boosters_by_rarity(box_type) -> Dict[str, int]:
+    """Quantidade de boosters de cada raridade em uma caixa do tipo informado"""
+    rarities = {
+        'common': box_type.chance_common,
+        'rare': box_type.chance_rare,
+        'epic': box_type.chance_epic,
+        'legendary': box_type.chance_legendary,
+    }
+
+    total_chance = sum(rarities.values())
+    if total_chance != 100:
+        raise ValueError(f"A soma das chances não é 100%. Soma atual: {total_chance}")
+
+    boosters_count = box_type.boosters_amount
+    boosters = {
+        rarity: int((boosters_count * chance) / 100)
+        for rarity, chance in rarities.items()
+    }
+
+    # Corrigir diferenças causadas por arredondamento
+    difference = boosters_count - sum(boosters.values())
+    for rarity in sorted(rarities, key=lambda x: rarities[x], reverse=True):
+        if difference > 0:
+            boosters[rarity] += 1
+            difference -= 1
+
+    # Aplicar limites (se configurados) para épico e lendário
+    if box_type.max_epic_items > 0:
+        boosters['epic'] = min(boosters['epic'], box_type.max_epic_items)
+
+    if box_type.max_legendary_items > 0:
+        boosters['legendary'] = min(boosters['legendary'], box_type.max_legendary_items)
+
+    return boosters
+
+
+class BoxTable:
+    """Boosters por raridade e ids dos itens candidatos de um tipo de caixa"""
+
+    def __init__(self, box_type):
+        self.boosters = boosters_by_rarity(box_type)
+        candidates = defaultdict(list)
+        items = box_type.allowed_items.filter(can_be_populated=True).order_by('id').values_list('id', 'rarity')
+        for item_id, rarity in items:
+            candidates[rarity].append(item_id)
+        self.candidates = dict(candidates)
+
+    def draw(self, rng: random.Random) -> List[int]:
+        """Ids dos itens de uma caixa; raridades sem candidatos ficam de fora"""
+        selected = []
+        for rarity, count in self.boosters.items():
+            candidates = self.candidates.get(rarity)
+            if count > 0 and candidates:
+                selected.extend(rng.choice(candidates) for _ in range(count))
+        return selected
+
+
+class PrizeSampler:
+    """Tabelas de sorteio em memória, invalidadas pela versão compartilhada"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._roulette = None
+        self._boxes: Dict[int, BoxTable] = {}
+        self._version = None
+        self._checked_at = 0.0
+        # Incrementada a cada descarte: tabela montada antes dele não é guardada
+        self._generation = 0
+
+    def _discard(self):
+        with self._lock:
+            self._roulette = None
+            self._boxes = {}
+            self._generation += 1
+
+    def _check_version(self):
+        now = time.monotonic()
+        if now - self._checked_at < SAMPLER_VERSION_CHECK_INTERVAL:
+            return
+        try:
+            version = cache.get(SAMPLER_VERSION_KEY, 0)
+        except Exception:
+            version = self._version
+        self._checked_at = now
+        if version != self._version:
+            self._discard()
+            self._version = version
+
+    def invalidate(self):
+        """Descarta as tabelas neste processo e nos demais workers"""
+        self._discard()
+        try:
+            cache.incr(SAMPLER_VERSION_KEY)
+        except ValueError:
+            cache.set(SAMPLER_VERSION_KEY, 1, timeout=None)
+        except Exception:
+            pass
+
+    def roulette(self) -> Optional[RouletteTable]:
+        """Tabela da roleta; None quando não há prêmios cadastrados"""
+        from ..models import Prize, GameConfig
+
+        self._check_version()
+        table, generation = self._roulette, self._generation
+        if table is None:
+            prizes = list(Prize.objects.select_related('item').order_by('id'))
+            if not prizes:
+                return None
+            cfg = GameConfig.objects.first()
+            table = RouletteTable(prizes, cfg.fail_chance if cfg else DEFAULT_FAIL_CHANCE)
+            with self._lock:
+                if generation == self._generation:
+                    self._roulette = table
+        return table
+
+    def box(self, box_type) -> BoxTable:
+        self._check_version()
+        boxes = self._boxes
+        table = boxes.get(box_type.pk)
+        if table is None:
+            table = BoxTable(box_type)
+            # Após um descarte, grava no dicionário antigo, que já foi abandonado
+            boxes[box_type.pk] = table
+        return table
+
+
+prize_sampler = PrizeSampler()
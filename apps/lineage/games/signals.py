@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .models import Prize, GameConfig, Item, BoxType
+from .services.prize_sampler import prize_sampler
+
+
+@receiver([post_save, post_delete], sender=Prize)
+@receiver([post_save, post_delete], sender=GameConfig)
+@receiver([post_save, post_delete], sender=Item)
+@receiver([post_save, post_delete], sender=BoxType)
+def invalidate_prize_sampler(sender, **kwargs):
+    prize_sampler.invalidate()
+
+
+@receiver(m2m_changed, sender=BoxType.allowed_items.through)
+def invalidate_prize_sampler_allowed_items(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        prize_sampler.invalidate()
@@ -1,3 +1,150 @@
-from django.test import TestCase
+from collections import Counter
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from apps.main.home.models import User
+
+from .models import Box, BoxItem, BoxType, GameConfig, Item, Prize, SpinHistory
+from .services.box_populate import populate_box_with_items
+from .services.prize_sampler import RouletteTable, prize_sampler, replay_spin
+from .views import views
+
+
+class RouletteReplayTests(SimpleTestCase):
+
+    def _prizes(self):
+        return [SimpleNamespace(id=1, weight=3), SimpleNamespace(id=2, weight=1)]
+
+    def _assert_replays(self, fail_chance):
+        roulette = RouletteTable(self._prizes(), fail_chance)
+        for seed in range(500):
+            prize, _seed = roulette.spin(seed)
+            self.assertEqual(replay_spin(roulette.snapshot, seed), prize.id if prize else None)
+
+    def test_replay_matches_spin(self):
+        self._assert_replays(20)
+
+    def test_replay_matches_spin_when_every_spin_fails(self):
+        roulette = RouletteTable(self._prizes(), 100)
+
+        self.assertEqual([p['weight'] for p in roulette.snapshot['prizes']], [0, 0])
+        self._assert_replays(100)
+
+
+class PrizeSamplerDbTestCase(TestCase):
+
+    def setUp(self):
+        # O sampler é do processo: não carrega tabelas de outros testes
+        prize_sampler.invalidate()
+        self.addCleanup(prize_sampler.invalidate)
+
+    def _item(self, name, rarity, **kwargs):
+        return Item.objects.create(name=name, item_id=57, rarity=rarity, **kwargs)
+
+    def _stale(self):
+        """Worker que ainda não conferiu a versão compartilhada"""
+        patcher = mock.patch.object(prize_sampler, '_check_version')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class PopulateBoxTests(PrizeSamplerDbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='x')
+        self.box_type = BoxType.objects.create(
+            name='Caixa', price=Decimal('10.00'), boosters_amount=10,
+            chance_common=50, chance_rare=30, chance_epic=20, chance_legendary=0,
+        )
+
+    def _populate(self):
+        box = Box.objects.create(user=self.user, box_type=self.box_type)
+        populate_box_with_items(box)
+        return Counter(box.items.values_list('item__rarity', flat=True))
+
+    def test_boosters_per_rarity(self):
+        items = [self._item(f'Item {r}', r) for r in ('common', 'common', 'rare', 'epic', 'legendary')]
+        self.box_type.allowed_items.set(items)
+
+        self.assertEqual(self._populate(), {'common': 5, 'rare': 3, 'epic': 2})
+
+    def test_rarity_without_candidates_is_skipped(self):
+        items = [self._item('Comum', 'common'), self._item('Raro', 'rare'), self._item('Fora', 'epic', can_be_populated=False)]
+        self.box_type.allowed_items.set(items)
+
+        self.assertEqual(self._populate(), {'common': 5, 'rare': 3})
+
+    def test_deleted_item_in_stale_table_is_redrawn(self):
+        removido, comum = self._item('Removido', 'common'), self._item('Comum', 'common')
+        self.box_type.allowed_items.set([removido])
+        stale = prize_sampler.box(self.box_type)
+        self.box_type.allowed_items.set([comum])
+        removido.delete()
+        self._stale()
+        prize_sampler._boxes[self.box_type.pk] = stale
+
+        self._populate()
+
+        self.assertEqual(set(BoxItem.objects.values_list('item', flat=True)), {comum.pk})
+
+
+class PrizeSamplerInvalidationTests(PrizeSamplerDbTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.item = self._item('Espada', 'common')
+        self.prize = Prize.objects.create(item=self.item, name='Espada', legacy_item_code=57, weight=1)
+        self.box_type = BoxType.objects.create(name='Caixa', price=Decimal('10.00'))
+
+    def test_prize_change_discards_roulette(self):
+        table = prize_sampler.roulette()
+        self.prize.weight = 5
+        self.prize.save()
+
+        self.assertIsNot(prize_sampler.roulette(), table)
+        self.assertEqual(prize_sampler.roulette().snapshot['prizes'][0]['weight'], 5)
+
+    def test_item_change_discards_tables(self):
+        self.box_type.allowed_items.add(self.item)
+        roulette, box = prize_sampler.roulette(), prize_sampler.box(self.box_type)
+        self.item.can_be_populated = False
+        self.item.save()
+
+        self.assertIsNot(prize_sampler.roulette(), roulette)
+        self.assertEqual(prize_sampler.box(self.box_type).candidates, {})
+        self.assertIsNot(prize_sampler.box(self.box_type), box)
+
+    def test_allowed_items_change_discards_box_table(self):
+        self.assertEqual(prize_sampler.box(self.box_type).candidates, {})
+        self.box_type.allowed_items.add(self.item)
+
+        self.assertEqual(prize_sampler.box(self.box_type).candidates, {'common': [self.item.pk]})
+
+
+class SpinStaleRouletteTests(PrizeSamplerDbTestCase):
+
+    def test_deleted_prize_in_stale_table_is_respun(self):
+        GameConfig.objects.create(fail_chance=0)
+        removido = Prize.objects.create(item=self._item('Removido', 'common'), name='Removido', legacy_item_code=57)
+        stale = prize_sampler.roulette()
+        atual = Prize.objects.create(item=self._item('Atual', 'common'), name='Atual', legacy_item_code=58)
+        removido.delete()
+        self._stale()
+        prize_sampler._roulette = stale
+
+        user = User.objects.create_user(username='alice', email='alice@example.com', password='x')
+        user.fichas = 1
+        user.save()
+        request = RequestFactory().post('/games/spin/')
+        request.user = user
+        request.session = SessionStore()
+
+        response = views.spin_ajax(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(SpinHistory.objects.get(user=user).prize, atual)
@@ -1,6 +1,7 @@
 from .models import *
 from apps.main.home.models import ConquistaUsuario
 from django.contrib import messages
+from django.db.models import Q
 from django.utils.translation import gettext as gettext_lazy
 
 
@@ -97,3 +98,38 @@ def verificar_recompensas_por_conquista(user, codigo_conquista, request=None):
                 request=request
             )
             registrar_recompensa_recebida(user, recompensa)
+
+
+def verificar_recompensas_conquistas(user, codigos_conquistados, request=None):
+    """
+    Versão em lote de verificar_recompensas_por_conquista: entrega as
+    recompensas pendentes de todas as conquistas do usuário (por código e
+    por quantidade) com duas consultas, em vez de várias por conquista.
+    """
+    codigos = set(codigos_conquistados)
+    if not codigos:
+        return
+
+    recompensas_recebidas_ids = RecompensaRecebida.objects.filter(user=user).values('recompensa_id')
+    pendentes = Recompensa.objects.filter(
+        Q(tipo='CONQUISTA', referencia__in=codigos) | Q(tipo='CONQUISTAS_MULTIPLAS')
+    ).exclude(id__in=recompensas_recebidas_ids)
+
+    for recompensa in pendentes:
+        if recompensa.tipo == 'CONQUISTAS_MULTIPLAS':
+            try:
+                numero_conquistas_referencia = int(recompensa.referencia)
+            except (ValueError, TypeError):
+                continue
+            if len(codigos) < numero_conquistas_referencia:
+                continue
+
+        entregar_item_para_bag(
+            user,
+            item_id=recompensa.item_id,
+            item_name=recompensa.item_name,
+            quantity=recompensa.quantity,
+            enchant=recompensa.enchant,
+            request=request
+        )
+        registrar_recompensa_recebida(user, recompensa)
@@ -11,12 +11,11 @@ from apps.lineage.wallet.signals import aplicar_transacao
 from apps.lineage.inventory.models import Inventory, InventoryLog, InventoryItem
 from ..services.box_opening import open_box
 from ..services.box_populate import populate_box_with_items
+from ..services.prize_sampler import prize_sampler
 from django.db import transaction
 from django.db.models import Count, Q
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
-import json
-import time
 from datetime import datetime, timezone as dt_timezone
 import calendar
 
@@ -39,8 +38,8 @@ def spin_ajax(request):
     if user.fichas <= 0:
         return JsonResponse({'error': _('Você não tem fichas suficientes.')}, status=400)
 
-    prizes = list(Prize.objects.all())
-    if not prizes:
+    roulette = prize_sampler.roulette()
+    if roulette is None:
         # Auto-popula a tabela de prêmios a partir dos Itens de caixas
         weight_by_rarity = {
             'COMUM': 60,
@@ -52,7 +51,6 @@ def spin_ajax(request):
             'LENDARIA': 5,
         }
         items = Item.objects.filter(can_be_populated=True)
-        created_any = False
         for it in items:
             Prize.objects.get_or_create(
                 item=it,
@@ -64,59 +62,43 @@ def spin_ajax(request):
                     'weight': weight_by_rarity.get(str(it.rarity).upper(), 10),
                 }
             )
-            created_any = True
-        prizes = list(Prize.objects.all())
-        if not prizes:
+        roulette = prize_sampler.roulette()
+        if roulette is None:
             return JsonResponse({'error': _('Nenhum prêmio disponível.')}, status=400)
 
-    # Configurável via GameConfig
-    from ..models import GameConfig
-    cfg = GameConfig.objects.first()
-    fail_chance = cfg.fail_chance if cfg else 20  # fallback para 20%
-    total_weight = sum(p.weight for p in prizes)
-    fail_weight = total_weight * (fail_chance / (100 - fail_chance))
-
-    choices = prizes + [None]  # `None` representa a falha
-    weights = [p.weight for p in prizes] + [fail_weight]
-
-    # Auditoria: seed e snapshot de pesos
-    seed = int(time.time_ns())
-    random.seed(seed)
-    chosen = random.choices(choices, weights=weights, k=1)[0]
+    # Tabela de alias em memória; seed própria do giro (auditoria), sem tocar no random global.
+    # A tabela de outro worker pode ter até alguns segundos: um prêmio excluído nesse
+    # intervalo quebraria a FK do SpinHistory só no commit (FKs adiadas). Confere e
+    # trava o prêmio; se ele sumiu, descarta a tabela e gira de novo uma vez.
+    for attempt in range(2):
+        chosen, seed = roulette.spin()
+        prize = chosen or roulette.prizes[0]
+        if Prize.objects.select_for_update().filter(pk=prize.pk).exists():
+            break
+        prize_sampler.invalidate()
+        roulette = prize_sampler.roulette()
+        if roulette is None:
+            return JsonResponse({'error': _('Nenhum prêmio disponível.')}, status=400)
+    else:
+        return JsonResponse({'error': _('Os prêmios foram atualizados. Tente novamente.')}, status=409)
+    roulette.ensure_snapshot()
 
     # Deduz uma ficha de forma transacional
     user.fichas -= 1
     user.save(update_fields=["fichas"])
 
-    if chosen is None:
-        # Registrar auditoria mesmo em falha
-        SpinHistory.objects.create(
-            user=user,
-            prize=prizes[0],  # dummy prize para manter FK não nula; alternativa seria permitir null
-            fail_chance=fail_chance,
-            seed=seed,
-            weights_snapshot=json.dumps({
-                'prizes': [
-                    {'id': p.id, 'weight': p.weight} for p in prizes
-                ],
-                'fail_weight': fail_weight
-            })
-        )
-        return JsonResponse({'fail': True, 'message': _('Você não ganhou nenhum prêmio.')})
-
     SpinHistory.objects.create(
         user=user,
-        prize=chosen,
-        fail_chance=fail_chance,
+        # Na falha, o primeiro prêmio mantém a FK não nula
+        prize=prize,
+        fail_chance=roulette.fail_chance,
         seed=seed,
-        weights_snapshot=json.dumps({
-            'prizes': [
-                {'id': p.id, 'weight': p.weight} for p in prizes
-            ],
-            'fail_weight': fail_weight
-        })
+        weights_hash=roulette.snapshot_hash,
     )
 
+    if chosen is None:
+        return JsonResponse({'fail': True, 'message': _('Você não ganhou nenhum prêmio.')})
+
     # Certifique-se de que o usuário tenha uma bag
     bag, created = Bag.objects.get_or_create(user=user)
 
@@ -294,17 +276,19 @@ def buy_and_open_box_view(request, box_type_id):
 
     # Aplicar a transação de saída da carteira para o sistema de caixas
     try:
-        aplicar_transacao(
-            wallet=wallet,
-            tipo='SAIDA',
-            valor=total,
-            descricao=f'Compra de caixa {box_type.name}',
-            origem='Wallet',
-            destino='Sistema de Caixas'
-        )
-        # Criar a caixa e preencher com itens
-        box = Box.objects.create(user=request.user, box_type=box_type)
-        populate_box_with_items(box)
+        # Débito, caixa e itens juntos: se o sorteio falhar, o saldo volta
+        with transaction.atomic():
+            aplicar_transacao(
+                wallet=wallet,
+                tipo='SAIDA',
+                valor=total,
+                descricao=f'Compra de caixa {box_type.name}',
+                origem='Wallet',
+                destino='Sistema de Caixas'
+            )
+            # Criar a caixa e preencher com itens
+            box = Box.objects.create(user=request.user, box_type=box_type)
+            populate_box_with_items(box)
         return redirect('games:box_user_open_box', box_id=box.id)
 
     except ValueError as e:
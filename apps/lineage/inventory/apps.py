@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.lineage.inventory'
+
+    def ready(self):
+        import apps.lineage.inventory.signals
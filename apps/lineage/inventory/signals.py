@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import CustomItem
+from .utils.catalog import item_catalog
+
+
+@receiver([post_save, post_delete], sender=CustomItem)
+def invalidate_item_catalog(sender, **kwargs):
+    item_catalog.invalidate()
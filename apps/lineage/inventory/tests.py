@@ -1,3 +1,65 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import RequestFactory, TestCase
+
+from apps.main.home.models import User
+
+from . import views
+from .models import Inventory, InventoryItem, InventoryLog
+
+
+class RetirarItemServidorTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='senha')
+        self.personagem = [{'char_name': 'Heroi', 'online': 0}]
+
+    def _post(self, data):
+        request = RequestFactory().post('/inventory/withdraw/', data)
+        request.user = self.user
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return views.retirar_item_servidor(request)
+
+    def _patch_game(self):
+        db = mock.patch.object(views, 'LineageDB')
+        account = mock.patch.object(views, 'LineageAccount')
+        services = mock.patch.object(views, 'LineageServices')
+        transfer = mock.patch.object(views, 'TransferFromCharToWallet')
+        patches = [db, account, services, transfer]
+        mocks = [p.start() for p in patches]
+        for p in patches:
+            self.addCleanup(p.stop)
+
+        mocks[0].return_value.is_connected.return_value = True
+        mocks[1].check_login_exists.return_value = [{'linked_uuid': str(self.user.uuid)}]
+        mocks[2].find_chars.return_value = self.personagem
+        transfer = mocks[3]
+        transfer.find_char.return_value = self.personagem
+        transfer.list_items.return_value = [{'item_type': 57, 'count': 100}]
+        transfer.check_ingame_coin.return_value = {'total': 100, 'enchant': 0}
+        transfer.remove_ingame_coin.return_value = True
+        return transfer
+
+    def test_post_removes_item_from_game_and_credits_inventory(self):
+        transfer = self._patch_game()
+
+        response = self._post({'char_id': '1', 'item_id': '57', 'quantity': '10', 'senha': 'senha'})
+
+        self.assertEqual(response.status_code, 302)
+        transfer.remove_ingame_coin.assert_called_once_with(57, 10, '1')
+        inventory = Inventory.objects.get(user=self.user, character_name='Heroi')
+        item = InventoryItem.objects.get(inventory=inventory, item_id=57)
+        self.assertEqual(item.quantity, 10)
+        self.assertTrue(item.item_name)
+        self.assertEqual(InventoryLog.objects.get(inventory=inventory).acao, 'RETIROU_DO_JOGO')
+
+    def test_post_with_wrong_password_keeps_item_in_game(self):
+        transfer = self._patch_game()
+
+        self._post({'char_id': '1', 'item_id': '57', 'quantity': '10', 'senha': 'errada'})
+
+        transfer.remove_ingame_coin.assert_not_called()
+        self.assertFalse(InventoryItem.objects.exists())
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+ITENS_JSON_PATH = os.path.join(settings.BASE_DIR, 'utils/data/itens.json')
+ICONS_DIR = os.path.join(settings.BASE_DIR, 'static/assets/img/l2/icons')
+ICON_FILE_PREFIX = '5-'
+ICON_FILE_SUFFIX = '.jpg'
+
+# Chave compartilhada entre workers; incrementada quando um CustomItem muda
+CUSTOM_ITEMS_VERSION_KEY = 'item_catalog:custom_version'
+# Intervalo (s) entre consultas à versão compartilhada dos itens customizados
+CUSTOM_ITEMS_VERSION_CHECK_INTERVAL = 10
+
+# Acima deste id os itens base ficam em dict em vez de lista densa
+DENSE_MAX_ITEM_ID = 1_000_000
+
+
+class ItemCatalog:
+    """
+    Catálogo de itens carregado uma vez por processo.
+
+    As entradas do itens.json ficam em uma lista densa indexada pelo item_id e a
+    existência dos ícones em um bitmap (bytearray), ambos com lookup O(1).
+    Os itens customizados (CustomItem) sobrepõem o catálogo base e são
+    recarregados quando a versão compartilhada muda (sinais de post_save e
+    post_delete de CustomItem).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._base_entries = None
+        self._base_overflow: Dict[int, tuple] = {}
+        self._icons = None
+        self._custom = None
+        self._custom_version = None
+        self._custom_checked_at = 0.0
+
+    # ------------------------------------------------------------ carregamento
+
+    def _load_base(self):
+        with open(ITENS_JSON_PATH, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+
+        ids = [int(item_id) for item_id in raw]
+        max_id = min(max(ids, default=0), DENSE_MAX_ITEM_ID)
+        entries = [None] * (max_id + 1)
+        overflow = {}
+        for item_id, values in zip(ids, raw.values()):
+            # Tuplas ocupam menos que listas e preservam os campos extras
+            entry = tuple(values) if values else None
+            if item_id <= max_id:
+                entries[item_id] = entry
+            else:
+                overflow[item_id] = entry
+
+        icons = bytearray(max_id + 1)
+        try:
+            for filename in os.listdir(ICONS_DIR):
+                if filename.startswith(ICON_FILE_PREFIX) and filename.endswith(ICON_FILE_SUFFIX):
+                    try:
+                        icon_id = int(filename[len(ICON_FILE_PREFIX):-len(ICON_FILE_SUFFIX)])
+                    except ValueError:
+                        continue
+                    if 0 <= icon_id <= max_id:
+                        icons[icon_id] = 1
+        except FileNotFoundError:
+            pass
+
+        self._base_overflow = overflow
+        self._icons = icons
+        self._base_entries = entries
+
+    def _load_custom(self):
+        from apps.lineage.inventory.models import CustomItem
+
+        custom = {}
+        for item in CustomItem.objects.only('item_id', 'nome', 'imagem'):
+            custom[item.item_id] = (item.nome, item.imagem.url if item.imagem else None)
+        return custom
+
+    def _ensure_base(self):
+        if self._base_entries is None:
+            with self._lock:
+                if self._base_entries is None:
+                    self._load_base()
+
+    def _ensure_custom(self):
+        # Uma única leitura: invalidate() pode zerar self._custom a qualquer momento
+        custom = self._custom
+        now = time.monotonic()
+        if custom is not None and now - self._custom_checked_at < CUSTOM_ITEMS_VERSION_CHECK_INTERVAL:
+            return custom
+
+        try:
+            version = cache.get(CUSTOM_ITEMS_VERSION_KEY, 0)
+        except Exception:
+            version = self._custom_version
+        self._custom_checked_at = now
+
+        if custom is None or version != self._custom_version:
+            with self._lock:
+                custom = self._load_custom()
+                self._custom = custom
+                self._custom_version = version
+        return custom
+
+    def invalidate(self):
+        """Descarta os itens customizados neste processo e nos demais workers"""
+        self._custom = None
+        try:
+            cache.incr(CUSTOM_ITEMS_VERSION_KEY)
+        except ValueError:
+            cache.set(CUSTOM_ITEMS_VERSION_KEY, 1, timeout=None)
+        except Exception:
+            pass
+
+    # ---------------------------------------------------------------- consulta
+
+    def _base_name(self, item_id: int) -> Optional[str]:
+        entries = self._base_entries
+        if 0 <= item_id < len(entries):
+            entry = entries[item_id]
+        else:
+            entry = self._base_overflow.get(item_id)
+        return entry[0] if entry else None
+
+    def get_name(self, item_id, default=None) -> Optional[str]:
+        try:
+            item_id = int(item_id)
+        except (TypeError, ValueError):
+            return default
+        custom = self._ensure_custom().get(item_id)
+        if custom:
+            return custom[0]
+        self._ensure_base()
+        return self._base_name(item_id) or default
+
+    def get_names(self, item_ids: Iterable) -> Dict[int, str]:
+        """Resolve vários ids de uma vez; ids sem nome ficam de fora"""
+        result = {}
+        for item_id in item_ids:
+            name = self.get_name(item_id)
+            if name:
+                result[int(item_id)] = name
+        return result
+
+    def has_icon(self, item_id: int) -> bool:
+        self._ensure_base()
+        return 0 <= item_id < len(self._icons) and bool(self._icons[item_id])
+
+    def get_icon_url(self, item_id) -> str:
+        default_url = f"{settings.STATIC_URL}assets/img/l2/icons/default.jpg"
+        try:
+            item_id = int(item_id)
+        except (TypeError, ValueError):
+            return default_url
+
+        custom = self._ensure_custom().get(item_id)
+        if custom:
+            return custom[1] or default_url
+        if self.has_icon(item_id):
+            return f"{settings.STATIC_URL}assets/img/l2/icons/{ICON_FILE_PREFIX}{item_id}{ICON_FILE_SUFFIX}"
+        return default_url
+
+    def __contains__(self, item_id) -> bool:
+        return self.get_name(item_id) is not None
+
+    def as_dict(self) -> Dict[str, list]:
+        """Formato legado do itens.json ({"id": [nome, ...]}) já com os customizados"""
+        self._ensure_base()
+        data = {str(item_id): list(entry) for item_id, entry in enumerate(self._base_entries) if entry is not None}
+        data.update({str(item_id): list(entry) for item_id, entry in self._base_overflow.items() if entry is not None})
+        data.update({str(item_id): [name] for item_id, (name, _) in self._ensure_custom().items()})
+        return data
+
+
+item_catalog = ItemCatalog()
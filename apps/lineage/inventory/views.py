@@ -6,7 +6,7 @@ from django.contrib.auth import authenticate
 from django.utils.translation import gettext as _
 
 from django.db.models import Sum
-from .utils.items import get_itens_json
+from .utils.catalog import item_catalog
 
 from apps.main.home.models import PerfilGamer
 
@@ -84,13 +84,10 @@ def retirar_item_servidor(request):
                 return redirect('inventory:retirar_item')
 
             all_items = TransferFromCharToWallet.list_items(char_id)
-            itens_data = get_itens_json()
-
             # Substitui item_id pelo item_name
             for item in all_items:
-                item_id_str = str(item['item_type'])
-                item_name = itens_data.get(item_id_str, [f"(não identificado - {item_id_str})"])[0]
-                item['name'] = item_name
+                item_id = item['item_type']
+                item['name'] = item_catalog.get_name(item_id, f"(não identificado - {item_id})")
 
             paginator = Paginator(all_items, 10)  # 10 itens por página
             items = paginator.get_page(page_number)
@@ -142,7 +139,7 @@ def retirar_item_servidor(request):
             inventory=inventory,
             item_id=item_id,
             enchant=item_status['enchant'],
-            defaults={'item_name': itens_data.get(str(item_id), [f"(não identificado - {str(item_id)})"])[0], 'quantity': 0}
+            defaults={'item_name': item_catalog.get_name(item_id, f"(não identificado - {item_id})"), 'quantity': 0}
         )
 
         # Atualiza a quantidade
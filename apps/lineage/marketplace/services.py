@@ -10,7 +10,8 @@ from decimal import Decimal
 from .models import CharacterTransfer, MarketplaceTransaction, ClaimRequest
 from .config import MARKETPLACE_MASTER_ACCOUNT, MAX_CHARACTERS_PER_ACCOUNT
 from apps.lineage.wallet.models import Wallet
-from apps.lineage.wallet.signals import aplicar_transacao
+from apps.lineage.wallet.ledger import Lancamento, aplicar_lancamentos
+from apps.lineage.wallet.outbox import enfileirar_transferencia_personagem
 from utils.dynamic_import import get_query_class
 
 # Importa a classe de queries do Lineage dinamicamente
@@ -112,8 +113,9 @@ class MarketplaceService:
         Returns:
             CharacterTransfer: Objeto atualizado
         """
-        # 1. Buscar a transferência
-        transfer = CharacterTransfer.objects.select_for_update().get(
+        # 1. Buscar a transferência (sem lock: as validações abaixo consultam
+        # o banco do jogo e não devem segurar locks do Django)
+        transfer = CharacterTransfer.objects.get(
             id=transfer_id,
             status='for_sale'
         )
@@ -139,12 +141,25 @@ class MarketplaceService:
                 )
             )
         
+        # Verifica se o personagem está na conta mestre
+        if not LineageMarketplace.verify_character_ownership(transfer.char_id, MARKETPLACE_MASTER_ACCOUNT):
+            raise ValidationError(
+                _("Erro: personagem não está na conta do marketplace. Entre em contato com o suporte.")
+            )
+        
+        # A partir daqui só há escritas locais: locks curtos
+        transfer = CharacterTransfer.objects.select_for_update().get(
+            id=transfer_id,
+            status='for_sale'
+        )
+        
         try:
-            buyer_wallet = Wallet.objects.select_for_update().get(usuario=buyer)
+            buyer_wallet = Wallet.objects.get(usuario=buyer)
         except Wallet.DoesNotExist:
             raise ValidationError(_("Você não possui uma carteira. Entre em contato com o suporte."))
         
-        # 5. Verificar se o comprador tem saldo suficiente
+        # 5. Verificar se o comprador tem saldo suficiente (o débito abaixo
+        # confere de novo, de forma atômica)
         valor_compra = Decimal(str(transfer.price))
         if buyer_wallet.saldo < valor_compra:
             raise ValidationError(
@@ -154,37 +169,38 @@ class MarketplaceService:
             )
         
         # 6. Buscar ou criar wallet do vendedor
-        seller_wallet, created = Wallet.objects.select_for_update().get_or_create(
+        seller_wallet, created = Wallet.objects.get_or_create(
             usuario=transfer.seller,
             defaults={'saldo': Decimal('0.00'), 'saldo_bonus': Decimal('0.00')}
         )
         
         try:
-            # Debitar do comprador
-            aplicar_transacao(
-                wallet=buyer_wallet,
-                tipo='SAIDA',
-                valor=valor_compra,
-                descricao=_("Compra de personagem: {}").format(transfer.char_name),
-                origem=_("Marketplace"),
-                destino=transfer.seller.username
-            )
-            
-            # Creditar ao vendedor
-            aplicar_transacao(
-                wallet=seller_wallet,
-                tipo='ENTRADA',
-                valor=valor_compra,
-                descricao=_("Venda de personagem: {}").format(transfer.char_name),
-                origem=buyer.username,
-                destino=_("Marketplace")
-            )
+            # Debitar do comprador e creditar ao vendedor: UPDATEs atômicos na
+            # ordem das carteiras, sem deadlock entre compras cruzadas
+            aplicar_lancamentos([
+                Lancamento(
+                    wallet=buyer_wallet,
+                    tipo='SAIDA',
+                    valor=valor_compra,
+                    descricao=_("Compra de personagem: {}").format(transfer.char_name),
+                    origem=_("Marketplace"),
+                    destino=transfer.seller.username
+                ),
+                Lancamento(
+                    wallet=seller_wallet,
+                    tipo='ENTRADA',
+                    valor=valor_compra,
+                    descricao=_("Venda de personagem: {}").format(transfer.char_name),
+                    origem=buyer.username,
+                    destino=_("Marketplace")
+                ),
+            ])
             
         except ValueError as e:
             raise ValidationError(str(e))
         
         # 8. Criar transação de compra no marketplace
-        MarketplaceTransaction.objects.create(
+        compra = MarketplaceTransaction.objects.create(
             transfer=transfer,
             transaction_type='purchase',
             amount=transfer.price,
@@ -211,30 +227,18 @@ class MarketplaceService:
         transfer.new_account = buyer.username  # Registra a nova conta
         transfer.save()
         
-        # 11. NOVA REGRA: Transferir personagem da conta mestre para o comprador
-        try:
-            # Verifica se o personagem está na conta mestre
-            if not LineageMarketplace.verify_character_ownership(transfer.char_id, MARKETPLACE_MASTER_ACCOUNT):
-                raise ValidationError(
-                    _("Erro: personagem não está na conta do marketplace. Entre em contato com o suporte.")
-                )
-            
-            # Transfere da conta mestre para o comprador
-            success = LineageMarketplace.transfer_character_to_account(
-                transfer.char_id,
-                buyer.username
-            )
-            
-            if not success:
-                raise ValidationError(
-                    _("Erro ao transferir o personagem no banco do jogo. A compra será revertida. Entre em contato com o suporte.")
-                )
-                
-        except Exception as e:
-            # Se falhar a transferência no L2, reverte TUDO (por causa do @transaction.atomic)
-            raise ValidationError(
-                _("Erro ao transferir personagem: {}. A compra foi revertida e seu saldo foi restaurado.").format(str(e))
-            )
+        # 11. NOVA REGRA: Transferir personagem da conta mestre para o comprador.
+        # A troca de conta no banco do jogo é registrada no outbox e aplicada
+        # pelo worker após o commit (com novas tentativas se o servidor falhar).
+        enfileirar_transferencia_personagem(
+            usuario=buyer,
+            char_id=transfer.char_id,
+            personagem=transfer.char_name,
+            conta_destino=buyer.username,
+            # Uma chave por compra: se a entrega falhar e o anúncio voltar à
+            # venda, a próxima compra gera a sua própria entrega
+            chave=f'marketplace:{transfer.id}:{compra.id}',
+        )
         
         return transfer
     
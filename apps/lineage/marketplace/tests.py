@@ -1,4 +1,53 @@
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from apps.lineage.wallet.models import EntregaServidor, Wallet
+from apps.lineage.wallet.outbox import ProcessadorEntregas
+from apps.main.home.models import User
+
+from . import services
+from .models import CharacterTransfer
+from .services import MarketplaceService
+
+
+def _usuario(username, saldo):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password='x')
+    Wallet.objects.create(usuario=user, saldo=Decimal(saldo))
+    return user
+
+
+class RevendaAposFalhaNaEntregaTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(services, 'LineageMarketplace')
+        lineage = patcher.start()
+        self.addCleanup(patcher.stop)
+        lineage.count_characters_in_account.return_value = 0
+        lineage.get_character_details.return_value = {'online': 0}
+        lineage.verify_character_ownership.return_value = True
+
+        self.vendedor = _usuario('vendedor', '0.00')
+        self.comprador = _usuario('comprador', '100.00')
+        self.transfer = CharacterTransfer.objects.create(
+            char_id=10, char_name='Heroi', char_level=80, char_class=1, old_account='vendedor',
+            seller=self.vendedor, price=Decimal('30.00'), status='for_sale',
+        )
+
+    def test_listing_can_be_bought_again_after_delivery_fails(self):
+        MarketplaceService.purchase_character(self.comprador, self.transfer.id)
+        entrega = EntregaServidor.objects.get(tipo='PERSONAGEM')
+        ProcessadorEntregas()._falhar(entrega, 'erro no servidor')
+
+        self.transfer.refresh_from_db()
+        self.assertEqual(self.transfer.status, 'for_sale')
+
+        MarketplaceService.purchase_character(self.comprador, self.transfer.id)
 
+        self.transfer.refresh_from_db()
+        self.assertEqual((self.transfer.status, self.transfer.buyer), ('sold', self.comprador))
+        self.assertEqual(EntregaServidor.objects.filter(tipo='PERSONAGEM').count(), 2)
+        self.assertEqual(EntregaServidor.objects.get(status='PENDENTE').char_id, 10)
+        self.assertEqual(Wallet.objects.get(usuario=self.comprador).saldo, Decimal('70.00'))
+        self.assertEqual(Wallet.objects.get(usuario=self.vendedor).saldo, Decimal('30.00'))
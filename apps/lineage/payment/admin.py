@@ -89,48 +89,14 @@ class PagamentoAdmin(BaseModelAdmin):
 
     @admin.action(description='Reconciliar pagamentos pendentes (Mercado Pago)')
     def reconciliar_mercadopago(self, request, queryset):
-        import mercadopago
-        from django.utils import timezone
-        from apps.lineage.wallet.utils import aplicar_compra_com_bonus
-        from decimal import Decimal
-        sdk = mercadopago.SDK(request.settings.MERCADO_PAGO_ACCESS_TOKEN) if hasattr(request, 'settings') else mercadopago.SDK(__import__('django.conf').conf.settings.MERCADO_PAGO_ACCESS_TOKEN)
+        from .reconciliation import MercadoPagoReconciler
 
-        reconciliados = 0
-        for pagamento in queryset.select_related('pedido_pagamento', 'usuario'):
-            if pagamento.status != 'pending':
-                continue
-            pedido = pagamento.pedido_pagamento
-            if not pedido or pedido.metodo != 'MercadoPago':
-                continue
-
-            try:
-                search = sdk.merchant_order().search({'external_reference': str(pagamento.id)})
-                if search.get('status') == 200:
-                    results = (search.get('response') or {}).get('elements', [])
-                    for order in results:
-                        pagamentos_mp = order.get('payments', [])
-                        aprovado = any(p.get('status') == 'approved' for p in pagamentos_mp)
-                        if aprovado:
-                            from django.db import transaction
-                            with transaction.atomic():
-                                wallet, _ = pedido.usuario.wallet_set.get_or_create(usuario=pagamento.usuario)
-                                valor_total, valor_bonus, _ = aplicar_compra_com_bonus(
-                                    wallet, Decimal(str(pagamento.valor)), 'MercadoPago'
-                                )
-                                pagamento.status = 'paid'
-                                pagamento.processado_em = timezone.now()
-                                pagamento.save()
-                                pedido.bonus_aplicado = valor_bonus
-                                pedido.total_creditado = valor_total
-                                pedido.status = 'CONCLUÍDO'
-                                pedido.save()
-                                reconciliados += 1
-                            break
-            except Exception:
-                # Continua com próximos itens sem interromper a ação
-                continue
+        ids = queryset.filter(
+            status='pending', pedido_pagamento__metodo='MercadoPago'
+        ).values_list('id', flat=True)
+        resultado = MercadoPagoReconciler().reconcile_ids(ids)
 
-        self.message_user(request, f"{reconciliados} pagamento(s) reconciliado(s) com sucesso.")
+        self.message_user(request, f"{resultado.reconciled} pagamento(s) reconciliado(s) com sucesso.")
 
     @admin.action(description='Processar pagamentos aprovados (creditar e concluir)')
     def processar_aprovados(self, request, queryset):
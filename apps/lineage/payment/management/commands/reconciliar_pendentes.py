@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from apps.lineage.payment.utils import reconciliar_pendentes_mercadopago
+from apps.lineage.payment.reconciliation import MercadoPagoReconciler, reconciliation_metrics
 
 
 class Command(BaseCommand):
@@ -7,8 +7,23 @@ class Command(BaseCommand):
 
 	def add_arguments(self, parser):
 		parser.add_argument('--cutoff-minutes', type=int, default=5, help='Minutos mínimos desde a criação para tentar conciliar')
+		parser.add_argument('--metrics', action='store_true', help='Apenas exibe as métricas das últimas execuções')
 
 	def handle(self, *args, **options):
+		if options.get('metrics'):
+			metrics = reconciliation_metrics()
+			self.stdout.write(f"Última execução: {metrics.get('last_run') or '-'}")
+			self.stdout.write(f"Acumulado: {metrics.get('totals') or '-'}")
+			return
+
 		cutoff = options.get('cutoff_minutes', 5)
-		reconciliados = reconciliar_pendentes_mercadopago(cutoff_minutes=cutoff)
-		self.stdout.write(self.style.SUCCESS(f'Reconciliados: {reconciliados}'))
+		resultado = MercadoPagoReconciler().run(cutoff_minutes=cutoff)
+		if resultado.skipped:
+			self.stdout.write(self.style.WARNING('Outra reconciliação está em andamento; nada a fazer.'))
+			return
+		self.stdout.write(self.style.SUCCESS(
+			f'Reconciliados: {resultado.reconciled} (consultados: {resultado.checked}, '
+			f'erros: {resultado.errors}, {resultado.duration:.2f}s)'
+		))
+		if resultado.budget_exhausted:
+			self.stdout.write('Limite da execução atingido; a próxima continua de onde esta parou.')
@@ -0,0 +1,295 @@
+"""
+Reconciliação dos pagamentos pendentes do Mercado Pago.
+
+O beat chama a cada minuto. Cada execução:
+- pega um lease no cache (Redis); se outra execução ainda está rodando, sai
+  sem fazer nada, então beats sobrepostos não processam o mesmo pagamento;
+- continua a partir de um cursor (último id visto), com limite de itens e de
+  tempo por execução, então um backlog grande é percorrido em várias rodadas;
+- consulta o Mercado Pago em paralelo (pool de threads, uma Session HTTP com
+  keep-alive por thread) e aplica os créditos na thread principal, com o
+  pagamento travado (select_for_update) para não creditar duas vezes;
+- publica métricas da última execução e acumuladas em cache.
+"""
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Pagamento
+
+logger = logging.getLogger(__name__)
+
+LEASE_CACHE_KEY = 'mp_reconcile:lease'
+CURSOR_CACHE_KEY = 'mp_reconcile:cursor'
+METRICS_CACHE_KEY = 'mp_reconcile:metrics'
+DEFAULT_API_BASE_URL = 'https://api.mercadopago.com'
+
+
+class MercadoPagoClient:
+    """
+    Cliente mínimo para a busca de merchant orders. O SDK abre uma Session
+    nova a cada chamada; aqui cada thread reaproveita a sua.
+    """
+
+    def __init__(self, access_token: str, base_url: str = DEFAULT_API_BASE_URL, timeout: float = 10):
+        self.access_token = access_token
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers['Authorization'] = f'Bearer {self.access_token}'
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def search_merchant_orders(self, external_reference: str) -> list:
+        response = self._session().get(
+            f'{self.base_url}/merchant_orders/search',
+            params={'external_reference': external_reference},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return (response.json() or {}).get('elements') or []
+
+    def close(self):
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+
+
+def order_is_approved(orders: Iterable[dict]) -> bool:
+    return any(
+        p.get('status') == 'approved'
+        for order in orders
+        for p in (order.get('payments') or [])
+    )
+
+
+@dataclass
+class ReconcileResult:
+    started_at: float = 0.0
+    duration: float = 0.0
+    checked: int = 0
+    reconciled: int = 0
+    errors: int = 0
+    # True quando outra execução segurava o lease
+    skipped: bool = False
+    # True quando o limite de itens/tempo parou a execução antes do fim da fila
+    budget_exhausted: bool = False
+    cursor: int = 0
+
+
+class MercadoPagoReconciler:
+
+    def __init__(self, client: Optional[MercadoPagoClient] = None):
+        self._client = client
+
+    # -------------------------------------------------------------- ajustes
+
+    @property
+    def max_workers(self) -> int:
+        return max(1, getattr(settings, 'MP_RECONCILE_MAX_WORKERS', 8))
+
+    @property
+    def max_per_run(self) -> int:
+        return max(1, getattr(settings, 'MP_RECONCILE_MAX_PER_RUN', 200))
+
+    @property
+    def time_budget(self) -> float:
+        return getattr(settings, 'MP_RECONCILE_TIME_BUDGET', 45)
+
+    @property
+    def lease_ttl(self) -> int:
+        # Cobre o orçamento de tempo mais um lote de requisições em andamento
+        return int(self.time_budget + self.client.timeout * 2) + 1
+
+    @property
+    def client(self) -> MercadoPagoClient:
+        if self._client is None:
+            self._client = MercadoPagoClient(
+                settings.MERCADO_PAGO_ACCESS_TOKEN,
+                base_url=getattr(settings, 'MERCADO_PAGO_API_BASE_URL', DEFAULT_API_BASE_URL),
+                timeout=getattr(settings, 'MP_RECONCILE_HTTP_TIMEOUT', 10),
+            )
+        return self._client
+
+    # ---------------------------------------------------------------- lease
+
+    def _acquire_lease(self) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if cache.add(LEASE_CACHE_KEY, token, timeout=self.lease_ttl):
+            return token
+        return None
+
+    def _release_lease(self, token: str):
+        if cache.get(LEASE_CACHE_KEY) == token:
+            cache.delete(LEASE_CACHE_KEY)
+
+    # ------------------------------------------------------------ execução
+
+    def _pending_ids(self, cutoff_minutes: int, after_id: int, limit: int) -> List[int]:
+        limite = timezone.now() - timedelta(minutes=cutoff_minutes)
+        return list(
+            Pagamento.objects
+            .filter(
+                status='pending',
+                pedido_pagamento__status='PENDENTE',
+                pedido_pagamento__metodo='MercadoPago',
+                data_criacao__lte=limite,
+                id__gt=after_id,
+            )
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+
+    def _lookup(self, pagamento_id: int):
+        try:
+            return pagamento_id, order_is_approved(self.client.search_merchant_orders(str(pagamento_id))), None
+        except Exception as e:
+            return pagamento_id, False, e
+
+    def _apply(self, pagamento_id: int) -> bool:
+        """Credita o pagamento aprovado; no-op se já foi processado por outro fluxo"""
+        from apps.lineage.wallet.models import Wallet
+        from apps.lineage.wallet.utils import aplicar_compra_com_bonus
+
+        with transaction.atomic():
+            pagamento = (
+                Pagamento.objects
+                .select_for_update()
+                .select_related('pedido_pagamento', 'usuario')
+                .get(id=pagamento_id)
+            )
+            pedido = pagamento.pedido_pagamento
+            if pagamento.status != 'pending' or not pedido or pedido.status != 'PENDENTE':
+                return False
+
+            wallet, _ = Wallet.objects.get_or_create(usuario=pagamento.usuario)
+            # Relê travado: serializa créditos concorrentes na mesma carteira
+            wallet = Wallet.objects.select_for_update().get(pk=wallet.pk)
+            valor_total, valor_bonus, _ = aplicar_compra_com_bonus(
+                wallet, Decimal(str(pagamento.valor)), 'MercadoPago'
+            )
+            pagamento.status = 'paid'
+            pagamento.processado_em = timezone.now()
+            pagamento.save()
+            pedido.bonus_aplicado = valor_bonus
+            pedido.total_creditado = valor_total
+            pedido.status = 'CONCLUÍDO'
+            pedido.save()
+        return True
+
+    def _process(self, ids: List[int], result: ReconcileResult, deadline: Optional[float] = None):
+        """Consulta em lotes do tamanho do pool; para de enviar lotes após o deadline"""
+        batch_size = self.max_workers
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='mp-reconcile') as executor:
+            for start in range(0, len(ids), batch_size):
+                if deadline is not None and time.monotonic() >= deadline:
+                    result.budget_exhausted = True
+                    break
+                for pagamento_id, approved, error in executor.map(self._lookup, ids[start:start + batch_size]):
+                    result.checked += 1
+                    result.cursor = pagamento_id
+                    if error is not None:
+                        result.errors += 1
+                        logger.warning(f"Falha ao consultar pagamento {pagamento_id} no Mercado Pago: {error}")
+                        continue
+                    if not approved:
+                        continue
+                    try:
+                        if self._apply(pagamento_id):
+                            result.reconciled += 1
+                    except Exception as e:
+                        result.errors += 1
+                        logger.error(f"Erro ao creditar pagamento {pagamento_id}: {e}")
+
+    def run(self, cutoff_minutes: int = 5) -> ReconcileResult:
+        result = ReconcileResult(started_at=time.time())
+        started = time.monotonic()
+
+        token = self._acquire_lease()
+        if token is None:
+            result.skipped = True
+            self._record(result)
+            return result
+
+        try:
+            after_id = cache.get(CURSOR_CACHE_KEY, 0)
+            ids = self._pending_ids(cutoff_minutes, after_id, self.max_per_run)
+            if not ids and after_id:
+                # Fim da fila: recomeça do início na mesma execução
+                after_id = 0
+                ids = self._pending_ids(cutoff_minutes, 0, self.max_per_run)
+
+            result.cursor = after_id
+            if ids:
+                self._process(ids, result, deadline=started + self.time_budget)
+                if len(ids) == self.max_per_run:
+                    result.budget_exhausted = True
+
+            # Com a fila percorrida até o fim, a próxima execução volta ao início
+            cache.set(CURSOR_CACHE_KEY, result.cursor if result.budget_exhausted else 0, timeout=None)
+        finally:
+            self.client.close()
+            self._release_lease(token)
+
+        result.duration = time.monotonic() - started
+        self._record(result)
+        return result
+
+    def reconcile_ids(self, ids: Iterable[int]) -> ReconcileResult:
+        """Reconciliação sob demanda (ação do admin): sem lease, cursor ou limite"""
+        result = ReconcileResult(started_at=time.time())
+        started = time.monotonic()
+        try:
+            self._process(sorted(ids), result)
+        finally:
+            self.client.close()
+        result.duration = time.monotonic() - started
+        return result
+
+    # ------------------------------------------------------------- métricas
+
+    def _record(self, result: ReconcileResult):
+        if result.skipped:
+            logger.info("Reconciliação do Mercado Pago ignorada: outra execução em andamento")
+        elif result.checked:
+            logger.info(
+                f"Reconciliação do Mercado Pago: {result.checked} consultados, {result.reconciled} "
+                f"reconciliados, {result.errors} erros em {result.duration:.2f}s"
+            )
+        try:
+            metrics = cache.get(METRICS_CACHE_KEY) or {}
+            totals = metrics.get('totals') or {}
+            for name in ('checked', 'reconciled', 'errors'):
+                totals[name] = totals.get(name, 0) + getattr(result, name)
+            totals['runs'] = totals.get('runs', 0) + (0 if result.skipped else 1)
+            totals['skipped'] = totals.get('skipped', 0) + (1 if result.skipped else 0)
+            cache.set(METRICS_CACHE_KEY, {'last_run': asdict(result), 'totals': totals}, timeout=None)
+        except Exception as e:
+            logger.warning(f"Não foi possível registrar as métricas da reconciliação: {e}")
+
+
+def reconciliation_metrics() -> dict:
+    """Métricas publicadas: {'last_run': {...}, 'totals': {...}}"""
+    return cache.get(METRICS_CACHE_KEY) or {}
@@ -1,3 +1,167 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.lineage.wallet.models import Wallet
+from apps.main.home.models import User
+
+from .models import Pagamento, PedidoPagamento
+from .reconciliation import LEASE_CACHE_KEY, MercadoPagoReconciler, reconciliation_metrics
+
+
+class FakeMercadoPago:
+    """
+    Servidor HTTP local que imita GET /merchant_orders/search. `orders`
+    mapeia external_reference para o status do pagamento ou para um código
+    HTTP de erro (int).
+    """
+
+    def __init__(self, delay=0.0):
+        self.orders = {}
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}'
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                reference = parse_qs(url.query).get('external_reference', [''])[0]
+                with fake._lock:
+                    fake.requests.append((url.path, reference, self.headers.get('Authorization')))
+                    fake.active += 1
+                    fake.max_active = max(fake.max_active, fake.active)
+                try:
+                    time.sleep(fake.delay)
+                    status = fake.orders.get(reference)
+                    if isinstance(status, int):
+                        self.send_response(status)
+                        self.end_headers()
+                        return
+                    elements = [{'payments': [{'status': status}]}] if status else []
+                    body = json.dumps({'elements': elements}).encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with fake._lock:
+                        fake.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MercadoPagoReconcilerTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='comprador', email='comprador@example.com', password='x')
+
+    def _pagamento(self, valor='10.00'):
+        pedido = PedidoPagamento.objects.create(
+            usuario=self.user, valor_pago=Decimal(valor), moedas_geradas=Decimal(valor), metodo='MercadoPago'
+        )
+        return Pagamento.objects.create(usuario=self.user, valor=Decimal(valor), pedido_pagamento=pedido)
+
+    def _settings(self, fake, **overrides):
+        values = {
+            'MERCADO_PAGO_API_BASE_URL': fake.url,
+            'MERCADO_PAGO_ACCESS_TOKEN': 'TEST-TOKEN',
+            'MP_RECONCILE_MAX_WORKERS': 4,
+            'MP_RECONCILE_MAX_PER_RUN': 200,
+            'MP_RECONCILE_TIME_BUDGET': 30,
+            'MP_RECONCILE_HTTP_TIMEOUT': 5,
+        }
+        values.update(overrides)
+        return override_settings(**values)
+
+    def test_credits_only_approved_payments(self):
+        aprovado, pendente, com_erro = self._pagamento('10.00'), self._pagamento('20.00'), self._pagamento('30.00')
+        with FakeMercadoPago() as fake, self._settings(fake):
+            fake.orders = {str(aprovado.id): 'approved', str(pendente.id): 'pending', str(com_erro.id): 500}
+            result = MercadoPagoReconciler().run(cutoff_minutes=0)
+
+        self.assertEqual((result.checked, result.reconciled, result.errors), (3, 1, 1))
+        self.assertEqual({r[2] for r in fake.requests}, {'Bearer TEST-TOKEN'})
+        aprovado.refresh_from_db()
+        self.assertEqual(aprovado.status, 'paid')
+        self.assertEqual(aprovado.pedido_pagamento.status, 'CONCLUÍDO')
+        self.assertEqual(Pagamento.objects.filter(status='pending').count(), 2)
+        self.assertEqual(Wallet.objects.get(usuario=self.user).saldo, Decimal('10.00'))
+        self.assertEqual(reconciliation_metrics()['totals']['reconciled'], 1)
+
+    def test_second_run_does_not_credit_twice(self):
+        pagamento = self._pagamento()
+        with FakeMercadoPago() as fake, self._settings(fake):
+            fake.orders = {str(pagamento.id): 'approved'}
+            MercadoPagoReconciler().run(cutoff_minutes=0)
+            result = MercadoPagoReconciler().run(cutoff_minutes=0)
+
+        self.assertEqual(result.reconciled, 0)
+        self.assertEqual(Wallet.objects.get(usuario=self.user).saldo, Decimal('10.00'))
+
+    def test_lookups_are_concurrent_and_bounded(self):
+        pagamentos = [self._pagamento() for _ in range(8)]
+        with FakeMercadoPago(delay=0.1) as fake, self._settings(fake, MP_RECONCILE_MAX_WORKERS=3):
+            fake.orders = {str(p.id): 'approved' for p in pagamentos}
+            result = MercadoPagoReconciler().run(cutoff_minutes=0)
+
+        self.assertEqual(result.reconciled, 8)
+        self.assertGreater(fake.max_active, 1)
+        self.assertLessEqual(fake.max_active, 3)
+
+    def test_overlapping_run_is_skipped(self):
+        self._pagamento()
+        cache.set(LEASE_CACHE_KEY, 'outra-execucao', timeout=60)
+        with FakeMercadoPago() as fake, self._settings(fake):
+            result = MercadoPagoReconciler().run(cutoff_minutes=0)
+
+        self.assertTrue(result.skipped)
+        self.assertEqual(fake.requests, [])
+        self.assertEqual(reconciliation_metrics()['totals']['skipped'], 1)
+
+    def test_budget_and_cursor_spread_backlog_across_runs(self):
+        pagamentos = [self._pagamento() for _ in range(5)]
+        with FakeMercadoPago() as fake, self._settings(fake, MP_RECONCILE_MAX_PER_RUN=2):
+            first = MercadoPagoReconciler().run(cutoff_minutes=0)
+            second = MercadoPagoReconciler().run(cutoff_minutes=0)
+            third = MercadoPagoReconciler().run(cutoff_minutes=0)
+            fourth = MercadoPagoReconciler().run(cutoff_minutes=0)
+
+        consultados = [int(r[1]) for r in fake.requests]
+        ids = [p.id for p in pagamentos]
+        self.assertEqual([r.checked for r in (first, second, third, fourth)], [2, 2, 1, 2])
+        self.assertEqual(sorted(consultados), sorted(ids + ids[:2]))
+        self.assertTrue(first.budget_exhausted and second.budget_exhausted)
+        self.assertFalse(third.budget_exhausted)
+        # Após o fim da fila o cursor volta ao início
+        self.assertEqual(fourth.checked, 2)
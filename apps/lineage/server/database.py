@@ -1,12 +1,13 @@
 import os
-import time
 import threading
-from typing import Any, Dict, Tuple, List, Optional
+from typing import Any, Dict, Iterator, Tuple, List, Optional
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import DisconnectionError, OperationalError, SQLAlchemyError, TimeoutError as PoolTimeoutError
 from sqlalchemy.engine import Engine, Result
 from urllib.parse import quote_plus
+from apps.lineage.server.utils.query_cache import BaseQueryCache, build_query_cache
+from apps.lineage.server.utils.db_health import CircuitBreaker, DatabaseHealthMonitor
 
 load_dotenv()
 
@@ -27,15 +28,25 @@ class LineageDB:
             return
 
         self.engine: Optional[Engine] = None
-        self.cache: Dict[Tuple[str, Tuple[Any, ...]], Tuple[List[Dict], float]] = {}
-        self.cache_ttl = 60  # segundos
+        # Cache de resultados do select(): LRU local ou compartilhado (Redis)
+        self.cache: BaseQueryCache = build_query_cache()
+        self.cache_ttl = self.cache.default_ttl  # segundos
         self.enabled = os.getenv("LINEAGE_DB_ENABLED", "false").lower() == "true"
-        # Estado do healthcheck
-        self._last_check_time: float = 0.0
-        self._last_check_ok: bool = False
+        # Healthcheck em segundo plano + circuit breaker
         self._check_cooldown_seconds: int = int(os.getenv("LINEAGE_DB_CHECK_COOLDOWN", "20"))
         self._ping_timeout_seconds: int = int(os.getenv("LINEAGE_DB_PING_TIMEOUT", "2"))
-        
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("LINEAGE_DB_BREAKER_THRESHOLD", "3")),
+            reset_timeout=self._check_cooldown_seconds,
+        )
+        self.health = DatabaseHealthMonitor(
+            probe=self._ping,
+            breaker=self.breaker,
+            interval=float(os.getenv("LINEAGE_DB_HEALTH_INTERVAL", "15")),
+            max_backoff=float(os.getenv("LINEAGE_DB_HEALTH_MAX_BACKOFF", "120")),
+            shared=os.getenv("LINEAGE_DB_HEALTH_SHARED", "false").lower() == "true",
+        )
+
         if self.enabled:
             self._connect()
         else:
@@ -96,18 +107,20 @@ class LineageDB:
         return query, new_params
 
     def _get_cache(self, query: str, params: Tuple) -> Optional[List[Dict]]:
-        key = (query, params)
-        if key in self.cache:
-            data, timestamp = self.cache[key]
-            if time.time() - timestamp < self.cache_ttl:
-                print("⚡ Consulta retornada do cache")
-                return data
-            else:
-                del self.cache[key]
-        return None
+        return self.cache.get((query, params))
+
+    def _set_cache(self, query: str, params: Tuple, data: List[Dict], ttl: Optional[int] = None):
+        self.cache.set((query, params), data, ttl=ttl)
 
-    def _set_cache(self, query: str, params: Tuple, data: List[Dict]):
-        self.cache[(query, params)] = (data, time.time())
+    def _record_failure(self, error: SQLAlchemyError):
+        if not isinstance(error, (OperationalError, DisconnectionError, PoolTimeoutError)):
+            # Erro de SQL com o banco respondendo não conta para o circuito
+            self.breaker.record_success()
+            return
+        self.breaker.record_failure()
+        if self.breaker.state != CircuitBreaker.CLOSED:
+            # Circuito aberto: antecipa o healthcheck para detectar a volta do banco
+            self.health.check_now()
 
     def _safe_execute_read(self, query: str, params: Dict[str, Any]) -> Optional[Result]:
         if not self.enabled:
@@ -115,13 +128,19 @@ class LineageDB:
         if not self.engine:
             print("⚠️ Sem conexão com o banco")
             return None
+        if not self.breaker.allow():
+            # Banco fora do ar: falha na hora em vez de esperar o connect timeout
+            return None
         try:
             query, normalized_params = self._normalize_params(query, params)
             with self.engine.connect() as conn:
                 stmt = text(query)
-                return conn.execute(stmt, normalized_params)
+                result = conn.execute(stmt, normalized_params)
+            self.breaker.record_success()
+            return result
         except SQLAlchemyError as e:
             print(f"❌ Erro na execução: {e}")
+            self._record_failure(e)
             return None
 
     def _safe_execute_write(self, query: str, params: Dict[str, Any]) -> Optional[Result]:
@@ -130,58 +149,63 @@ class LineageDB:
         if not self.engine:
             print("⚠️ Sem conexão com o banco")
             return None
+        if not self.breaker.allow():
+            return None
         try:
             query, normalized_params = self._normalize_params(query, params)
             with self.engine.begin() as conn:
                 stmt = text(query)
-                return conn.execute(stmt, normalized_params)
+                result = conn.execute(stmt, normalized_params)
+            self.breaker.record_success()
+            return result
         except SQLAlchemyError as e:
             print(f"❌ Erro na execução: {e}")
+            self._record_failure(e)
             return None
 
-    def is_connected(self) -> bool:
-        if not self.enabled:
-            return False
+    def _ping(self) -> bool:
+        """SELECT 1 executado pelo monitor de saúde (fora do ciclo das requisições)"""
         if not self.engine:
             return False
-        # Respeita cooldown quando último resultado foi negativo
-        now = time.time()
-        if not self._last_check_ok and (now - self._last_check_time) < self._check_cooldown_seconds:
-            return False
-
-        result_container = {"ok": False}
-        done = threading.Event()
-
-        def ping_db():
-            try:
-                with self.engine.connect() as conn:
-                    conn.execute(text("SELECT 1"))
-                result_container["ok"] = True
-            except Exception as e:
-                print(f"❌ Conexão perdida: {e}")
-            finally:
-                done.set()
-
-        t = threading.Thread(target=ping_db, daemon=True)
-        t.start()
-        finished = done.wait(timeout=self._ping_timeout_seconds)
-
-        if not finished:
-            # Falha por timeout; descarta conexões do pool para evitar estados zumbis
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            print(f"❌ Conexão perdida: {e}")
+            # Descarta conexões do pool para evitar estados zumbis
             try:
-                if self.engine:
-                    self.engine.dispose()
+                self.engine.dispose()
             except Exception:
                 pass
-            self._last_check_ok = False
-            self._last_check_time = now
             return False
 
-        self._last_check_ok = result_container["ok"]
-        self._last_check_time = now
-        return self._last_check_ok
+    def is_connected(self) -> bool:
+        """
+        Estado do banco segundo o monitor de saúde, lido em O(1). Só a
+        primeira chamada do processo espera (até LINEAGE_DB_PING_TIMEOUT) pelo
+        healthcheck inicial.
+        """
+        if not self.enabled:
+            return False
+        if not self.engine:
+            return False
+        self.health.start()
+        if not self.health.wait_first_check(self._ping_timeout_seconds):
+            return False
+        return self.health.is_healthy and self.breaker.state != CircuitBreaker.OPEN
 
-    def select(self, query: str, params: Dict[str, Any] = {}, use_cache: bool = False) -> Optional[List[Dict]]:
+    def health_status(self) -> Dict[str, Any]:
+        """Estado do monitor de saúde e do circuit breaker"""
+        return self.health.as_dict()
+
+    def select(self, query: str, params: Dict[str, Any] = {}, use_cache: bool = False,
+               cache_ttl: Optional[int] = None) -> Optional[List[Dict]]:
+        """
+        Executa uma consulta de leitura. Com use_cache=True o resultado é
+        guardado no cache de consultas; cache_ttl sobrescreve o TTL padrão
+        (LINEAGE_DB_CACHE_TTL) apenas para esta consulta.
+        """
         if not self.enabled:
             return []
         params = params or {}
@@ -198,9 +222,37 @@ class LineageDB:
 
         rows = result.mappings().all()
         if use_cache:
-            self._set_cache(query_exp, param_tuple, rows)
+            self._set_cache(query_exp, param_tuple, rows, ttl=cache_ttl)
         return rows
 
+    def stream(self, query: str, params: Dict[str, Any] = {}, batch_size: int = 1000) -> Iterator[List[Dict]]:
+        """
+        Executa uma leitura com cursor no servidor (stream_results) e entrega
+        as linhas em lotes de `batch_size`, sem carregar o resultado inteiro
+        em memória. Não usa cache. Diferente de select(), erros de execução
+        são propagados: um resultado parcial silencioso corromperia quem
+        está consumindo o stream.
+        """
+        if not self.enabled:
+            return
+        if not self.engine:
+            print("⚠️ Sem conexão com o banco")
+            return
+        if not self.breaker.allow():
+            raise ConnectionError("Banco Lineage indisponível (circuito aberto)")
+        query, normalized_params = self._normalize_params(query, params or {})
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(
+                    text(query), normalized_params
+                )
+                for partition in result.mappings().partitions(batch_size):
+                    yield [dict(row) for row in partition]
+        except SQLAlchemyError as e:
+            self._record_failure(e)
+            raise
+        self.breaker.record_success()
+
     def insert(self, query: str, params: Dict[str, Any] = {}) -> Optional[int]:
         if not self.enabled:
             return None
@@ -249,3 +301,9 @@ class LineageDB:
 
     def clear_cache(self):
         self.cache.clear()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Retorna os contadores do cache de consultas (hits, misses, evictions...).
+        """
+        return self.cache.get_stats()
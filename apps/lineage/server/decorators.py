@@ -1,6 +1,6 @@
 from django.shortcuts import render, redirect
 from functools import wraps
-from .models import ApiEndpointToggle
+from core.config_snapshot import get_config_snapshot
 from django.http import JsonResponse
 from apps.lineage.server.database import LineageDB
 from django.contrib import messages
@@ -21,8 +21,7 @@ def endpoint_enabled(endpoint_field):
             
             @wraps(original_dispatch)
             def wrapped_dispatch(self, request, *args, **kwargs):
-                toggle = ApiEndpointToggle.objects.first()
-                if not toggle or not getattr(toggle, endpoint_field, False):
+                if not get_config_snapshot().endpoint_enabled(endpoint_field):
                     # Check if it's a REST API request
                     if request.path.startswith('/api/'):
                         # Return JSON response instead of DRF Response
@@ -40,8 +39,7 @@ def endpoint_enabled(endpoint_field):
             # For function-based views
             @wraps(view_func_or_class)
             def _wrapped_view(request, *args, **kwargs):
-                toggle = ApiEndpointToggle.objects.first()
-                if not toggle or not getattr(toggle, endpoint_field, False):
+                if not get_config_snapshot().endpoint_enabled(endpoint_field):
                     # Verifica se é uma requisição de API REST
                     if request.path.startswith('/api/'):
                         # Return JSON response instead of DRF Response
@@ -0,0 +1,42 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from apps.lineage.server.utils import whirlpool
+from utils.Whirlpool2003 import Whirlpool2003
+
+
+def _legacy_digest(data):
+    hasher = Whirlpool2003()
+    hasher.update(data)
+    return hasher.digest()
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark dos backends de Whirlpool usados nas senhas das contas do jogo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000, help='Hashes por medição')
+        parser.add_argument('--repeat', type=int, default=3, help='Medições por backend (vale a melhor)')
+        parser.add_argument('--size', type=int, default=12, help='Tamanho da entrada em bytes')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        data = b'x' * options['size']
+
+        candidates = {'legacy (Whirlpool2003)': _legacy_digest}
+        for name in whirlpool.BACKENDS:
+            candidates[name] = lambda value, backend=name: whirlpool.whirlpool_digest(value, backend=backend)
+
+        self.stdout.write(f'Backend padrão: {whirlpool.DEFAULT_BACKEND}')
+        self.stdout.write(f'{iterations} hashes de {len(data)} bytes por medição\n')
+
+        baseline = None
+        for name, func in candidates.items():
+            best = min(timeit.repeat(lambda: func(data), number=iterations, repeat=options['repeat']))
+            per_hash_us = best / iterations * 1_000_000
+            baseline = baseline or per_hash_us
+            self.stdout.write(
+                f'{name:<24} {per_hash_us:10.1f} µs/hash {iterations / best:12.0f} hashes/s '
+                f'{baseline / per_hash_us:6.1f}x'
+            )
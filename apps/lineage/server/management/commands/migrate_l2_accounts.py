@@ -1,4 +1,6 @@
 import os
+import json
+import time
 import secrets
 import string
 from django.core.management.base import BaseCommand
@@ -37,6 +39,22 @@ class Command(BaseCommand):
             default=100,
             help='Tamanho do lote para processamento (padrão: 100)',
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Importação em massa: páginas por keyset, bulk_create e senhas inutilizáveis',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default='migrate_l2_accounts.checkpoint.json',
+            help='Arquivo de checkpoint do modo --bulk (padrão: migrate_l2_accounts.checkpoint.json)',
+        )
+        parser.add_argument(
+            '--reset-checkpoint',
+            action='store_true',
+            help='Ignora o checkpoint existente e recomeça do início (modo --bulk)',
+        )
 
     def generate_random_password(self, length=64):
         """Gera uma senha aleatória segura"""
@@ -241,11 +259,207 @@ class Command(BaseCommand):
 
         return stats
 
+    # ------------------------------------------------------------------
+    # Modo --bulk
+    # ------------------------------------------------------------------
+
+    BULK_ACCOUNTS_SQL = """
+        SELECT login,
+               email as email,
+               accessLevel,
+               created_time
+        FROM accounts
+        WHERE email IS NOT NULL
+        AND email != ''
+        AND email != 'NULL'
+        AND LENGTH(TRIM(email)) > 0
+        AND login > :last_login
+        ORDER BY login ASC
+        LIMIT :limit
+    """
+
+    def iter_l2_account_pages(self, last_login, page_size):
+        """
+        Percorre as contas do L2 por keyset (login > último visto), uma
+        página por consulta. Usa LineageDB.stream para que uma falha de
+        leitura interrompa a migração em vez de parecer o fim da tabela.
+        """
+        db = LineageDB()
+        while True:
+            page = []
+            for rows in db.stream(self.BULK_ACCOUNTS_SQL, {'last_login': last_login, 'limit': page_size},
+                                  batch_size=page_size):
+                page.extend(rows)
+            if not page:
+                return
+            yield page
+            last_login = page[-1]['login']
+            if len(page) < page_size:
+                return
+
+    def load_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_checkpoint(self, path, last_login, stats):
+        if not path:
+            return
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'last_login': last_login, 'stats': stats}, f)
+        os.replace(tmp_path, path)
+
+    def build_bulk_user(self, login, email, access_level, password_length):
+        """
+        Monta o usuário sem tocar no banco. Contas comuns recebem senha
+        inutilizável (o jogador define a sua pela recuperação de senha, que
+        aceita essas contas), sem o custo do hash; staff recebe uma senha
+        aleatória, exibida junto com a página em que a conta foi criada.
+        """
+        level = int(access_level or 0)
+        user = User(
+            username=login,
+            email=email,
+            is_active=True,
+            is_email_verified=False,
+            is_2fa_enabled=False,
+            is_staff=level > 0,
+            is_superuser=level >= 100,  # GM ou superior
+        )
+        password = None
+        if level > 0:
+            password = self.generate_random_password(password_length)
+            user.set_password(password)
+        else:
+            user.set_unusable_password()
+        return user, password
+
+    def create_users_bulk(self, users):
+        """
+        Cria os usuários do lote em um único INSERT. Como no modo normal, o
+        PerfilGamer é criado sob demanda (get_or_create) no primeiro acesso.
+        """
+        User.objects.bulk_create(users)
+
+    def process_accounts_bulk(self, dry_run, prefix, password_length, batch_size, checkpoint_path, reset):
+        checkpoint = None if reset else self.load_checkpoint(checkpoint_path)
+        stats = {
+            'total': 0,
+            'created': 0,
+            'skipped': 0,
+            'errors': 0,
+            'email_conflicts': 0,
+            'l2_duplicates': 0,
+            'existing_usernames': 0,
+        }
+        last_login = ''
+        if checkpoint:
+            last_login = checkpoint.get('last_login') or ''
+            stats.update(checkpoint.get('stats') or {})
+            self.stdout.write(f'↩️  Retomando após o login "{last_login}" ({stats["created"]} já criados)')
+
+        # Conjuntos pré-carregados: nenhuma consulta por conta
+        self.stdout.write('📋 Carregando usernames e emails existentes no PDL...')
+        usernames = set(User.objects.values_list('username', flat=True))
+        emails = set(User.objects.exclude(email='').values_list('email', flat=True))
+        l2_emails = set()
+
+        started = time.monotonic()
+        # Contas lidas nesta execução (stats['total'] inclui as do checkpoint)
+        processed = 0
+        for page_num, page in enumerate(self.iter_l2_account_pages(last_login, batch_size), start=1):
+            page_started = time.monotonic()
+            new_users = []
+            passwords = {}
+
+            for account in page:
+                stats['total'] += 1
+                processed += 1
+                login = self.validate_username(account.get('login'))
+                email = account.get('email')
+                if not login or not email:
+                    stats['skipped'] += 1
+                    continue
+
+                # Mesmas regras do modo normal: email repetido no L2 ganha
+                # prefixo aleatório; email já usado no PDL ganha --prefix
+                if email in l2_emails:
+                    email = f"{self.generate_random_prefix()}_{email}"
+                    stats['l2_duplicates'] += 1
+                else:
+                    l2_emails.add(email)
+
+                if login in usernames:
+                    stats['existing_usernames'] += 1
+                    stats['skipped'] += 1
+                    continue
+
+                if email in emails:
+                    email = f"{prefix}{email}"
+                    stats['email_conflicts'] += 1
+                    if email in emails:
+                        stats['skipped'] += 1
+                        continue
+
+                user, password = self.build_bulk_user(login, email, account.get('accessLevel', 0), password_length)
+                usernames.add(login)
+                emails.add(email)
+                new_users.append(user)
+                if password:
+                    passwords[login] = password
+
+            created = len(new_users)
+            if new_users and not dry_run:
+                try:
+                    with transaction.atomic():
+                        self.create_users_bulk(new_users)
+                except Exception as e:
+                    # Lote inteiro desfeito: refaz conta a conta para isolar a falha
+                    self.stderr.write(self.style.ERROR(f'Erro no lote {page_num}, refazendo individualmente: {e}'))
+                    created = 0
+                    for user in new_users:
+                        # bulk_create pode ter preenchido o pk antes do rollback
+                        user.pk = None
+                        user._state.adding = True
+                        try:
+                            with transaction.atomic():
+                                self.create_users_bulk([user])
+                            created += 1
+                        except Exception as e:
+                            self.stderr.write(self.style.ERROR(f'Erro ao criar usuário {user.username}: {e}'))
+                            stats['errors'] += 1
+                            passwords.pop(user.username, None)
+
+            stats['created'] += created
+            # Exibe antes do checkpoint: uma execução retomada pula essas
+            # contas (username existente) e não teria como mostrar a senha
+            for login, password in passwords.items():
+                self.stdout.write(f'🔑 Senha para {login}: {password}')
+            self.stdout.flush()
+            last_login = page[-1]['login']
+            if not dry_run:
+                self.save_checkpoint(checkpoint_path, last_login, stats)
+
+            elapsed = time.monotonic() - started
+            page_rate = len(page) / max(time.monotonic() - page_started, 1e-6)
+            self.stdout.write(
+                f'📦 Página {page_num}: {created} criados de {len(page)} '
+                f'({page_rate:.0f} contas/s; {processed} nesta execução em {elapsed:.1f}s, '
+                f'{processed / max(elapsed, 1e-6):.0f} contas/s)'
+            )
+
+        if not dry_run and checkpoint_path and os.path.exists(checkpoint_path):
+            self.stdout.write(f'📝 Checkpoint em {checkpoint_path} (use --reset-checkpoint para recomeçar)')
+        return stats
+
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         prefix = options['prefix']
         password_length = options['password_length']
         batch_size = options['batch_size']
+        bulk = options['bulk']
 
         self.stdout.write(self.style.SUCCESS('🚀 INICIANDO MIGRAÇÃO L2 → PDL'))
         
@@ -257,18 +471,24 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR('❌ Não foi possível conectar ao banco do L2'))
             return
 
-        # Busca contas do L2
-        self.stdout.write('📋 Buscando contas do L2...')
-        l2_accounts = self.get_l2_accounts()
-        
-        if not l2_accounts:
-            self.stdout.write(self.style.WARNING('⚠️  Nenhuma conta encontrada no L2'))
-            return
+        if bulk:
+            stats = self.process_accounts_bulk(
+                dry_run, prefix, password_length, batch_size,
+                options['checkpoint'], options['reset_checkpoint'],
+            )
+        else:
+            # Busca contas do L2
+            self.stdout.write('📋 Buscando contas do L2...')
+            l2_accounts = self.get_l2_accounts()
+
+            if not l2_accounts:
+                self.stdout.write(self.style.WARNING('⚠️  Nenhuma conta encontrada no L2'))
+                return
 
-        self.stdout.write(self.style.SUCCESS(f'✅ Encontradas {len(l2_accounts)} contas no L2'))
+            self.stdout.write(self.style.SUCCESS(f'✅ Encontradas {len(l2_accounts)} contas no L2'))
 
-        # Processa as contas
-        stats = self.process_accounts(l2_accounts, dry_run, prefix, password_length, batch_size)
+            # Processa as contas
+            stats = self.process_accounts(l2_accounts, dry_run, prefix, password_length, batch_size)
 
         # Relatório final
         self.stdout.write('\n' + '='*60)
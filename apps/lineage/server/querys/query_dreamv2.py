@@ -420,6 +420,25 @@ class LineageStats:
         """
         return LineageStats._run_query(sql, {"castle_id": castle_id})
 
+    @staticmethod
+    @cache_lineage_result(timeout=300)
+    def siege_participants_bulk(castle_ids):
+        """Participantes de vários castelos em uma consulta; cada linha traz o castle_id"""
+        if not castle_ids:
+            return []
+        sql = """
+            SELECT 
+                S.castle_id,
+                S.type, 
+                C.clan_name,
+                C.clan_id
+            FROM siege_clans S
+            LEFT JOIN clan_data C ON C.clan_id = S.clan_id
+            WHERE S.castle_id IN :castle_ids
+            ORDER BY S.castle_id
+        """
+        return LineageStats._run_query(sql, {"castle_ids": list(castle_ids)})
+
     @staticmethod
     @cache_lineage_result(timeout=300)
     def boss_jewel_locations(boss_jewel_ids):
@@ -1331,31 +1350,37 @@ class LineageInflation:
         """
         return LineageInflation._run_query(sql)
 
+    ITEMS_SUMMARY_BY_CATEGORY_SQL = """
+        SELECT 
+            i.item_id AS item_id,
+            CONCAT('Item ', i.item_id) AS item_name,
+            NULL AS item_category,
+            NULL AS crystal_type,
+            i.loc AS location,
+            COUNT(*) AS total_instances,
+            SUM(i.count) AS total_quantity,
+            COUNT(DISTINCT i.owner_id) AS unique_owners,
+            MIN(i.enchant_level) AS min_enchant,
+            MAX(i.enchant_level) AS max_enchant,
+            AVG(i.enchant_level) AS avg_enchant
+        FROM items i
+        INNER JOIN characters c ON c.charId = i.owner_id
+        WHERE c.accesslevel = '0'
+        AND i.loc IN ('INVENTORY', 'WAREHOUSE', 'PAPERDOLL', 'CLANWH')
+        GROUP BY i.item_id, i.loc
+        ORDER BY total_quantity DESC, item_id ASC
+    """
+
     @staticmethod
     @cache_lineage_result(timeout=60, use_cache=False)
     def get_items_summary_by_category():
         """Resumo de itens agrupados por categoria e localização."""
-        sql = """
-            SELECT 
-                i.item_id AS item_id,
-                CONCAT('Item ', i.item_id) AS item_name,
-                NULL AS item_category,
-                NULL AS crystal_type,
-                i.loc AS location,
-                COUNT(*) AS total_instances,
-                SUM(i.count) AS total_quantity,
-                COUNT(DISTINCT i.owner_id) AS unique_owners,
-                MIN(i.enchant_level) AS min_enchant,
-                MAX(i.enchant_level) AS max_enchant,
-                AVG(i.enchant_level) AS avg_enchant
-            FROM items i
-            INNER JOIN characters c ON c.charId = i.owner_id
-            WHERE c.accesslevel = '0'
-            AND i.loc IN ('INVENTORY', 'WAREHOUSE', 'PAPERDOLL', 'CLANWH')
-            GROUP BY i.item_id, i.loc
-            ORDER BY total_quantity DESC, item_id ASC
-        """
-        return LineageInflation._run_query(sql)
+        return LineageInflation._run_query(LineageInflation.ITEMS_SUMMARY_BY_CATEGORY_SQL)
+
+    @staticmethod
+    def stream_items_summary_by_category(batch_size=1000):
+        """Mesmo resumo, lido em lotes com cursor no servidor (usado pelos snapshots)."""
+        return LineageDB().stream(LineageInflation.ITEMS_SUMMARY_BY_CATEGORY_SQL, batch_size=batch_size)
 
     @staticmethod
     @cache_lineage_result(timeout=60, use_cache=False)
@@ -340,6 +340,25 @@ class LineageStats:
         """
         return LineageStats._run_query(sql, {"castle_id": castle_id})
 
+    @staticmethod
+    @cache_lineage_result(timeout=300)
+    def siege_participants_bulk(castle_ids):
+        """Participantes de vários castelos em uma consulta; cada linha traz o castle_id"""
+        if not castle_ids:
+            return []
+        sql = """
+            SELECT 
+                S.residence_id AS castle_id,
+                S.type, 
+                C.name AS clan_name,
+                C.clan_id
+            FROM siege_clans S
+            LEFT JOIN clan_subpledges C ON C.clan_id = S.clan_id AND C.type = '0'
+            WHERE S.residence_id IN :castle_ids
+            ORDER BY S.residence_id
+        """
+        return LineageStats._run_query(sql, {"castle_ids": list(castle_ids)})
+
     @staticmethod
     @cache_lineage_result(timeout=300)
     def boss_jewel_locations(boss_jewel_ids):
@@ -1208,6 +1227,27 @@ class LineageInflation:
         """
         return LineageInflation._run_query(sql)
 
+    ITEMS_SUMMARY_BY_CATEGORY_SQL = """
+        SELECT 
+            i.item_type AS item_id,
+            CONCAT('Item ', i.item_type) AS item_name,
+            NULL AS item_category,
+            NULL AS crystal_type,
+            i.location,
+            COUNT(*) AS total_instances,
+            SUM(i.amount) AS total_quantity,
+            COUNT(DISTINCT i.owner_id) AS unique_owners,
+            MIN(i.enchant_level) AS min_enchant,
+            MAX(i.enchant_level) AS max_enchant,
+            AVG(i.enchant_level) AS avg_enchant
+        FROM items i
+        INNER JOIN characters c ON c.obj_Id = i.owner_id
+        WHERE c.accesslevel = '0'
+        AND i.location IN ('INVENTORY', 'WAREHOUSE', 'PAPERDOLL', 'CLANWH')
+        GROUP BY i.item_type, i.location
+        ORDER BY total_quantity DESC, item_id ASC
+    """
+
     @staticmethod
     @cache_lineage_result(timeout=60, use_cache=False)
     def get_items_summary_by_category():
@@ -1216,27 +1256,12 @@ class LineageInflation:
         Schema: Dream v3
         Retorna: Estatísticas agregadas por item e localização
         """
-        sql = """
-            SELECT 
-                i.item_type AS item_id,
-                CONCAT('Item ', i.item_type) AS item_name,
-                NULL AS item_category,
-                NULL AS crystal_type,
-                i.location,
-                COUNT(*) AS total_instances,
-                SUM(i.amount) AS total_quantity,
-                COUNT(DISTINCT i.owner_id) AS unique_owners,
-                MIN(i.enchant_level) AS min_enchant,
-                MAX(i.enchant_level) AS max_enchant,
-                AVG(i.enchant_level) AS avg_enchant
-            FROM items i
-            INNER JOIN characters c ON c.obj_Id = i.owner_id
-            WHERE c.accesslevel = '0'
-            AND i.location IN ('INVENTORY', 'WAREHOUSE', 'PAPERDOLL', 'CLANWH')
-            GROUP BY i.item_type, i.location
-            ORDER BY total_quantity DESC, item_id ASC
-        """
-        return LineageInflation._run_query(sql)
+        return LineageInflation._run_query(LineageInflation.ITEMS_SUMMARY_BY_CATEGORY_SQL)
+
+    @staticmethod
+    def stream_items_summary_by_category(batch_size=1000):
+        """Mesmo resumo, lido em lotes com cursor no servidor (usado pelos snapshots)."""
+        return LineageDB().stream(LineageInflation.ITEMS_SUMMARY_BY_CATEGORY_SQL, batch_size=batch_size)
 
     @staticmethod
     @cache_lineage_result(timeout=60, use_cache=False)
@@ -0,0 +1,175 @@
+"""
+Geração de snapshots de inflação de itens.
+
+O resumo do servidor é lido em lotes com cursor no servidor e gravado com
+bulk_create, então o custo de memória e o número de INSERTs não crescem com
+o tamanho do servidor. A execução roda no Celery (create_inflation_snapshot)
+e publica o progresso no cache para o painel acompanhar.
+"""
+import logging
+from datetime import date
+
+from django.core.cache import cache
+from django.db import models, transaction
+from django.utils import timezone
+
+from apps.lineage.inventory.models import InventoryItem
+from apps.lineage.inventory.utils.catalog import item_catalog
+from apps.lineage.server.database import LineageDB
+from apps.lineage.server.models import (
+    ItemInflationCategory,
+    ItemInflationSnapshot,
+    ItemInflationSnapshotDetail,
+)
+from utils.dynamic_import import get_query_class
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_BATCH_SIZE = 1000
+PROGRESS_CACHE_KEY = 'inflation_snapshot:progress'
+PROGRESS_TTL = 60 * 60 * 24
+LOCK_CACHE_KEY = 'inflation_snapshot:lock'
+LOCK_TTL = 60 * 60
+
+
+class SnapshotAlreadyExists(Exception):
+    pass
+
+
+def get_progress():
+    """Estado da última geração de snapshot (ou None)"""
+    return cache.get(PROGRESS_CACHE_KEY)
+
+
+def set_progress(status, **data):
+    data.update({'status': status, 'updated_at': timezone.now().isoformat()})
+    cache.set(PROGRESS_CACHE_KEY, data, timeout=PROGRESS_TTL)
+    return data
+
+
+def acquire_lock():
+    return cache.add(LOCK_CACHE_KEY, True, timeout=LOCK_TTL)
+
+
+def release_lock():
+    cache.delete(LOCK_CACHE_KEY)
+
+
+def build_category_index():
+    """
+    Mapa item_id -> categoria, montado uma vez por snapshot. Se um item
+    estiver em mais de uma categoria vale a primeira pela ordenação padrão.
+    """
+    index = {}
+    for category in ItemInflationCategory.objects.all():
+        for item_id in category.item_ids or []:
+            try:
+                index.setdefault(int(item_id), category)
+            except (TypeError, ValueError):
+                continue
+    return index
+
+
+def _game_details(snapshot, rows, categories):
+    for row in rows:
+        item_id = int(row['item_id'])
+        yield ItemInflationSnapshotDetail(
+            snapshot=snapshot,
+            item_id=item_id,
+            item_name=item_catalog.get_name(item_id) or row.get('item_name') or f'Item {item_id}',
+            location=row.get('location') or 'INVENTORY',
+            quantity=row.get('total_quantity') or 0,
+            instances=row.get('total_instances') or 0,
+            unique_owners=row.get('unique_owners') or 0,
+            category=categories.get(item_id),
+        )
+
+
+def _site_details(snapshot, categories):
+    site_items = InventoryItem.objects.values('item_id', 'item_name').annotate(
+        total_quantity=models.Sum('quantity'),
+        total_instances=models.Count('id'),
+        unique_owners=models.Count('inventory__user', distinct=True)
+    ).order_by()
+
+    for site_item in site_items.iterator(chunk_size=SNAPSHOT_BATCH_SIZE):
+        item_id = site_item['item_id']
+        yield ItemInflationSnapshotDetail(
+            snapshot=snapshot,
+            item_id=item_id,
+            item_name=site_item.get('item_name') or f'Item {item_id}',
+            location='SITE',
+            quantity=site_item.get('total_quantity') or 0,
+            instances=site_item.get('total_instances') or 0,
+            unique_owners=site_item.get('unique_owners') or 0,
+            category=categories.get(item_id),
+        )
+
+
+def _bulk_insert(details, batch_size):
+    batch = []
+    for detail in details:
+        batch.append(detail)
+        if len(batch) >= batch_size:
+            ItemInflationSnapshotDetail.objects.bulk_create(batch, batch_size=batch_size)
+            yield len(batch)
+            batch = []
+    if batch:
+        ItemInflationSnapshotDetail.objects.bulk_create(batch, batch_size=batch_size)
+        yield len(batch)
+
+
+def build_snapshot(notes='', batch_size=SNAPSHOT_BATCH_SIZE, snapshot_date=None):
+    """
+    Gera o snapshot do dia. Tudo roda em uma transação: se a leitura do
+    servidor falhar no meio, nenhum snapshot parcial fica salvo.
+    """
+    snapshot_date = snapshot_date or date.today()
+    if ItemInflationSnapshot.objects.filter(snapshot_date=snapshot_date).exists():
+        raise SnapshotAlreadyExists(f'Já existe um snapshot para {snapshot_date}')
+
+    db = LineageDB()
+    if not db.is_connected():
+        raise ConnectionError('Banco do servidor indisponível')
+
+    LineageInflation = get_query_class("LineageInflation")
+    categories = build_category_index()
+
+    total_characters = db.select(
+        "SELECT COUNT(*) as total FROM characters WHERE accesslevel = '0'"
+    )
+    total_characters = int(total_characters[0]['total']) if total_characters else 0
+
+    processed = 0
+    totals = {'instances': 0, 'quantity': 0}
+
+    def game_rows():
+        for rows in LineageInflation.stream_items_summary_by_category(batch_size=batch_size):
+            for row in rows:
+                totals['instances'] += int(row.get('total_instances') or 0)
+                totals['quantity'] += int(row.get('total_quantity') or 0)
+                yield row
+
+    set_progress('running', phase='server', processed=0)
+    with transaction.atomic():
+        snapshot = ItemInflationSnapshot.objects.create(
+            snapshot_date=snapshot_date,
+            total_characters=total_characters,
+            notes=notes,
+        )
+
+        for inserted in _bulk_insert(_game_details(snapshot, game_rows(), categories), batch_size):
+            processed += inserted
+            set_progress('running', phase='server', processed=processed)
+
+        for inserted in _bulk_insert(_site_details(snapshot, categories), batch_size):
+            processed += inserted
+            set_progress('running', phase='site', processed=processed)
+
+        snapshot.total_items_instances = totals['instances']
+        snapshot.total_items_quantity = totals['quantity']
+        snapshot.save(update_fields=['total_items_instances', 'total_items_quantity', 'updated_at'])
+
+    set_progress('done', phase='done', processed=processed, snapshot_id=snapshot.id)
+    logger.info(f"Snapshot de inflação {snapshot.snapshot_date} criado com {processed} linhas")
+    return snapshot
@@ -16,3 +16,18 @@ if os.getenv("LINEAGE_DB_ENABLED", "false").lower() == "true":
         print("ℹ️ O sistema continuará funcionando normalmente, mas algumas funcionalidades podem estar indisponíveis.")
 else:
     print("ℹ️ Banco Lineage desativado via configuração - pulando verificação de colunas")
+
+
+# Snapshot de configuração (core/config_snapshot.py)
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.config_snapshot import invalidate_config_snapshot
+from .models import ApiEndpointToggle, IndexConfig, IndexConfigTranslation
+
+
+@receiver([post_save, post_delete], sender=ApiEndpointToggle)
+@receiver([post_save, post_delete], sender=IndexConfig)
+@receiver([post_save, post_delete], sender=IndexConfigTranslation)
+def invalidate_site_config(sender, **kwargs):
+    invalidate_config_snapshot()
@@ -18,3 +18,25 @@ def verificar_cupons_expirados():
         if apoiador and apoiador.status == 'aprovado':
             apoiador.status = 'expirado'
             apoiador.save()
+
+
+@shared_task
+def create_inflation_snapshot(notes=''):
+    """
+    Gera o snapshot de inflação do dia fora do ciclo de request. O lock é
+    adquirido pela view antes de enfileirar e liberado aqui ao terminar.
+    """
+    import logging
+    from apps.lineage.server.services.inflation_snapshot import (
+        build_snapshot, release_lock, set_progress
+    )
+
+    try:
+        snapshot = build_snapshot(notes=notes)
+        return snapshot.id
+    except Exception as e:
+        logging.getLogger(__name__).exception("Erro ao criar snapshot de inflação")
+        set_progress('error', error=str(e))
+        return None
+    finally:
+        release_lock()
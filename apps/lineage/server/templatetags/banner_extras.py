@@ -1,6 +1,6 @@
 from django import template
 from django.template.defaultfilters import stringfilter
-from ..models import IndexConfig
+from core.config_snapshot import get_config_snapshot
 
 register = template.Library()
 
@@ -11,7 +11,7 @@ def get_banner_image():
     Retorna a imagem do banner configurada no admin
     """
     try:
-        config = IndexConfig.objects.first()
+        config = get_config_snapshot().index_config
         if config and config.imagem_banner:
             return config.imagem_banner
     except:
@@ -25,7 +25,7 @@ def get_banner_url():
     Retorna a URL da imagem do banner configurada no admin
     """
     try:
-        config = IndexConfig.objects.first()
+        config = get_config_snapshot().index_config
         if config and config.imagem_banner:
             return config.imagem_banner.url
     except:
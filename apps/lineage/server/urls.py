@@ -7,6 +7,7 @@ from .views.services_views import *
 from .views.inflation_views import (
     inflation_dashboard,
     create_snapshot,
+    snapshot_progress,
     snapshot_detail,
     inflation_comparison,
     inflation_categories,
@@ -32,6 +33,7 @@ urlpatterns = [
     path('status/olympiad-current-heroes/', olympiad_current_heroes_view, name='olympiad_current_heroes'),
     path('status/boss-jewel-locations/', boss_jewel_locations_view, name='boss_jewel_locations'),
     path('status/grandboss/', grandboss_status_view, name='grandboss'),
+    path('crest/<str:crest_type>/<int:crest_id>.png', crest_image_view, name='crest_image'),
 
     path('account/update-password/', update_password, name='update_password'),
     path('account/dashboard/', account_dashboard, name='account_dashboard'),
@@ -66,6 +68,7 @@ urlpatterns = [
     path('inflation/all-items/', all_items_list, name='inflation_all_items'),
     path('inflation/favorite/<int:item_id>/toggle/', toggle_favorite, name='inflation_toggle_favorite'),
     path('inflation/snapshot/create/', create_snapshot, name='create_snapshot'),
+    path('inflation/snapshot/progress/', snapshot_progress, name='snapshot_progress'),
     path('inflation/snapshot/<int:snapshot_id>/', snapshot_detail, name='snapshot_detail'),
     path('inflation/snapshot/<int:snapshot_id>/delete/', delete_snapshot, name='delete_snapshot'),
     path('inflation/comparison/', inflation_comparison, name='inflation_comparison'),
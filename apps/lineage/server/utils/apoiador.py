@@ -1,6 +1,6 @@
 from apps.lineage.server.models import Apoiador, Comissao
 from apps.lineage.wallet.models import Wallet
-from apps.lineage.wallet.signals import TransacaoWallet
+from apps.lineage.wallet.signals import aplicar_transacao
 from decimal import Decimal
 from apps.lineage.shop.models import ShopPurchase, PromotionCode
 from django.db.models import Sum
@@ -36,11 +36,9 @@ def pagar_comissao(apoiador: Apoiador, valor_solicitado: Decimal):
 
     # Atualiza a carteira do apoiador
     wallet, created = Wallet.objects.get_or_create(usuario=apoiador.user)
-    wallet.saldo += valor_solicitado
-    wallet.save()
 
-    # Registra a transação na carteira
-    TransacaoWallet.objects.create(
+    # Crédito atômico e registro da transação na carteira
+    aplicar_transacao(
         wallet=wallet,
         tipo='ENTRADA',
         valor=valor_solicitado,
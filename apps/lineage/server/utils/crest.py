@@ -1,11 +1,20 @@
-import base64, io, os
+import base64, hashlib, io, os
 
 from PIL import Image
+from django.core.cache import cache
+from django.urls import reverse
 from apps.lineage.server.database import LineageDB
 
 from utils.dynamic_import import get_query_class  # importa o helper
 LineageStats = get_query_class("LineageStats")  # carrega a classe certa com base no .env
 
+CREST_SIZES = {'clan': (16, 12), 'ally': (8, 12)}
+# PNG já redimensionado, por (tipo, id, hash do blob). O hash muda quando o
+# clã troca o crest, então a entrada antiga simplesmente deixa de ser usada.
+CREST_CACHE_TTL = 60 * 60 * 24 * 7
+# Hash atual de cada (tipo, id), usado pelo endpoint /crest/<tipo>/<id>.png
+CREST_POINTER_TTL = 60 * 60 * 24
+
 
 class CrestHandler:
     def __init__(self):
@@ -52,11 +61,131 @@ class CrestHandler:
             raise Exception(f"Erro ao criar imagem vazia: {e}")
 
 
+def _render_png(blob, crest_type):
+    image = Image.open(io.BytesIO(blob)).convert("RGBA")
+    image = image.resize(CREST_SIZES[crest_type], Image.LANCZOS)
+    byte_io = io.BytesIO()
+    image.save(byte_io, 'PNG')
+    return byte_io.getvalue()
+
+
+_empty_pngs = {}
+
+
+def empty_crest_png(crest_type):
+    """PNG transparente do tamanho do crest, gerado uma vez por processo"""
+    png = _empty_pngs.get(crest_type)
+    if png is None:
+        byte_io = io.BytesIO()
+        Image.new("RGBA", CREST_SIZES[crest_type], (0, 0, 0, 0)).save(byte_io, 'PNG')
+        png = _empty_pngs[crest_type] = byte_io.getvalue()
+    return png
+
+
+def crest_hash(blob):
+    return hashlib.sha1(bytes(blob)).hexdigest()[:16]
+
+
+def _png_key(crest_type, crest_id, digest):
+    return f'crest:png:{crest_type}:{crest_id}:{digest}'
+
+
+def _pointer_key(crest_type, crest_id):
+    return f'crest:current:{crest_type}:{crest_id}'
+
+
+def crest_url(crest_type, crest_id, digest):
+    return f"{reverse('server:crest_image', args=[crest_type, crest_id])}?v={digest}"
+
+
+class CrestCache:
+    """
+    Cache dos crests redimensionados, compartilhado entre workers pelo cache
+    padrão. Uma página de ranking faz um get_many para todos os crests e só
+    processa com PIL os que nunca foram vistos (ou que mudaram).
+    """
+
+    def get_many(self, crest_type, blobs):
+        """
+        Recebe {id: blob} e retorna {id: (hash, png)}. Crests inválidos ficam
+        de fora (o chamador usa a imagem vazia).
+        """
+        digests = {crest_id: crest_hash(blob) for crest_id, blob in blobs.items()}
+        keys = {_png_key(crest_type, crest_id, digest): crest_id for crest_id, digest in digests.items()}
+        cached = cache.get_many(list(keys)) if keys else {}
+
+        result = {}
+        to_store = {}
+        for key, crest_id in keys.items():
+            png = cached.get(key)
+            if png is None:
+                try:
+                    png = _render_png(blobs[crest_id], crest_type)
+                except Exception:
+                    continue
+                to_store[key] = png
+            result[crest_id] = (digests[crest_id], png)
+
+        if to_store:
+            cache.set_many(to_store, timeout=CREST_CACHE_TTL)
+        if result:
+            cache.set_many(
+                {_pointer_key(crest_type, crest_id): digest for crest_id, (digest, _) in result.items()},
+                timeout=CREST_POINTER_TTL,
+            )
+        return result
+
+    def get(self, crest_type, crest_id):
+        """Retorna (hash, png) do crest atual, buscando no banco se preciso"""
+        digest = cache.get(_pointer_key(crest_type, crest_id))
+        if digest:
+            png = cache.get(_png_key(crest_type, crest_id, digest))
+            if png is not None:
+                return digest, png
+
+        blobs = fetch_crest_blobs([crest_id], crest_type)
+        if crest_id not in blobs:
+            return None
+        return self.get_many(crest_type, blobs).get(crest_id)
+
+
+crest_cache = CrestCache()
+
+
+def fetch_crest_blobs(ids, crest_type='clan'):
+    """Busca os blobs no banco do servidor e indexa por id ({id: blob})"""
+    id_key = 'ally_id' if crest_type == 'ally' else 'clan_id'
+    rows = LineageStats.get_crests(ids, type=crest_type) or []
+    blobs = {}
+    for row in rows:
+        blob = row.get('crest')
+        if blob and row.get(id_key) is not None:
+            blobs.setdefault(row.get(id_key), blob)
+    return blobs
+
+
+def _attach(item, prefix, crest_type, crest_id, crests):
+    entry = crests.get(crest_id) if crest_id else None
+    if entry:
+        digest, png = entry
+        url = crest_url(crest_type, crest_id, digest)
+    else:
+        png = empty_crest_png(crest_type)
+        url = None
+    image_base64 = base64.b64encode(png).decode('utf-8')
+    item[f'{prefix}_crest_url'] = url
+    item[f'{prefix}_crest_image_base64'] = image_base64
+    # Pronto para o src da <img>: URL cacheável ou a imagem vazia inline
+    item[f'{prefix}_crest_src'] = url or f'data:image/png;base64,{image_base64}'
+
 
 def attach_crests_to_clans(data, clan_key='clan_id', ally_key='ally_id'):
     """
-    Adiciona as imagens de crest base64 para cada clã ou personagem (que tenha clan_id).
-    Espera uma lista de dicionários.
+    Adiciona os crests de cada clã ou personagem (que tenha clan_id).
+    Espera uma lista de dicionários. Cada item recebe `clan_crest_src` /
+    `ally_crest_src` para o src da imagem, `*_crest_url` (endpoint
+    cacheável, None sem crest) e, por compatibilidade com temas,
+    `*_crest_image_base64`.
     """
     if not data:
         return data
@@ -65,40 +194,16 @@ def attach_crests_to_clans(data, clan_key='clan_id', ally_key='ally_id'):
     if not db.is_connected():
         return data
 
-    crest_handler = CrestHandler()
-
     # Coleta os IDs únicos
     clan_ids = list({item.get(clan_key) for item in data if item.get(clan_key)})
     ally_ids = list({item.get(ally_key) for item in data if item.get(ally_key)})
 
-    # Busca os crests
-    crests = LineageStats.get_crests(clan_ids) or {}
-    ally_crests = LineageStats.get_crests(ally_ids, type='ally') or {}
+    # Busca os crests e resolve as imagens pelo cache (lookup por dict)
+    clan_crests = crest_cache.get_many('clan', fetch_crest_blobs(clan_ids, 'clan')) if clan_ids else {}
+    ally_crests = crest_cache.get_many('ally', fetch_crest_blobs(ally_ids, 'ally')) if ally_ids else {}
 
     for item in data:
-        crest_id = item.get(clan_key)
-
-        # Clã Crest
-        crest_blob = next((crest.get('crest') for crest in crests if crest.get('clan_id') == crest_id), None)
-        if crest_blob:
-            image_bytes = crest_handler.make_image(crest_blob, crest_id, 'clan', show_image=True)
-            image_bytes.seek(0)
-            item['clan_crest_image_base64'] = base64.b64encode(image_bytes.read()).decode('utf-8')
-        else:
-            empty_image_bytes = crest_handler.make_empty_image('clan')
-            empty_image_bytes.seek(0)
-            item['clan_crest_image_base64'] = base64.b64encode(empty_image_bytes.read()).decode('utf-8')
-
-        # Ally Crest
-        ally_id = item.get(ally_key)
-        ally_crest_blob = next((crest.get('crest') for crest in ally_crests if crest.get('ally_id') == ally_id), None)
-        if ally_crest_blob:
-            ally_image_bytes = crest_handler.make_image(ally_crest_blob, crest_id, 'ally', show_image=True)
-            ally_image_bytes.seek(0)
-            item['ally_crest_image_base64'] = base64.b64encode(ally_image_bytes.read()).decode('utf-8')
-        else:
-            empty_ally_image_bytes = crest_handler.make_empty_image('ally')
-            empty_ally_image_bytes.seek(0)
-            item['ally_crest_image_base64'] = base64.b64encode(empty_ally_image_bytes.read()).decode('utf-8')
+        _attach(item, 'clan', 'clan', item.get(clan_key), clan_crests)
+        _attach(item, 'ally', 'ally', item.get(ally_key), ally_crests)
 
     return data
@@ -0,0 +1,184 @@
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CACHE_KEY = "lineage_db:health"
+PROBE_LOCK_CACHE_KEY = "lineage_db:health:probe"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples para o banco do servidor.
+
+    closed: operações liberadas; `failure_threshold` falhas consecutivas abrem
+    o circuito. open: operações falham na hora até passar `reset_timeout`.
+    half_open: uma operação de teste é liberada; sucesso fecha, falha reabre.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 20.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Indica se uma operação pode ir ao banco agora"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN:
+            return False
+        with self._lock:
+            # Meio aberto: só uma operação de teste por vez
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._state != self.OPEN and self._failures >= self.failure_threshold:
+                logger.warning(f"Circuito do banco Lineage aberto após {self._failures} falhas")
+            if self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def trip(self):
+        """Abre o circuito imediatamente (ex.: healthcheck falhou)"""
+        with self._lock:
+            self._failures = max(self._failures, self.failure_threshold)
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self._failures}
+
+
+class DatabaseHealthMonitor:
+    """
+    Healthcheck periódico do banco do servidor em uma thread daemon por
+    processo. O resultado é publicado em uma tupla (ok, checked_at) trocada
+    atomicamente, então quem consulta (is_connected) lê em O(1) sem abrir
+    conexão. Em falha o intervalo dobra até `max_backoff`.
+
+    Com `shared=True` o estado também vai para o cache padrão (Redis) e só
+    um processo por intervalo executa o SELECT 1; os demais leem o estado
+    publicado.
+    """
+
+    def __init__(self, probe: Callable[[], bool], breaker: CircuitBreaker,
+                 interval: float = 15.0, max_backoff: float = 120.0, shared: bool = False):
+        self.probe = probe
+        self.breaker = breaker
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.shared = shared
+        self._state = (False, 0.0)
+        self._first_check = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    # ----------------------------------------------------------------- estado
+
+    @property
+    def is_healthy(self) -> bool:
+        return self._state[0]
+
+    @property
+    def last_check(self) -> float:
+        return self._state[1]
+
+    def _publish(self, ok: bool, checked_at: Optional[float] = None, share: bool = True):
+        self._state = (ok, checked_at or time.time())
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.trip()
+        self._first_check.set()
+        if self.shared and share:
+            try:
+                from django.core.cache import cache
+                cache.set(HEALTH_CACHE_KEY, self._state, timeout=int(self.max_backoff * 2))
+            except Exception:
+                pass
+
+    def wait_first_check(self, timeout: float) -> bool:
+        return self._first_check.wait(timeout=timeout)
+
+    def as_dict(self) -> Dict[str, Any]:
+        ok, checked_at = self._state
+        return {"healthy": ok, "checked_at": checked_at, "breaker": self.breaker.as_dict()}
+
+    # ----------------------------------------------------------------- thread
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="lineage-db-health", daemon=True)
+            self._thread.start()
+
+    def check_now(self):
+        """Antecipa o próximo healthcheck (ex.: após uma falha de consulta)"""
+        self._wakeup.set()
+
+    def _read_shared(self) -> bool:
+        """Usa o estado publicado por outro processo; False se não houver"""
+        try:
+            from django.core.cache import cache
+            if cache.add(PROBE_LOCK_CACHE_KEY, 1, timeout=max(int(self.interval), 1)):
+                return False
+            state = cache.get(HEALTH_CACHE_KEY)
+        except Exception:
+            return False
+        if not state:
+            return False
+        self._publish(state[0], state[1], share=False)
+        return True
+
+    def run_once(self) -> bool:
+        if self.shared and self._read_shared():
+            return self.is_healthy
+        try:
+            ok = bool(self.probe())
+        except Exception as e:
+            logger.warning(f"Healthcheck do banco Lineage falhou: {e}")
+            ok = False
+        self._publish(ok)
+        return ok
+
+    def _run(self):
+        delay = self.interval
+        while True:
+            ok = self.run_once()
+            delay = self.interval if ok else min(max(delay, self.interval) * 2, self.max_backoff)
+            self._wakeup.wait(timeout=delay)
+            self._wakeup.clear()
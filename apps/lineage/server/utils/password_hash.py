@@ -2,6 +2,8 @@ import hashlib
 import base64
 import logging
 
+from apps.lineage.server.utils.whirlpool import whirlpool_digest
+
 class PasswordHash:
     def __init__(self, name):
         self.name = name.lower()
@@ -10,10 +12,8 @@ class PasswordHash:
     def encrypt(self, password: str) -> str:
         try:
             if self.name == 'whirlpool':
-                from utils.Whirlpool2003 import Whirlpool2003
-                whirlpool = Whirlpool2003()
-                whirlpool.update(password.encode())
-                hash_b64 = base64.b64encode(whirlpool.digest()).decode()
+                # OpenSSL quando disponível, senão a implementação otimizada
+                hash_b64 = base64.b64encode(whirlpool_digest(password.encode())).decode()
             else:
                 hasher = hashlib.new(self.name)
                 hasher.update(password.encode())
@@ -0,0 +1,253 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from apps.lineage.server.utils.cache import convert_rowmapping_to_dict
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, Tuple[Any, ...]]
+
+
+class QueryCacheStats:
+    """
+    Contadores de uso do cache de consultas (hits, misses, evictions...).
+    """
+
+    FIELDS = ("hits", "misses", "sets", "evictions", "expirations", "errors")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = {field: 0 for field in self.FIELDS}
+
+    def incr(self, field: str, amount: int = 1):
+        with self._lock:
+            self._counters[field] += amount
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._counters)
+        lookups = data["hits"] + data["misses"]
+        data["hit_ratio"] = round(data["hits"] / lookups, 4) if lookups else 0.0
+        return data
+
+
+class BaseQueryCache:
+    """
+    Interface comum dos backends de cache usados por LineageDB.select().
+    """
+
+    name = "base"
+
+    def __init__(self, default_ttl: int = 60):
+        self.default_ttl = default_ttl
+        self.stats = QueryCacheStats()
+
+    def get(self, key: CacheKey) -> Optional[List[Dict]]:
+        raise NotImplementedError
+
+    def set(self, key: CacheKey, data: List[Dict], ttl: Optional[int] = None):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        data = self.stats.as_dict()
+        data.update({
+            "backend": self.name,
+            "size": len(self),
+            "default_ttl": self.default_ttl,
+        })
+        return data
+
+
+class LocalQueryCache(BaseQueryCache):
+    """
+    Cache LRU em memória do processo, limitado por número de entradas e
+    protegido por lock. Entradas expiradas são descartadas na leitura e
+    também quando o limite é atingido.
+    """
+
+    name = "local"
+
+    def __init__(self, max_entries: int = 512, default_ttl: int = 60):
+        super().__init__(default_ttl=default_ttl)
+        self.max_entries = max(1, max_entries)
+        self._data: "OrderedDict[CacheKey, Tuple[List[Dict], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: CacheKey) -> Optional[List[Dict]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats.incr("misses")
+                return None
+            data, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.stats.incr("expirations")
+                self.stats.incr("misses")
+                return None
+            self._data.move_to_end(key)
+        self.stats.incr("hits")
+        return data
+
+    def set(self, key: CacheKey, data: List[Dict], ttl: Optional[int] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (data, expires_at)
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_entries:
+                self._purge_expired()
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats.incr("evictions")
+        self.stats.incr("sets")
+
+    def _purge_expired(self):
+        # Chamado com o lock adquirido
+        now = time.monotonic()
+        expired = [key for key, (_, expires_at) in self._data.items() if expires_at <= now]
+        for key in expired:
+            del self._data[key]
+        if expired:
+            self.stats.incr("expirations", len(expired))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def get_stats(self) -> Dict[str, Any]:
+        data = super().get_stats()
+        data["max_entries"] = self.max_entries
+        return data
+
+
+class SharedQueryCache(BaseQueryCache):
+    """
+    Cache compartilhado entre workers usando o cache do Django (django-redis
+    em produção). Um LRU local pequeno fica na frente para evitar ida ao
+    Redis em consultas repetidas no mesmo processo.
+    """
+
+    name = "shared"
+    key_prefix = "lineage_db_select"
+
+    def __init__(self, max_entries: int = 512, default_ttl: int = 60, local_ttl: int = 5):
+        super().__init__(default_ttl=default_ttl)
+        self.local = LocalQueryCache(max_entries=max_entries, default_ttl=local_ttl)
+        self._generation_key = f"{self.key_prefix}:generation"
+
+    @staticmethod
+    def _django_cache():
+        from django.core.cache import cache
+        return cache
+
+    def _generation(self) -> int:
+        cache = self._django_cache()
+        generation = cache.get(self._generation_key)
+        if generation is None:
+            generation = 1
+            cache.add(self._generation_key, generation, timeout=None)
+        return generation
+
+    def _make_key(self, key: CacheKey) -> str:
+        query, params = key
+        digest = hashlib.md5(f"{query}:{params!r}".encode()).hexdigest()
+        return f"{self.key_prefix}:{self._generation()}:{digest}"
+
+    def get(self, key: CacheKey) -> Optional[List[Dict]]:
+        data = self.local.get(key)
+        if data is not None:
+            self.stats.incr("hits")
+            return data
+        try:
+            data = self._django_cache().get(self._make_key(key))
+        except Exception as e:
+            logger.warning(f"Erro ao acessar cache compartilhado: {e}")
+            self.stats.incr("errors")
+            data = None
+        if data is None:
+            self.stats.incr("misses")
+            return None
+        self.local.set(key, data)
+        self.stats.incr("hits")
+        return data
+
+    def set(self, key: CacheKey, data: List[Dict], ttl: Optional[int] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        # RowMapping não é serializável; armazena como dict
+        data = convert_rowmapping_to_dict(list(data))
+        try:
+            self._django_cache().set(self._make_key(key), data, timeout=ttl)
+            self.stats.incr("sets")
+        except Exception as e:
+            logger.warning(f"Erro ao salvar no cache compartilhado: {e}")
+            self.stats.incr("errors")
+        self.local.set(key, data, ttl=min(ttl, self.local.default_ttl))
+
+    def clear(self):
+        self.local.clear()
+        try:
+            # Incrementar a geração invalida todas as chaves antigas de uma vez
+            cache = self._django_cache()
+            try:
+                cache.incr(self._generation_key)
+            except ValueError:
+                cache.set(self._generation_key, 2, timeout=None)
+        except Exception as e:
+            logger.warning(f"Erro ao limpar cache compartilhado: {e}")
+            self.stats.incr("errors")
+
+    def __len__(self) -> int:
+        return len(self.local)
+
+    def get_stats(self) -> Dict[str, Any]:
+        data = super().get_stats()
+        data["local"] = self.local.get_stats()
+        return data
+
+
+QUERY_CACHE_BACKENDS = {
+    LocalQueryCache.name: LocalQueryCache,
+    SharedQueryCache.name: SharedQueryCache,
+}
+
+
+def build_query_cache() -> BaseQueryCache:
+    """
+    Instancia o backend configurado via variáveis de ambiente:
+    LINEAGE_DB_CACHE_BACKEND (local|shared), LINEAGE_DB_CACHE_MAX_ENTRIES e
+    LINEAGE_DB_CACHE_TTL.
+    """
+    backend = os.getenv("LINEAGE_DB_CACHE_BACKEND", "local").lower()
+    max_entries = int(os.getenv("LINEAGE_DB_CACHE_MAX_ENTRIES", "512"))
+    default_ttl = int(os.getenv("LINEAGE_DB_CACHE_TTL", "60"))
+
+    cache_class = QUERY_CACHE_BACKENDS.get(backend)
+    if cache_class is None:
+        print(f"⚠️ Backend de cache desconhecido '{backend}', usando 'local'")
+        cache_class = LocalQueryCache
+    return cache_class(max_entries=max_entries, default_ttl=default_ttl)
@@ -0,0 +1,86 @@
+"""
+Visão montada dos castelos para as páginas de cerco.
+
+Castelos e participantes vêm em duas consultas (siege + siege_participants_bulk,
+em vez de uma consulta por castelo), os crests de castelos e participantes
+em uma passada cada, e o resultado inteiro fica no cache como uma unidade.
+Os textos traduzidos (sem dono, sem líder...) são aplicados por requisição,
+pois dependem do idioma.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from django.core.cache import cache
+
+from apps.lineage.server.utils.crest import attach_crests_to_clans
+
+from utils.dynamic_import import get_query_class  # importa o helper
+LineageStats = get_query_class("LineageStats")  # carrega a classe certa com base no .env
+
+SIEGE_CACHE_KEY = 'siege:castles'
+SIEGE_CACHE_TTL = 300
+
+ATTACKER_TYPE = '0'
+DEFENDER_TYPE = '1'
+
+
+def group_participants(rows):
+    """Agrupa as linhas do siege_participants_bulk por castle_id ({id: [participantes]})"""
+    by_castle = defaultdict(list)
+    for row in rows or []:
+        participant = dict(row)
+        by_castle[participant.pop('castle_id')].append(participant)
+    return by_castle
+
+
+def _siege_date(sdate):
+    # siegeDate é gravado em milissegundos
+    if not sdate:
+        return None
+    try:
+        return datetime.fromtimestamp(float(sdate) / 1000)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def build_siege_castles():
+    castles = [dict(castle) for castle in LineageStats.siege() or []]
+    if not castles:
+        return []
+
+    by_castle = group_participants(LineageStats.siege_participants_bulk([castle['id'] for castle in castles]))
+
+    participants = []
+    for castle in castles:
+        castle_participants = by_castle.get(castle['id'], [])
+        participants.extend(castle_participants)
+        castle['siege_participants'] = castle_participants
+        castle['attackers'] = [p for p in castle_participants if str(p.get('type')) == ATTACKER_TYPE]
+        castle['defenders'] = [p for p in castle_participants if str(p.get('type')) == DEFENDER_TYPE]
+        castle['image_path'] = f"assets/img/castles/{castle['name'].lower()}.jpg"
+        castle['siege_date'] = _siege_date(castle.get('sdate'))
+
+    # Os participantes são os mesmos dicts das listas de cada castelo, então
+    # uma única chamada resolve os crests de todos
+    attach_crests_to_clans(castles)
+    attach_crests_to_clans(participants)
+    return castles
+
+
+def get_siege_castles():
+    """Castelos com participantes e crests, do cache quando disponível"""
+    castles = cache.get(SIEGE_CACHE_KEY)
+    if castles is None:
+        castles = build_siege_castles()
+        # Lista vazia costuma ser banco indisponível: não fixa no cache
+        if castles:
+            cache.set(SIEGE_CACHE_KEY, castles, SIEGE_CACHE_TTL)
+    return castles
+
+
+def get_castle_participants(castle_id):
+    """Participantes de um castelo a partir da visão montada"""
+    for castle in get_siege_castles():
+        if castle['id'] == castle_id:
+            return castle['siege_participants']
+    return []
@@ -0,0 +1,180 @@
+"""
+Backends de Whirlpool para as senhas das contas do jogo.
+
+Usa o whirlpool do OpenSSL via hashlib quando o build do Python o expõe
+(em OpenSSL 3 ele fica no provider "legacy"). Caso contrário usa
+`FastWhirlpool`, uma implementação por tabelas que trabalha direto sobre os
+bytes do bloco: as tabelas são calculadas uma vez no import, cada rodada
+indexa os bytes já empacotados (struct.pack) em vez de fazer deslocamentos
+de 64 bits, e a entrada é percorrida com memoryview, sem fatiar bytearray.
+Ambos são bit a bit equivalentes a utils/Whirlpool2003.py.
+"""
+import hashlib
+import struct
+from typing import Callable, Optional
+
+BLOCK_SIZE = 64
+DIGEST_SIZE = 64
+ROUNDS = 10
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+_WORDS = struct.Struct('>8Q')
+
+# S-box do Whirlpool (versão final de 2003)
+_SBOX = bytes.fromhex(
+    "1823c6e887b8014f36a6d2f5796f9152"
+    "60bc9b8ea30c7b351de0d7c22e4bfe57"
+    "157737e59ff04ada58c9290ab1a06b85"
+    "bd5d10f4cb3e0567e427418ba77d95d8"
+    "fbee7c66dd17479eca2dbf07ad5a8333"
+    "6302aa71c81949d9f2e35b889a2632b0"
+    "e90fd580becd3448ff7a905f20681aae"
+    "b454932264f173124008c3ecdba18d3d"
+    "9700cf2b7682d61bb5af6a5045f330ef"
+    "3f55a2ea65ba2fc0de1cfd4d9275068a"
+    "b2e60e1f62d4a896f9c525598472394c"
+    "5e78388cd1a5e261b3219c1e43c7fc04"
+    "51996d0dfadf7e243babce118f4eb7eb"
+    "3c8194f7b9132cd3e76ec40356447fa9"
+    "2abbc153dc0b9d6c3174f646ac8914e1"
+    "163a690970b6d0edcc4298a4285cf886"
+)
+
+
+def _build_tables():
+    def mul(a, b):
+        # Multiplicação em GF(2^8) módulo x^8 + x^4 + x^3 + x^2 + 1 (0x11d)
+        result = 0
+        while b:
+            if b & 1:
+                result ^= a
+            a <<= 1
+            if a & 0x100:
+                a ^= 0x11d
+            b >>= 1
+        return result
+
+    t0 = []
+    for s in _SBOX:
+        row = (s, s, mul(s, 4), s, mul(s, 8), mul(s, 5), mul(s, 2), mul(s, 9))
+        t0.append(int.from_bytes(bytes(row), 'big'))
+
+    tables = [tuple(t0)]
+    for shift in range(8, 64, 8):
+        tables.append(tuple(((t >> shift) | (t << (64 - shift))) & _MASK64 for t in t0))
+
+    round_constants = tuple(int.from_bytes(_SBOX[8 * r:8 * r + 8], 'big') for r in range(ROUNDS))
+    return tuple(tables), round_constants
+
+
+_TABLES, _RC = _build_tables()
+_T0, _T1, _T2, _T3, _T4, _T5, _T6, _T7 = _TABLES
+# Constante de cada rodada já no formato de chave (só a primeira palavra)
+_RC_KEYS = tuple((rc, 0, 0, 0, 0, 0, 0, 0) for rc in _RC)
+
+
+def _round(d, k, t0=_T0, t1=_T1, t2=_T2, t3=_T3, t4=_T4, t5=_T5, t6=_T6, t7=_T7):
+    """
+    Uma rodada sobre os 64 bytes `d`: a palavra de saída i combina o byte j
+    da palavra (i - j) mod 8 pela tabela T_j, mais a palavra i da chave `k`.
+    Desenrolada e com as tabelas como locais, que é o que mais pesa em Python.
+    """
+    return (
+        t0[d[0]] ^ t1[d[57]] ^ t2[d[50]] ^ t3[d[43]] ^ t4[d[36]] ^ t5[d[29]] ^ t6[d[22]] ^ t7[d[15]] ^ k[0],
+        t0[d[8]] ^ t1[d[1]] ^ t2[d[58]] ^ t3[d[51]] ^ t4[d[44]] ^ t5[d[37]] ^ t6[d[30]] ^ t7[d[23]] ^ k[1],
+        t0[d[16]] ^ t1[d[9]] ^ t2[d[2]] ^ t3[d[59]] ^ t4[d[52]] ^ t5[d[45]] ^ t6[d[38]] ^ t7[d[31]] ^ k[2],
+        t0[d[24]] ^ t1[d[17]] ^ t2[d[10]] ^ t3[d[3]] ^ t4[d[60]] ^ t5[d[53]] ^ t6[d[46]] ^ t7[d[39]] ^ k[3],
+        t0[d[32]] ^ t1[d[25]] ^ t2[d[18]] ^ t3[d[11]] ^ t4[d[4]] ^ t5[d[61]] ^ t6[d[54]] ^ t7[d[47]] ^ k[4],
+        t0[d[40]] ^ t1[d[33]] ^ t2[d[26]] ^ t3[d[19]] ^ t4[d[12]] ^ t5[d[5]] ^ t6[d[62]] ^ t7[d[55]] ^ k[5],
+        t0[d[48]] ^ t1[d[41]] ^ t2[d[34]] ^ t3[d[27]] ^ t4[d[20]] ^ t5[d[13]] ^ t6[d[6]] ^ t7[d[63]] ^ k[6],
+        t0[d[56]] ^ t1[d[49]] ^ t2[d[42]] ^ t3[d[35]] ^ t4[d[28]] ^ t5[d[21]] ^ t6[d[14]] ^ t7[d[7]] ^ k[7],
+    )
+
+
+def _compress(hash_words, block):
+    """Aplica a função de compressão a um bloco de 64 bytes (bytes/memoryview)"""
+    pack = _WORDS.pack
+    block_words = _WORDS.unpack(block)
+    key = pack(*hash_words)
+    state = pack(*[b ^ h for b, h in zip(block_words, hash_words)])
+    for rc_key in _RC_KEYS:
+        key_words = _round(key, rc_key)
+        key = pack(*key_words)
+        state = pack(*_round(state, key_words))
+    # Miyaguchi-Preneel
+    return [h ^ s ^ b for h, s, b in zip(hash_words, _WORDS.unpack(state), block_words)]
+
+
+class FastWhirlpool:
+    """Whirlpool em Python puro otimizado; mesma interface de hashlib"""
+
+    name = 'whirlpool'
+    digest_size = DIGEST_SIZE
+    block_size = BLOCK_SIZE
+
+    def __init__(self, data=b''):
+        self._hash = [0] * 8
+        self._buffer = b''
+        self._count = 0
+        if data:
+            self.update(data)
+
+    def update(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self._count += len(data)
+        view = memoryview(self._buffer + bytes(data)) if self._buffer else memoryview(data)
+        full = len(view) - len(view) % BLOCK_SIZE
+        hash_words = self._hash
+        for offset in range(0, full, BLOCK_SIZE):
+            hash_words = _compress(hash_words, view[offset:offset + BLOCK_SIZE])
+        self._hash = hash_words
+        self._buffer = bytes(view[full:])
+
+    def copy(self):
+        other = FastWhirlpool()
+        other._hash = list(self._hash)
+        other._buffer = self._buffer
+        other._count = self._count
+        return other
+
+    def digest(self):
+        # Padding: 0x80, zeros e o tamanho em bits (256 bits, big-endian)
+        pad_len = (BLOCK_SIZE - 32 - 1 - self._count) % BLOCK_SIZE
+        tail = self._buffer + b'\x80' + b'\x00' * pad_len + (self._count * 8).to_bytes(32, 'big')
+        hash_words = self._hash
+        view = memoryview(tail)
+        for offset in range(0, len(tail), BLOCK_SIZE):
+            hash_words = _compress(hash_words, view[offset:offset + BLOCK_SIZE])
+        return _WORDS.pack(*hash_words)
+
+    def hexdigest(self):
+        return self.digest().hex()
+
+
+def _openssl_constructor() -> Optional[Callable]:
+    try:
+        hashlib.new('whirlpool', b'')
+    except (ValueError, TypeError):
+        return None
+    return lambda data=b'': hashlib.new('whirlpool', data)
+
+
+_openssl = _openssl_constructor()
+
+BACKENDS = {'python': FastWhirlpool}
+if _openssl is not None:
+    BACKENDS['openssl'] = _openssl
+
+DEFAULT_BACKEND = 'openssl' if _openssl is not None else 'python'
+
+
+def new(data=b'', backend: Optional[str] = None):
+    """Novo objeto de hash; `backend` força 'openssl' ou 'python'"""
+    return BACKENDS[backend or DEFAULT_BACKEND](data)
+
+
+def whirlpool_digest(data, backend: Optional[str] = None) -> bytes:
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return new(data, backend=backend).digest()
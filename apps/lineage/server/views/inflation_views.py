@@ -2,7 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import user_passes_test, login_required
 from django.utils.translation import gettext_lazy as _
-from django.db import transaction, models
+from django.db import models
 from django.http import JsonResponse
 from django.utils import timezone
 from django.core.paginator import Paginator
@@ -11,31 +11,23 @@ from decimal import Decimal
 
 from ..models import (
     ItemInflationSnapshot,
-    ItemInflationSnapshotDetail,
     ItemInflationCategory,
     ItemInflationStats,
     ItemInflationFavorite
 )
-from apps.lineage.inventory.models import Inventory, InventoryItem, CustomItem
-from apps.lineage.inventory.utils.items import get_itens_json
+from apps.lineage.inventory.models import Inventory, InventoryItem
+from apps.lineage.inventory.utils.catalog import item_catalog
 from utils.dynamic_import import get_query_class
 from apps.lineage.server.database import LineageDB
+from apps.lineage.server.services import inflation_snapshot
+from apps.lineage.server.tasks import create_inflation_snapshot
 
 
 def get_item_name(item_id):
     """
-    Busca o nome do item primeiro em CustomItem, depois em itens.json
+    Busca o nome do item no catálogo (CustomItem sobrepõe o itens.json)
     """
-    try:
-        custom_item = CustomItem.objects.get(item_id=item_id)
-        return custom_item.nome
-    except CustomItem.DoesNotExist:
-        try:
-            itens_data = get_itens_json()
-            item_data = itens_data.get(str(item_id), [None])
-            return item_data[0] if item_data and item_data[0] else f'Item {item_id}'
-        except:
-            return f'Item {item_id}'
+    return item_catalog.get_name(item_id, f'Item {item_id}')
 
 
 def enrich_items_with_names(items_list):
@@ -44,52 +36,23 @@ def enrich_items_with_names(items_list):
     """
     if not items_list:
         return items_list
-    
-    # Filtra apenas itens com item_id válido
-    item_ids = []
-    for item in items_list:
-        item_id = item.get('item_id')
-        if item_id is not None:
-            try:
-                item_ids.append(int(item_id))
-            except (ValueError, TypeError):
-                continue
-    
-    if not item_ids:
-        return items_list
-    
-    # Busca todos os CustomItems de uma vez
-    try:
-        custom_items = {item.item_id: item.nome for item in CustomItem.objects.filter(item_id__in=item_ids)}
-    except:
-        custom_items = {}
-    
-    # Busca itens.json uma vez
-    try:
-        itens_data = get_itens_json()
-    except:
-        itens_data = {}
-    
-    # Enriquece cada item
+
     for item in items_list:
         item_id = item.get('item_id')
-        if item_id is not None:
-            try:
-                item_id_int = int(item_id)
-            except (ValueError, TypeError):
-                continue
-            
-            # Tenta CustomItem primeiro
-            if item_id_int in custom_items:
-                item['item_name'] = custom_items[item_id_int]
-            # Depois tenta itens.json
-            elif str(item_id_int) in itens_data:
-                item_data = itens_data[str(item_id_int)]
-                item['item_name'] = item_data[0] if item_data and item_data[0] else f'Item {item_id_int}'
-            # Se não tiver nome ou tiver nome genérico, atualiza
-            elif not item.get('item_name') or str(item.get('item_name', '')).startswith('Item '):
-                item['item_name'] = get_item_name(item_id_int)
-    
+        if item_id is None:
+            continue
+        try:
+            item_id_int = int(item_id)
+        except (ValueError, TypeError):
+            continue
+
+        name = item_catalog.get_name(item_id_int)
+        if name:
+            item['item_name'] = name
+        # Se não tiver nome ou tiver nome genérico, usa o padrão
+        elif not item.get('item_name') or str(item.get('item_name', '')).startswith('Item '):
+            item['item_name'] = f'Item {item_id_int}'
+
     return items_list
 
 
@@ -173,110 +136,45 @@ def inflation_dashboard(request):
 @staff_required
 def create_snapshot(request):
     """
-    Cria um snapshot do estado atual dos itens no servidor.
+    Enfileira a criação do snapshot do estado atual dos itens no servidor.
+    O progresso é consultado em snapshot_progress.
     """
     if request.method != 'POST':
         return JsonResponse({'error': 'Método não permitido'}, status=405)
-    
-    try:
-        LineageInflation = get_query_class("LineageInflation")
-        
-        # Verifica se já existe snapshot para hoje
-        today = date.today()
-        if ItemInflationSnapshot.objects.filter(snapshot_date=today).exists():
-            return JsonResponse({
-                'error': _('Já existe um snapshot para hoje. Aguarde até amanhã ou delete o snapshot existente.')
-            }, status=400)
-        
-        # Busca dados do servidor
-        items_summary = LineageInflation.get_items_summary_by_category()
-        location_summary = LineageInflation.get_items_by_location_summary()
-        
-        # Conta personagens
-        total_chars = LineageDB().select(
-            "SELECT COUNT(*) as total FROM characters WHERE accesslevel = '0'"
-        )
-        total_characters = total_chars[0]['total'] if total_chars else 0
-        
-        # Calcula totais
-        total_instances = sum(item['total_instances'] for item in items_summary)
-        total_quantity = sum(item['total_quantity'] for item in items_summary)
-        
-        with transaction.atomic():
-            # Cria snapshot
-            snapshot = ItemInflationSnapshot.objects.create(
-                snapshot_date=today,
-                total_characters=total_characters,
-                total_items_instances=total_instances,
-                total_items_quantity=total_quantity,
-                notes=request.POST.get('notes', '')
-            )
-            
-            # Cria detalhes do snapshot
-            categories = {
-                cat.name: cat for cat in ItemInflationCategory.objects.all()
-            }
-            
-            # Enriquece items_summary com nomes corretos
-            items_summary = enrich_items_with_names(items_summary)
-            
-            for item_data in items_summary:
-                # Determina categoria
-                category = None
-                item_id = item_data.get('item_id')
-                for cat_name, cat_obj in categories.items():
-                    if item_id in cat_obj.item_ids:
-                        category = cat_obj
-                        break
-                
-                ItemInflationSnapshotDetail.objects.create(
-                    snapshot=snapshot,
-                    item_id=item_id,
-                    item_name=item_data.get('item_name', get_item_name(item_id)),
-                    location=item_data.get('location', 'INVENTORY'),
-                    quantity=item_data.get('total_quantity', 0),
-                    instances=item_data.get('total_instances', 0),
-                    unique_owners=item_data.get('unique_owners', 0),
-                    category=category
-                )
-            
-            # Adiciona itens do site
-            site_items = InventoryItem.objects.values('item_id', 'item_name').annotate(
-                total_quantity=models.Sum('quantity'),
-                total_instances=models.Count('id'),
-                unique_owners=models.Count('inventory__user', distinct=True)
-            )
-            
-            for site_item in site_items:
-                category = None
-                item_id = site_item['item_id']
-                for cat_name, cat_obj in categories.items():
-                    if item_id in cat_obj.item_ids:
-                        category = cat_obj
-                        break
-                
-                ItemInflationSnapshotDetail.objects.create(
-                    snapshot=snapshot,
-                    item_id=item_id,
-                    item_name=site_item.get('item_name', f'Item {item_id}'),
-                    location='SITE',
-                    quantity=site_item.get('total_quantity', 0),
-                    instances=site_item.get('total_instances', 0),
-                    unique_owners=site_item.get('unique_owners', 0),
-                    category=category
-                )
-        
-        messages.success(request, _('Snapshot criado com sucesso!'))
+
+    # Verifica se já existe snapshot para hoje
+    if ItemInflationSnapshot.objects.filter(snapshot_date=date.today()).exists():
         return JsonResponse({
-            'success': True,
-            'snapshot_id': snapshot.id,
-            'message': _('Snapshot criado com sucesso!')
-        })
-        
-    except Exception as e:
+            'error': _('Já existe um snapshot para hoje. Aguarde até amanhã ou delete o snapshot existente.')
+        }, status=400)
+
+    if not inflation_snapshot.acquire_lock():
         return JsonResponse({
-            'error': str(e)
-        }, status=500)
+            'error': _('Já existe um snapshot sendo gerado. Aguarde a conclusão.')
+        }, status=409)
+
+    try:
+        inflation_snapshot.set_progress('queued', processed=0)
+        create_inflation_snapshot.delay(notes=request.POST.get('notes', ''))
+    except Exception as e:
+        inflation_snapshot.release_lock()
+        inflation_snapshot.set_progress('error', error=str(e))
+        return JsonResponse({'error': str(e)}, status=500)
+
+    return JsonResponse({
+        'success': True,
+        'queued': True,
+        'message': _('Snapshot em processamento. Acompanhe o progresso no painel.')
+    })
+
+
+@staff_required
+def snapshot_progress(request):
+    """
+    Estado da geração de snapshot em andamento (ou da última executada).
+    """
+    progress = inflation_snapshot.get_progress() or {'status': 'idle'}
+    return JsonResponse(progress)
 
 
 @staff_required
@@ -2,14 +2,11 @@ from django.shortcuts import render
 from apps.main.home.decorator import conditional_otp_required
 from django.utils.translation import gettext as _
 
-import json
-import os
-from datetime import datetime
-from django.conf import settings
-
 from apps.lineage.server.database import LineageDB
 from apps.lineage.server.utils.crest import attach_crests_to_clans
 from apps.lineage.server.utils.bosses import enrich_grandboss_status
+from apps.lineage.server.utils.siege import get_siege_castles
+from apps.lineage.inventory.utils.catalog import item_catalog
 from utils.resources import get_class_name
 
 from utils.dynamic_import import get_query_class  # importa o helper
@@ -20,27 +17,15 @@ LineageStats = get_query_class("LineageStats")  # carrega a classe certa com bas
 def siege_ranking_view(request):
     db = LineageDB()
     if db.is_connected():
-        castles = LineageStats.siege()
+        # Castelos, participantes e crests montados em lote e cacheados juntos
+        castles = get_siege_castles()
 
         for castle in castles:
-            participants = LineageStats.siege_participants(castle["id"])
-            castle["attackers"] = [p for p in participants if p["type"] == "0"]
-            castle["defenders"] = [p for p in participants if p["type"] == "1"]
-
-            # adiciona caminho da imagem baseado no nome
-            castle["image_path"] = f"assets/img/castles/{castle['name'].lower()}.jpg"
-
             # adiciona valores default traduzidos se vazio
             castle["clan_name"] = castle["clan_name"] or _("No Owner")
             castle["char_name"] = castle["char_name"] or _("No Leader")
             castle["ally_name"] = castle["ally_name"] or _("No Alliance")
-
-            # CORREÇÃO AQUI: converte Decimal para float
-            timestamp_s = float(castle["sdate"]) / 1000
-            castle["sdate"] = datetime.fromtimestamp(timestamp_s)
-
-        # move para fora do loop para não sobrescrever a cada iteração
-        castles = attach_crests_to_clans(castles)
+            castle["sdate"] = castle["siege_date"]
 
     else:
         castles = list()
@@ -184,16 +169,9 @@ def boss_jewel_locations_view(request):
         boss_jewel_ids = [6656, 6657, 6658, 6659, 6660, 6661, 8191]
         jewel_locations = LineageStats.boss_jewel_locations(boss_jewel_ids)
 
-        # Caminho para o itens.json
-        itens_path = os.path.join(settings.BASE_DIR, 'utils/data/itens.json')
-        with open(itens_path, 'r', encoding='utf-8') as f:
-            itens_data = json.load(f)
-
         # Substituir item_id pelo item_name
         for loc in jewel_locations:
-            item_id_str = str(loc['item_id'])
-            item_name = itens_data.get(item_id_str, ["Desconhecido"])[0]
-            loc['item_name'] = item_name
+            loc['item_name'] = item_catalog.get_name(loc['item_id'], "Desconhecido")
 
         # adiciona as crests dos clans
         jewel_locations = attach_crests_to_clans(jewel_locations)    
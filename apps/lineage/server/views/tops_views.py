@@ -1,6 +1,8 @@
+from django.http import Http404, HttpResponse, HttpResponseNotModified
 from django.shortcuts import render
+from django.views.decorators.http import require_GET
 from apps.main.home.decorator import conditional_otp_required
-from apps.lineage.server.utils.crest import attach_crests_to_clans
+from apps.lineage.server.utils.crest import CREST_SIZES, attach_crests_to_clans, crest_cache, empty_crest_png
 from apps.lineage.server.utils.bosses import enrich_raidboss_status
 from apps.lineage.server.database import LineageDB
 from ..models import ActiveAdenaExchangeItem
@@ -101,3 +103,34 @@ def top_raidboss_view(request):
     }
 
     return render(request, 'tops/top_grandboss.html', context)
+
+
+@require_GET
+def crest_image_view(request, crest_type, crest_id):
+    """
+    Serve o crest redimensionado a partir do cache. Com ?v=<hash> (como
+    gerado por attach_crests_to_clans) a URL é imutável e pode ficar em
+    cache no navegador por um ano; o ETag permite revalidação sem corpo.
+    """
+    if crest_type not in CREST_SIZES:
+        raise Http404
+
+    db = LineageDB()
+    entry = crest_cache.get(crest_type, crest_id) if db.is_connected() else None
+    if not entry:
+        response = HttpResponse(empty_crest_png(crest_type), content_type='image/png')
+        response['Cache-Control'] = 'public, max-age=300'
+        return response
+
+    digest, png = entry
+    etag = f'"{digest}"'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(png, content_type='image/png')
+    response['ETag'] = etag
+    if request.GET.get('v') == digest:
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'public, max-age=3600'
+    return response
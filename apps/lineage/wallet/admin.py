@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
-from .models import Wallet, TransacaoWallet, TransacaoBonus, CoinConfig, CoinPurchaseBonus
+from .models import Wallet, TransacaoWallet, TransacaoBonus, CoinConfig, CoinPurchaseBonus, EntregaServidor
 from core.admin import BaseModelAdmin
 
 
@@ -171,3 +171,29 @@ class CoinPurchaseBonusAdmin(BaseModelAdmin):
             bonus.save()
         self.message_user(request, _('Ordem dos bônus foi reorganizada.'))
     reorder_bonuses.short_description = _('Reorganizar ordem')
+
+
+@admin.register(EntregaServidor)
+class EntregaServidorAdmin(BaseModelAdmin):
+    list_display = ['chave', 'tipo', 'status', 'usuario', 'personagem', 'item_id', 'quantidade',
+                    'tentativas', 'proxima_tentativa', 'entregue_em', 'estornada']
+    list_filter = ['status', 'tipo', 'estornada', 'created_at']
+    search_fields = ['chave', 'usuario__username', 'personagem', 'conta']
+    ordering = ['-created_at']
+    readonly_fields = ['chave', 'tipo', 'usuario', 'conta', 'personagem', 'char_id', 'item_id', 'quantidade',
+                       'enchant', 'valor', 'origem_saldo', 'estornada', 'tentativas', 'processando_desde',
+                       'entregue_em', 'ultimo_erro']
+    actions = ['reenviar_entregas']
+
+    @admin.action(description=_('Reenviar entregas que falharam (sem estorno)'))
+    def reenviar_entregas(self, request, queryset):
+        from django.utils import timezone
+        from .tasks import processar_entregas_servidor
+
+        # Entregas estornadas já devolveram o valor: reenviar entregaria de graça
+        total = queryset.filter(status='FALHOU', estornada=False).update(
+            status='PENDENTE', tentativas=0, proxima_tentativa=timezone.now(), ultimo_erro='',
+        )
+        if total:
+            processar_entregas_servidor.delay()
+        self.message_user(request, _('%(total)d entrega(s) reenviada(s) para a fila.') % {'total': total})
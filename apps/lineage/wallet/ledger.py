@@ -0,0 +1,139 @@
+"""
+Lançamentos atômicos na carteira.
+
+Cada lançamento vira um único UPDATE condicional no banco
+(SET saldo = saldo - x WHERE saldo >= x), sem ler o saldo em Python e sem
+save() da linha inteira, então requisições simultâneas na mesma carteira
+não perdem atualizações e não precisam de select_for_update prévio.
+Lançamentos de várias carteiras (transferências) são aplicados em ordem de
+pk, a mesma ordem de lock em qualquer transação, o que evita deadlock entre
+A→B e B→A. As linhas de TransacaoWallet/TransacaoBonus são gravadas com
+bulk_create; como ele não envia post_save, os eventos de conquista
+('carteira'/'bonus') são marcados aqui, após o commit.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import List, Sequence
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from .models import Wallet, TransacaoWallet, TransacaoBonus
+
+ENTRADA = 'ENTRADA'
+SAIDA = 'SAIDA'
+
+
+@dataclass
+class Lancamento:
+    wallet: Wallet
+    tipo: str
+    valor: Decimal
+    descricao: str = ""
+    origem: str = ""
+    destino: str = ""
+    # True movimenta saldo_bonus (TransacaoBonus); False, saldo (TransacaoWallet)
+    bonus: bool = False
+
+    @property
+    def campo(self) -> str:
+        return 'saldo_bonus' if self.bonus else 'saldo'
+
+
+def _atualizar_saldo(lancamento: Lancamento):
+    campo = lancamento.campo
+    valor = lancamento.valor
+    carteira = Wallet.objects.filter(pk=lancamento.wallet.pk)
+
+    if lancamento.tipo == ENTRADA:
+        alteradas = carteira.update(**{campo: F(campo) + valor, 'updated_at': timezone.now()})
+    elif lancamento.tipo == SAIDA:
+        alteradas = carteira.filter(**{f'{campo}__gte': valor}).update(
+            **{campo: F(campo) - valor, 'updated_at': timezone.now()}
+        )
+        if not alteradas:
+            if lancamento.bonus:
+                raise ValueError(_("Saldo de bônus insuficiente."))
+            raise ValueError(_("Saldo insuficiente."))
+    else:
+        raise ValueError(_("Tipo de transação inválido."))
+
+    if not alteradas:
+        raise Wallet.DoesNotExist(f"Carteira {lancamento.wallet.pk} não encontrada.")
+
+
+def _atualizar_instancias(lancamentos: Sequence[Lancamento]):
+    """Reflete nos objetos Wallet em memória os saldos gravados (uma consulta)"""
+    saldos = {
+        row['pk']: row
+        for row in Wallet.objects.filter(pk__in={l.wallet.pk for l in lancamentos}).values('pk', 'saldo', 'saldo_bonus')
+    }
+    for lancamento in lancamentos:
+        row = saldos.get(lancamento.wallet.pk)
+        if row:
+            lancamento.wallet.saldo = row['saldo']
+            lancamento.wallet.saldo_bonus = row['saldo_bonus']
+
+
+def _marcar_conquistas(lancamentos: Sequence[Lancamento]):
+    """Faz o papel do post_save que o bulk_create não envia"""
+    from utils.services import marcar_conquistas_pendentes
+
+    for evento, bonus in (('carteira', False), ('bonus', True)):
+        usuarios = {l.wallet.usuario_id for l in lancamentos if l.bonus == bonus}
+        if usuarios:
+            transaction.on_commit(partial(marcar_conquistas_pendentes, usuarios, evento), robust=True)
+
+
+def aplicar_lancamentos(lancamentos: Sequence[Lancamento]) -> List:
+    """
+    Aplica os lançamentos em uma transação: ou todos, ou nenhum (ValueError
+    se algum débito não tiver saldo). Retorna as transações criadas, na
+    ordem dos lançamentos.
+    """
+    lancamentos = list(lancamentos)
+    if not lancamentos:
+        return []
+
+    for lancamento in lancamentos:
+        lancamento.valor = Decimal(lancamento.valor)
+
+    with transaction.atomic():
+        # Ordem estável por carteira: dentro da mesma carteira vale a ordem recebida
+        for lancamento in sorted(lancamentos, key=lambda l: l.wallet.pk):
+            _atualizar_saldo(lancamento)
+
+        transacoes = []
+        for lancamento in lancamentos:
+            modelo = TransacaoBonus if lancamento.bonus else TransacaoWallet
+            transacoes.append(modelo(
+                wallet=lancamento.wallet,
+                tipo=lancamento.tipo,
+                valor=lancamento.valor,
+                descricao=lancamento.descricao,
+                origem=lancamento.origem,
+                destino=lancamento.destino,
+            ))
+        for modelo in (TransacaoWallet, TransacaoBonus):
+            linhas = [t for t in transacoes if isinstance(t, modelo)]
+            if linhas:
+                modelo.objects.bulk_create(linhas)
+
+        # Ainda dentro da transação: um erro aqui desfaz o lançamento em vez
+        # de aparecer depois de ele já ter sido gravado
+        _atualizar_instancias(lancamentos)
+        _marcar_conquistas(lancamentos)
+    return transacoes
+
+
+def transferir(wallet_origem, wallet_destino, valor, descricao_saida, descricao_entrada,
+               origem="", destino="", bonus=False):
+    """Débito na origem e crédito no destino, na mesma transação"""
+    return aplicar_lancamentos([
+        Lancamento(wallet_origem, SAIDA, valor, descricao_saida, origem, destino, bonus),
+        Lancamento(wallet_destino, ENTRADA, valor, descricao_entrada, origem, destino, bonus),
+    ])
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from apps.main.home.models import User
 from core.models import BaseModel
@@ -35,6 +36,10 @@ class TransacaoWallet(BaseModel):
     class Meta:
         verbose_name = _("Transação da Carteira")
         verbose_name_plural = _("Transações da Carteira")
+        indexes = [
+            # Agregações por período (fluxo de caixa)
+            models.Index(fields=['data']),
+        ]
 
     def __str__(self):
         return f"{self.tipo} de R${self.valor} - {self.data.strftime('%d/%m/%Y %H:%M')}"
@@ -62,6 +67,62 @@ class TransacaoBonus(BaseModel):
         return f"BÔNUS {self.tipo} de R${self.valor} - {self.data.strftime('%d/%m/%Y %H:%M')}"
 
 
+class EntregaServidor(BaseModel):
+    """
+    Outbox das entregas no banco do jogo. A linha é gravada na mesma
+    transação do débito na carteira e aplicada depois pelo worker
+    (outbox.ProcessadorEntregas), fora dos locks da requisição.
+    """
+    TIPO = [
+        ('MOEDA', _("Moeda/Item para personagem")),
+        ('PERSONAGEM', _("Transferência de personagem")),
+    ]
+    STATUS = [
+        ('PENDENTE', _("Pendente")),
+        ('PROCESSANDO', _("Processando")),
+        ('ENTREGUE', _("Entregue")),
+        ('FALHOU', _("Falhou")),
+    ]
+    ORIGEM_SALDO = [
+        ('normal', _("Saldo")),
+        ('bonus', _("Saldo Bônus")),
+    ]
+
+    chave = models.CharField(_("Chave de Idempotência"), max_length=100, unique=True)
+    tipo = models.CharField(_("Tipo"), max_length=20, choices=TIPO)
+    status = models.CharField(_("Status"), max_length=20, choices=STATUS, default='PENDENTE')
+    usuario = models.ForeignKey(
+        User, verbose_name=_("Usuário"), on_delete=models.CASCADE, related_name='entregas_servidor'
+    )
+    conta = models.CharField(_("Conta"), max_length=100, blank=True)  # login no L2 (destino, no caso de personagem)
+    personagem = models.CharField(_("Personagem"), max_length=100, blank=True)
+    char_id = models.BigIntegerField(_("ID do Personagem"), null=True, blank=True)
+    item_id = models.PositiveIntegerField(_("ID do Item"), null=True, blank=True)
+    quantidade = models.BigIntegerField(_("Quantidade"), default=0)
+    enchant = models.IntegerField(_("Enchant"), default=0)
+    # Valor debitado, estornado se a entrega falhar definitivamente
+    valor = models.DecimalField(_("Valor"), max_digits=10, decimal_places=2, null=True, blank=True)
+    origem_saldo = models.CharField(_("Origem do Saldo"), max_length=10, choices=ORIGEM_SALDO, blank=True)
+    estornada = models.BooleanField(_("Valor Estornado"), default=False)
+    tentativas = models.PositiveIntegerField(_("Tentativas"), default=0)
+    proxima_tentativa = models.DateTimeField(_("Próxima Tentativa"), default=timezone.now)
+    processando_desde = models.DateTimeField(_("Processando Desde"), null=True, blank=True)
+    entregue_em = models.DateTimeField(_("Entregue em"), null=True, blank=True)
+    ultimo_erro = models.TextField(_("Último Erro"), blank=True)
+
+    class Meta:
+        verbose_name = _("Entrega no Servidor")
+        verbose_name_plural = _("Entregas no Servidor")
+        indexes = [
+            # Fila do worker: pendentes vencidas, na ordem
+            models.Index(fields=['status', 'proxima_tentativa']),
+        ]
+
+    def __str__(self):
+        destino = self.personagem or self.char_id
+        return f"{self.get_tipo_display()} para {destino} - {self.get_status_display()}"
+
+
 class CoinConfig(BaseModel):
     nome = models.CharField(_("Nome da Moeda"), max_length=100)
     coin_id = models.PositiveIntegerField(_("ID da Moeda"), default=57)
@@ -0,0 +1,354 @@
+"""
+Outbox das entregas no banco do jogo.
+
+As requisições (transferência da carteira para o personagem, compra de
+personagem no marketplace) só gravam a intenção de entrega, na mesma
+transação do débito, e retornam. O worker:
+- trava um lote de entregas vencidas (select_for_update skip_locked) e as
+  marca como PROCESSANDO, então execuções simultâneas não pegam a mesma;
+- agrupa por personagem: moedas iguais para o mesmo personagem viram um
+  único insert_coin, e cada personagem é atendido por uma única thread
+  (o insert_coin não é seguro em paralelo para o mesmo dono);
+- aplica no servidor em paralelo (pool de threads) e grava o resultado na
+  thread principal, com nova tentativa em backoff exponencial;
+- esgotadas as tentativas, marca FALHOU e estorna o valor das moedas; na
+  compra de personagem do marketplace, devolve o valor do vendedor ao
+  comprador e o anúncio volta à venda. Se o vendedor já não tiver o saldo,
+  a entrega fica FALHOU sem estorno, com o motivo em ultimo_erro, para
+  resolução manual no admin.
+
+A chave de idempotência é única: reenviar o mesmo formulário ou vender o
+mesmo anúncio duas vezes não gera duas entregas. Para personagens a
+entrega também confere a conta atual antes do UPDATE. Moedas que ficaram
+em PROCESSANDO por um worker interrompido não são reenviadas
+automaticamente (podem ter sido entregues); vão para FALHOU para
+conferência no admin.
+"""
+import uuid
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EntregaServidor, Wallet
+
+from utils.dynamic_import import get_query_class
+TransferFromWalletToChar = get_query_class("TransferFromWalletToChar")
+LineageMarketplace = get_query_class("LineageMarketplace")
+
+logger = logging.getLogger(__name__)
+
+# Personagem online sem items_delayed: adia sem gastar tentativa
+ADIAR_ONLINE = timedelta(seconds=60)
+
+
+def _agendar_processamento():
+    from .tasks import processar_entregas_servidor
+
+    transaction.on_commit(processar_entregas_servidor.delay, robust=True)
+
+
+def enfileirar_moedas(usuario, conta, personagem, item_id, quantidade, enchant=0,
+                      valor=None, origem_saldo='normal', chave=None):
+    """Registra a entrega de moedas/itens; chamar dentro da transação do débito"""
+    entrega = EntregaServidor.objects.create(
+        chave=chave or f'moeda:{uuid.uuid4().hex}',
+        tipo='MOEDA',
+        usuario=usuario,
+        conta=conta,
+        personagem=personagem,
+        item_id=item_id,
+        quantidade=quantidade,
+        enchant=enchant,
+        valor=valor,
+        origem_saldo=origem_saldo if valor is not None else '',
+    )
+    _agendar_processamento()
+    return entrega
+
+
+def enfileirar_transferencia_personagem(usuario, char_id, personagem, conta_destino, chave=None):
+    """Registra a troca de conta do personagem; chamar dentro da transação da venda"""
+    entrega = EntregaServidor.objects.create(
+        chave=chave or f'personagem:{uuid.uuid4().hex}',
+        tipo='PERSONAGEM',
+        usuario=usuario,
+        conta=conta_destino,
+        personagem=personagem,
+        char_id=char_id,
+    )
+    _agendar_processamento()
+    return entrega
+
+
+@dataclass
+class ResultadoEntregas:
+    processadas: int = 0
+    entregues: int = 0
+    adiadas: int = 0
+    com_erro: int = 0
+    falhas_definitivas: int = 0
+    interrompidas: int = 0
+
+
+class ProcessadorEntregas:
+
+    # -------------------------------------------------------------- ajustes
+
+    @property
+    def batch_size(self) -> int:
+        return max(1, getattr(settings, 'WALLET_OUTBOX_BATCH_SIZE', 100))
+
+    @property
+    def max_workers(self) -> int:
+        return max(1, getattr(settings, 'WALLET_OUTBOX_MAX_WORKERS', 4))
+
+    @property
+    def max_tentativas(self) -> int:
+        return max(1, getattr(settings, 'WALLET_OUTBOX_MAX_ATTEMPTS', 8))
+
+    @property
+    def timeout_processando(self) -> timedelta:
+        return timedelta(seconds=getattr(settings, 'WALLET_OUTBOX_STALE_AFTER', 600))
+
+    def backoff(self, tentativas: int) -> timedelta:
+        # 30s, 1min, 2min, ... até 1h
+        return timedelta(seconds=min(30 * 2 ** max(tentativas - 1, 0), 3600))
+
+    # ---------------------------------------------------------------- fila
+
+    def _recuperar_interrompidas(self, result: ResultadoEntregas):
+        """Entregas presas em PROCESSANDO por um worker que morreu no meio"""
+        limite = timezone.now() - self.timeout_processando
+        presas = EntregaServidor.objects.filter(status='PROCESSANDO', processando_desde__lt=limite)
+        # Troca de conta é idempotente: volta para a fila
+        presas.filter(tipo='PERSONAGEM').update(status='PENDENTE', proxima_tentativa=timezone.now())
+        result.interrompidas += presas.filter(tipo='MOEDA').update(
+            status='FALHOU',
+            ultimo_erro='Entrega interrompida durante o processamento; confira no jogo antes de reenviar.',
+        )
+
+    def _reservar(self):
+        agora = timezone.now()
+        with transaction.atomic():
+            entregas = list(
+                EntregaServidor.objects
+                .select_for_update(skip_locked=True)
+                .filter(status='PENDENTE', proxima_tentativa__lte=agora)
+                .order_by('proxima_tentativa', 'id')[:self.batch_size]
+            )
+            if entregas:
+                EntregaServidor.objects.filter(id__in=[e.id for e in entregas]).update(
+                    status='PROCESSANDO', processando_desde=agora, tentativas=F('tentativas') + 1,
+                )
+        for entrega in entregas:
+            entrega.tentativas += 1
+        return entregas
+
+    @staticmethod
+    def _agrupar(entregas):
+        """{personagem: {(tipo, item_id, enchant, char_id, conta): [entregas]}}"""
+        por_personagem = defaultdict(lambda: defaultdict(list))
+        for entrega in entregas:
+            if entrega.tipo == 'MOEDA':
+                destino = ('MOEDA', entrega.conta, entrega.personagem)
+                lote = ('MOEDA', entrega.item_id, entrega.enchant, None, entrega.conta)
+            else:
+                destino = ('PERSONAGEM', entrega.char_id)
+                lote = ('PERSONAGEM', None, 0, entrega.char_id, entrega.conta)
+            por_personagem[destino][lote].append(entrega)
+        return por_personagem
+
+    # ------------------------------------------------------------ execução
+
+    @staticmethod
+    def _entregar_moedas(entregas):
+        primeira = entregas[0]
+        if not TransferFromWalletToChar.items_delayed:
+            char = TransferFromWalletToChar.find_char(primeira.conta, primeira.personagem)
+            if not char:
+                return 'erro', 'Personagem não encontrado na conta.'
+            if char[0].get('online', 0) != 0:
+                return 'adiar', 'Personagem online.'
+
+        ok = TransferFromWalletToChar.insert_coin(
+            char_name=primeira.personagem,
+            coin_id=primeira.item_id,
+            amount=sum(e.quantidade for e in entregas),
+            enchant=primeira.enchant,
+        )
+        return ('ok', '') if ok else ('erro', 'Erro ao adicionar a moeda ao personagem.')
+
+    @staticmethod
+    def _entregar_personagem(entregas):
+        entrega = entregas[-1]
+        # Já está na conta de destino (tentativa anterior aplicada)
+        if LineageMarketplace.verify_character_ownership(entrega.char_id, entrega.conta):
+            return 'ok', ''
+        ok = LineageMarketplace.transfer_character_to_account(entrega.char_id, entrega.conta)
+        return ('ok', '') if ok else ('erro', 'Erro ao transferir o personagem no banco do jogo.')
+
+    def _aplicar_destino(self, lotes):
+        """Roda em thread do pool: só acessa o banco do jogo, nunca o ORM"""
+        resultados = []
+        for (tipo, *_chave), entregas in lotes.items():
+            try:
+                if tipo == 'MOEDA':
+                    resultado = self._entregar_moedas(entregas)
+                else:
+                    resultado = self._entregar_personagem(entregas)
+            except Exception as e:
+                resultado = ('erro', str(e))
+            resultados.append((entregas, resultado))
+        return resultados
+
+    def _registrar(self, entregas, resultado, result: ResultadoEntregas):
+        situacao, erro = resultado
+        ids = [e.id for e in entregas]
+        agora = timezone.now()
+        result.processadas += len(entregas)
+
+        if situacao == 'ok':
+            EntregaServidor.objects.filter(id__in=ids).update(
+                status='ENTREGUE', entregue_em=agora, processando_desde=None, ultimo_erro='',
+            )
+            result.entregues += len(entregas)
+            return
+
+        if situacao == 'adiar':
+            EntregaServidor.objects.filter(id__in=ids).update(
+                status='PENDENTE', processando_desde=None, ultimo_erro=erro,
+                proxima_tentativa=agora + ADIAR_ONLINE, tentativas=F('tentativas') - 1,
+            )
+            result.adiadas += len(entregas)
+            return
+
+        logger.warning(f"Falha na entrega {ids} no servidor: {erro}")
+        for entrega in entregas:
+            if entrega.tentativas >= self.max_tentativas:
+                self._falhar(entrega, erro)
+                result.falhas_definitivas += 1
+            else:
+                EntregaServidor.objects.filter(id=entrega.id).update(
+                    status='PENDENTE', processando_desde=None, ultimo_erro=erro,
+                    proxima_tentativa=agora + self.backoff(entrega.tentativas),
+                )
+                result.com_erro += 1
+
+    def _desfazer_venda(self, entrega, erro):
+        """Compra no marketplace sem o personagem entregue: estorna e volta o anúncio à venda"""
+        from apps.lineage.marketplace.models import CharacterTransfer, MarketplaceTransaction
+        from .ledger import transferir
+
+        # marketplace:<transfer_id>:<id da MarketplaceTransaction da compra>
+        partes = entrega.chave.split(':')
+        if len(partes) < 2 or partes[0] != 'marketplace' or not partes[1].isdigit():
+            return
+        transfer_id = partes[1]
+        transfer = (
+            CharacterTransfer.objects
+            .select_for_update()
+            .filter(id=int(transfer_id), status='sold', buyer_id=entrega.usuario_id)
+            .first()
+        )
+        if transfer is None:
+            return
+
+        comprador, _created = Wallet.objects.get_or_create(usuario_id=transfer.buyer_id)
+        vendedor, _created = Wallet.objects.get_or_create(usuario_id=transfer.seller_id)
+        try:
+            transferir(
+                vendedor, comprador, Decimal(transfer.price),
+                descricao_saida=f"Estorno da venda do personagem {transfer.char_name}: falha na entrega",
+                descricao_entrada=f"Estorno da compra do personagem {transfer.char_name}: falha na entrega",
+                origem="Marketplace",
+                destino=entrega.conta,
+            )
+        except ValueError as e:
+            logger.error(f"Estorno da venda {transfer.id} não aplicado: {e}")
+            EntregaServidor.objects.filter(id=entrega.id).update(
+                ultimo_erro=f"{erro} | Estorno não aplicado ({e}): resolver manualmente.",
+            )
+            return
+
+        agora = timezone.now()
+        MarketplaceTransaction.objects.filter(
+            transfer=transfer, transaction_type__in=['purchase', 'sale'], status='completed',
+        ).update(status='cancelled')
+        MarketplaceTransaction.objects.create(
+            transfer=transfer,
+            transaction_type='refund',
+            amount=transfer.price,
+            currency=transfer.currency,
+            user_id=transfer.buyer_id,
+            status='completed',
+            completed_at=agora,
+        )
+        transfer.buyer = None
+        transfer.new_account = None
+        transfer.sold_at = None
+        transfer.status = 'for_sale'
+        transfer.save()
+        EntregaServidor.objects.filter(id=entrega.id).update(estornada=True)
+
+    def _falhar(self, entrega, erro):
+        """Falha definitiva: estorna as moedas ou desfaz a venda do personagem"""
+        from .signals import aplicar_transacao, aplicar_transacao_bonus
+
+        with transaction.atomic():
+            EntregaServidor.objects.filter(id=entrega.id).update(
+                status='FALHOU', processando_desde=None, ultimo_erro=erro,
+            )
+            if entrega.tipo == 'PERSONAGEM':
+                self._desfazer_venda(entrega, erro)
+                return
+            if not entrega.valor:
+                return
+            wallet, _ = Wallet.objects.get_or_create(usuario_id=entrega.usuario_id)
+            wallet = Wallet.objects.select_for_update().get(pk=wallet.pk)
+            EntregaServidor.objects.filter(id=entrega.id).update(estornada=True)
+            aplicar = aplicar_transacao_bonus if entrega.origem_saldo == 'bonus' else aplicar_transacao
+            aplicar(
+                wallet=wallet,
+                tipo='ENTRADA',
+                valor=Decimal(entrega.valor),
+                descricao=f"Estorno: falha na entrega para o personagem {entrega.personagem}",
+                origem="Sistema",
+                destino=entrega.personagem,
+            )
+
+    def run(self) -> ResultadoEntregas:
+        result = ResultadoEntregas()
+        self._recuperar_interrompidas(result)
+
+        entregas = self._reservar()
+        if not entregas:
+            return result
+
+        destinos = list(self._agrupar(entregas).values())
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(destinos)),
+                                thread_name_prefix='wallet-outbox') as executor:
+            for resultados in executor.map(self._aplicar_destino, destinos):
+                for lote, resultado in resultados:
+                    try:
+                        self._registrar(lote, resultado, result)
+                    except Exception as e:
+                        # Fica em PROCESSANDO e é tratada como interrompida
+                        logger.error(f"Erro ao registrar entregas {[entrega.id for entrega in lote]}: {e}")
+
+        logger.info(
+            f"Entregas no servidor: {result.entregues} entregues, {result.adiadas} adiadas, "
+            f"{result.com_erro} com erro, {result.falhas_definitivas} falharam"
+        )
+        return result
+
+
+def processar_entregas() -> dict:
+    return asdict(ProcessadorEntregas().run())
@@ -1,51 +1,22 @@
 from decimal import Decimal
-from .models import *
-from django.utils.translation import gettext as _
 
 
 def aplicar_transacao(wallet, tipo, valor, descricao="", origem="", destino=""):
-    # Garante que valor seja Decimal
-    valor = Decimal(valor)
+    """
+    Lança uma entrada/saída no saldo com UPDATE atômico (ver ledger.py);
+    levanta ValueError se o saldo for insuficiente.
+    """
+    from .ledger import Lancamento, aplicar_lancamentos
 
-    if tipo == "SAIDA" and wallet.saldo < valor:
-        raise ValueError(_("Saldo insuficiente."))
-    
-    if tipo == "ENTRADA":
-        wallet.saldo += valor
-    elif tipo == "SAIDA":
-        wallet.saldo -= valor
-    
-    wallet.save()
-
-    return TransacaoWallet.objects.create(
-        wallet=wallet,
-        tipo=tipo,
-        valor=valor,
-        descricao=descricao,
-        origem=origem,
-        destino=destino
-    )
+    return aplicar_lancamentos([
+        Lancamento(wallet, tipo, Decimal(valor), descricao, origem, destino)
+    ])[0]
 
 
 def aplicar_transacao_bonus(wallet, tipo, valor, descricao="", origem="", destino=""):
-    # Garante que valor seja Decimal
-    valor = Decimal(valor)
-
-    if tipo == "SAIDA" and wallet.saldo_bonus < valor:
-        raise ValueError(_("Saldo de bônus insuficiente."))
-    
-    if tipo == "ENTRADA":
-        wallet.saldo_bonus += valor
-    elif tipo == "SAIDA":
-        wallet.saldo_bonus -= valor
-    
-    wallet.save()
+    """Mesmo que aplicar_transacao, no saldo de bônus"""
+    from .ledger import Lancamento, aplicar_lancamentos
 
-    return TransacaoBonus.objects.create(
-        wallet=wallet,
-        tipo=tipo,
-        valor=valor,
-        descricao=descricao,
-        origem=origem,
-        destino=destino
-    )
+    return aplicar_lancamentos([
+        Lancamento(wallet, tipo, Decimal(valor), descricao, origem, destino, bonus=True)
+    ])[0]
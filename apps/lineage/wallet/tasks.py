@@ -0,0 +1,9 @@
+from celery import shared_task
+
+
+@shared_task
+def processar_entregas_servidor() -> dict:
+    """Aplica no banco do jogo as entregas pendentes do outbox (disparada no commit e pelo beat)"""
+    from .outbox import processar_entregas
+
+    return processar_entregas()
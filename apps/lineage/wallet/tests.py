@@ -1,3 +1,215 @@
-from django.test import TestCase
+import threading
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import OperationalError, close_old_connections, connection
+from django.test import TestCase, TransactionTestCase
+
+from apps.main.home.models import User
+from utils.services import _pendente_key
+
+from .ledger import Lancamento, aplicar_lancamentos, transferir
+from .models import EntregaServidor, TransacaoBonus, TransacaoWallet, Wallet
+from .outbox import ProcessadorEntregas
+from .signals import aplicar_transacao, aplicar_transacao_bonus
+
+
+def _usuario(username):
+    return User.objects.create_user(username=username, email=f'{username}@example.com', password='x')
+
+
+def _carteira(usuario, saldo='0.00', saldo_bonus='0.00'):
+    wallet = Wallet.objects.create(usuario=usuario, saldo=Decimal(saldo), saldo_bonus=Decimal(saldo_bonus))
+    return Wallet.objects.get(pk=wallet.pk)
+
+
+class WalletLedgerTests(TestCase):
+
+    def setUp(self):
+        self.wallet = _carteira(_usuario('alice'), saldo='10.00', saldo_bonus='5.00')
+
+    def test_debit_and_credit_update_instance_and_record_transaction(self):
+        transacao = aplicar_transacao(self.wallet, 'SAIDA', '3.50', descricao='teste')
+        aplicar_transacao_bonus(self.wallet, 'ENTRADA', '1.00')
+
+        self.assertEqual(self.wallet.saldo, Decimal('6.50'))
+        self.assertEqual(self.wallet.saldo_bonus, Decimal('6.00'))
+        self.assertEqual(Wallet.objects.get(pk=self.wallet.pk).saldo, Decimal('6.50'))
+        self.assertEqual((transacao.tipo, transacao.valor, transacao.descricao), ('SAIDA', Decimal('3.50'), 'teste'))
+        self.assertEqual(TransacaoWallet.objects.count(), 1)
+        self.assertEqual(TransacaoBonus.objects.count(), 1)
+
+    def test_insufficient_balance_raises_and_changes_nothing(self):
+        with self.assertRaises(ValueError):
+            aplicar_transacao(self.wallet, 'SAIDA', '10.01')
+        with self.assertRaises(ValueError):
+            aplicar_transacao_bonus(self.wallet, 'SAIDA', '5.01')
+
+        self.assertEqual(Wallet.objects.get(pk=self.wallet.pk).saldo, Decimal('10.00'))
+        self.assertFalse(TransacaoWallet.objects.exists())
+
+    def test_stale_instance_does_not_overwrite_balance(self):
+        copia = Wallet.objects.get(pk=self.wallet.pk)
+        aplicar_transacao(self.wallet, 'SAIDA', '4.00')
+        aplicar_transacao(copia, 'SAIDA', '4.00')
+
+        self.assertEqual(Wallet.objects.get(pk=self.wallet.pk).saldo, Decimal('2.00'))
+
+    def test_batch_is_all_or_nothing(self):
+        outra = _carteira(_usuario('bob'))
+        with self.assertRaises(ValueError):
+            aplicar_lancamentos([
+                Lancamento(outra, 'ENTRADA', Decimal('20.00')),
+                Lancamento(self.wallet, 'SAIDA', Decimal('20.00')),
+            ])
+
+        self.assertEqual(Wallet.objects.get(pk=outra.pk).saldo, Decimal('0.00'))
+        self.assertFalse(TransacaoWallet.objects.exists())
+
+    def test_marks_achievement_events_after_commit(self):
+        outra = _carteira(_usuario('bob'))
+        cache.delete_many([
+            _pendente_key(wallet.usuario_id, evento)
+            for wallet in (self.wallet, outra) for evento in ('carteira', 'bonus')
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            transferir(self.wallet, outra, Decimal('1.00'), 'saída', 'entrada')
+            aplicar_transacao_bonus(outra, 'ENTRADA', '1.00')
+            self.assertIsNone(cache.get(_pendente_key(self.wallet.usuario_id, 'carteira')))
+
+        self.assertTrue(callbacks)
+        self.assertTrue(cache.get(_pendente_key(self.wallet.usuario_id, 'carteira')))
+        self.assertTrue(cache.get(_pendente_key(outra.usuario_id, 'carteira')))
+        self.assertTrue(cache.get(_pendente_key(outra.usuario_id, 'bonus')))
+        self.assertIsNone(cache.get(_pendente_key(self.wallet.usuario_id, 'bonus')))
+
+
+class WalletLedgerConcurrencyTests(TransactionTestCase):
+    """Várias threads martelando as mesmas carteiras"""
+
+    THREADS = 8
+    OPERACOES = 25
+
+    def _martelar(self, trabalho):
+        erros = []
+        barreira = threading.Barrier(self.THREADS)
+
+        def executar(indice):
+            try:
+                barreira.wait()
+                for _ in range(self.OPERACOES):
+                    while True:
+                        try:
+                            trabalho(indice)
+                            break
+                        except OperationalError as e:
+                            # SQLite em memória não espera o lock: tenta de novo
+                            if 'locked' not in str(e):
+                                raise
+            except Exception as e:
+                erros.append(e)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=executar, args=(i,)) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(erros, [])
+
+    def test_concurrent_debits_never_overdraw(self):
+        # Saldo para 100 débitos e 200 tentativas, todas com a mesma instância
+        wallet = _carteira(_usuario('alice'), saldo='100.00')
+        aceitos, recusados = [], []
+        lock = threading.Lock()
+
+        def debitar(indice):
+            try:
+                aplicar_transacao(wallet, 'SAIDA', Decimal('1.00'))
+                resultado = aceitos
+            except ValueError:
+                resultado = recusados
+            with lock:
+                resultado.append(indice)
+
+        self._martelar(debitar)
+
+        self.assertEqual(len(aceitos), 100)
+        self.assertEqual(len(recusados), self.THREADS * self.OPERACOES - 100)
+        self.assertEqual(Wallet.objects.get(pk=wallet.pk).saldo, Decimal('0.00'))
+        self.assertEqual(TransacaoWallet.objects.filter(wallet=wallet).count(), 100)
+
+    def test_concurrent_credits_are_not_lost(self):
+        wallet = _carteira(_usuario('alice'))
+
+        self._martelar(lambda indice: aplicar_transacao(wallet, 'ENTRADA', Decimal('0.10')))
+
+        total = Decimal('0.10') * self.THREADS * self.OPERACOES
+        self.assertEqual(Wallet.objects.get(pk=wallet.pk).saldo, total)
+        self.assertEqual(TransacaoWallet.objects.filter(wallet=wallet).count(), self.THREADS * self.OPERACOES)
+
+    def test_cross_transfers_preserve_total(self):
+        a = _carteira(_usuario('alice'), saldo='50.00')
+        b = _carteira(_usuario('bob'), saldo='50.00')
+
+        def transferir_cruzado(indice):
+            origem, destino = (a, b) if indice % 2 else (b, a)
+            try:
+                transferir(origem, destino, Decimal('1.00'), 'saída', 'entrada')
+            except ValueError:
+                pass
+
+        self._martelar(transferir_cruzado)
+
+        saldos = Wallet.objects.filter(pk__in=[a.pk, b.pk]).values_list('saldo', flat=True)
+        self.assertEqual(sum(saldos), Decimal('100.00'))
+        self.assertTrue(all(saldo >= 0 for saldo in saldos))
+        self.assertEqual(
+            TransacaoWallet.objects.filter(tipo='SAIDA').count(),
+            TransacaoWallet.objects.filter(tipo='ENTRADA').count(),
+        )
+
+
+class EntregaPersonagemFalhaTests(TestCase):
+    """Falha definitiva na troca de conta de um personagem vendido no marketplace"""
+
+    def setUp(self):
+        from apps.lineage.marketplace.models import CharacterTransfer
+
+        self.vendedor = _carteira(_usuario('vendedor'), saldo='30.00')
+        self.comprador = _carteira(_usuario('comprador'), saldo='0.00')
+        self.transfer = CharacterTransfer.objects.create(
+            char_id=10, char_name='Heroi', char_level=80, char_class=1, old_account='vendedor',
+            new_account='comprador', seller=self.vendedor.usuario, buyer=self.comprador.usuario,
+            price=Decimal('30.00'), status='sold',
+        )
+        self.entrega = EntregaServidor.objects.create(
+            chave=f'marketplace:{self.transfer.id}', tipo='PERSONAGEM', usuario=self.comprador.usuario,
+            conta='comprador', personagem='Heroi', char_id=10, status='PROCESSANDO', tentativas=8,
+        )
+
+    def test_refunds_buyer_and_puts_character_back_on_sale(self):
+        ProcessadorEntregas()._falhar(self.entrega, 'erro no servidor')
+
+        self.transfer.refresh_from_db()
+        self.entrega.refresh_from_db()
+        self.assertEqual((self.transfer.status, self.transfer.buyer), ('for_sale', None))
+        self.assertEqual(Wallet.objects.get(pk=self.comprador.pk).saldo, Decimal('30.00'))
+        self.assertEqual(Wallet.objects.get(pk=self.vendedor.pk).saldo, Decimal('0.00'))
+        self.assertEqual((self.entrega.status, self.entrega.estornada), ('FALHOU', True))
+        self.assertTrue(self.transfer.transactions.filter(transaction_type='refund').exists())
+
+    def test_seller_without_balance_is_left_for_manual_resolution(self):
+        aplicar_transacao(self.vendedor, 'SAIDA', '25.00')
+
+        ProcessadorEntregas()._falhar(self.entrega, 'erro no servidor')
+
+        self.transfer.refresh_from_db()
+        self.entrega.refresh_from_db()
+        self.assertEqual(self.transfer.status, 'sold')
+        self.assertEqual(Wallet.objects.get(pk=self.comprador.pk).saldo, Decimal('0.00'))
+        self.assertEqual((self.entrega.status, self.entrega.estornada), ('FALHOU', False))
+        self.assertIn('resolver manualmente', self.entrega.ultimo_erro)
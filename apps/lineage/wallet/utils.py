@@ -1,7 +1,5 @@
-from django.db import transaction
 from .models import *
 from .signals import aplicar_transacao
-from django.utils.translation import gettext as _
 from decimal import Decimal
 from .models import Wallet, TransacaoWallet, TransacaoBonus, CoinPurchaseBonus
 
@@ -70,51 +68,34 @@ def transferir_para_jogador(wallet_origem, wallet_destino, valor, descricao=""):
     """
     Transfere valor da carteira normal de um jogador para outro
     """
-    from .signals import aplicar_transacao
-    
-    # Usa transação atômica para garantir que ambas operações ocorram ou nenhuma
-    with transaction.atomic():
-        aplicar_transacao(
-            wallet=wallet_origem,
-            tipo="SAIDA",
-            valor=valor,
-            descricao=f"Transferência para {wallet_destino.usuario.username}",
-            origem=wallet_origem.usuario.username,
-            destino=wallet_destino.usuario.username
-        )
+    from .ledger import transferir
 
-        aplicar_transacao(
-            wallet=wallet_destino,
-            tipo="ENTRADA",
-            valor=valor,
-            descricao=f"Transferência de {wallet_origem.usuario.username}",
-            origem=wallet_origem.usuario.username,
-            destino=wallet_destino.usuario.username
-        )
+    # Débito e crédito na mesma transação, com ordem de lock consistente
+    transferir(
+        wallet_origem,
+        wallet_destino,
+        valor,
+        descricao_saida=f"Transferência para {wallet_destino.usuario.username}",
+        descricao_entrada=f"Transferência de {wallet_origem.usuario.username}",
+        origem=wallet_origem.usuario.username,
+        destino=wallet_destino.usuario.username,
+    )
 
 
 def transferir_bonus_para_jogador(wallet_origem, wallet_destino, valor, descricao=""):
     """
     Transfere valor da carteira de bônus de um jogador para outro
     """
-    from .signals import aplicar_transacao_bonus
-    
-    # Usa transação atômica para garantir que ambas operações ocorram ou nenhuma
-    with transaction.atomic():
-        aplicar_transacao_bonus(
-            wallet=wallet_origem,
-            tipo="SAIDA",
-            valor=valor,
-            descricao=f"Transferência de bônus para {wallet_destino.usuario.username}",
-            origem=wallet_origem.usuario.username,
-            destino=wallet_destino.usuario.username
-        )
+    from .ledger import transferir
 
-        aplicar_transacao_bonus(
-            wallet=wallet_destino,
-            tipo="ENTRADA",
-            valor=valor,
-            descricao=f"Transferência de bônus de {wallet_origem.usuario.username}",
-            origem=wallet_origem.usuario.username,
-            destino=wallet_destino.usuario.username
-        )
+    # Débito e crédito na mesma transação, com ordem de lock consistente
+    transferir(
+        wallet_origem,
+        wallet_destino,
+        valor,
+        descricao_saida=f"Transferência de bônus para {wallet_destino.usuario.username}",
+        descricao_entrada=f"Transferência de bônus de {wallet_origem.usuario.username}",
+        origem=wallet_origem.usuario.username,
+        destino=wallet_destino.usuario.username,
+        bonus=True,
+    )
@@ -1,10 +1,12 @@
 from django.core.paginator import Paginator
 from apps.main.home.decorator import conditional_otp_required
-from .models import Wallet, TransacaoWallet, TransacaoBonus, CoinConfig
+from .models import Wallet, TransacaoWallet, TransacaoBonus, CoinConfig, EntregaServidor
+from .outbox import enfileirar_moedas
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from .utils import transferir_para_jogador
 from decimal import Decimal
+import uuid
 from django.contrib.auth import authenticate
 from apps.main.home.models import User
 from django.db import transaction, models
@@ -149,8 +151,19 @@ def transfer_to_server(request):
                 messages.error(request, 'O personagem precisa estar offline.')
                 return redirect('wallet:dashboard')
 
+        # Chave do formulário: reenviar o mesmo POST não debita duas vezes
+        chave_entrega = request.POST.get('chave_entrega') or ''
+        chave = f"transferencia:{request.user.pk}:{chave_entrega}" if chave_entrega else None
+
         try:
             with transaction.atomic():
+                # Lock curto: só o débito e o registro da entrega. A entrega no
+                # banco do jogo é feita pelo worker do outbox após o commit.
+                wallet = Wallet.objects.select_for_update().get(pk=wallet.pk)
+                if chave and EntregaServidor.objects.filter(chave=chave).exists():
+                    messages.info(request, _('Esta transferência já foi registrada.'))
+                    return redirect('wallet:dashboard')
+
                 # Registra a saída na carteira escolhida
                 if origem_saldo == 'bonus':
                     aplicar_transacao_bonus(
@@ -171,15 +184,17 @@ def transfer_to_server(request):
                         destino=nome_personagem
                     )
 
-                sucesso = TransferFromWalletToChar.insert_coin(
-                    char_name=nome_personagem,
-                    coin_id=COIN_ID,
-                    amount=int(valor * multiplicador)
+                enfileirar_moedas(
+                    usuario=request.user,
+                    conta=active_login,
+                    personagem=nome_personagem,
+                    item_id=COIN_ID,
+                    quantidade=int(valor * multiplicador),
+                    valor=valor,
+                    origem_saldo='bonus' if origem_saldo == 'bonus' else 'normal',
+                    chave=chave,
                 )
 
-                if not sucesso:
-                    raise Exception(_("Erro ao adicionar a moeda ao personagem."))
-
         except Exception as e:
             messages.error(request, f"Ocorreu um erro durante a transferência: {str(e)}")
             return redirect('wallet:dashboard')
@@ -188,14 +203,15 @@ def transfer_to_server(request):
         perfil.adicionar_xp(40)
 
         if origem_saldo == 'bonus':
-            messages.success(request, _(f"R${valor:.2f} do bônus transferidos com sucesso para o personagem {nome_personagem}."))
+            messages.success(request, _(f"R${valor:.2f} do bônus transferidos para o personagem {nome_personagem}. A entrega no jogo é feita em instantes."))
         else:
-            messages.success(request, _(f"R${valor:.2f} transferidos com sucesso para o personagem {nome_personagem}."))
+            messages.success(request, _(f"R${valor:.2f} transferidos para o personagem {nome_personagem}. A entrega no jogo é feita em instantes."))
         return redirect('wallet:dashboard')
 
     context = {
         'wallet': wallet,
         'personagens': personagens,
+        'chave_entrega': uuid.uuid4().hex,
         'show_bonus_option': getattr(config, 'exibir_opcao_bonus_transferencia', False),
         'bonus_enabled': getattr(config, 'habilitar_transferencia_com_bonus', False),
     }
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.config_snapshot import invalidate_config_snapshot
+from .models import Theme, BackgroundSetting, ThemeVariable
+
+
+@receiver([post_save, post_delete], sender=Theme)
+@receiver([post_save, post_delete], sender=BackgroundSetting)
+@receiver([post_save, post_delete], sender=ThemeVariable)
+def invalidate_site_config(sender, **kwargs):
+    invalidate_config_snapshot()
@@ -1,15 +1,15 @@
 import logging
+import random
 from functools import reduce
 from operator import add
 from time import time
-import threading
 
 from django.conf import settings
-from django.db import IntegrityError, DataError, connection, transaction
+from django.db import connection
 from django.utils import timezone
 from django.http.request import RawPostDataException
 
-from .models import Auditor
+from .writer import audit_writer
 from python_ipware import IpWare
 
 logger = logging.getLogger(__name__)
@@ -21,8 +21,8 @@ class AuditorMiddleware:
         self.AUDITOR_MIDDLEWARE_ENABLE = getattr(settings, "AUDITOR_MIDDLEWARE_ENABLE", False)
         self.AUDITOR_MIDDLEWARE_RESTRICT_PATHS = getattr(settings, "AUDITOR_MIDDLEWARE_RESTRICT_PATHS", [])
         self.AUDITOR_MIDDLEWARE_CONTENT = getattr(settings, "DEBUG", False)
-        # Adiciona lock para evitar concorrência
-        self._save_lock = threading.Lock()
+        # Fração das requisições auditadas (1.0 = todas)
+        self.AUDITOR_MIDDLEWARE_SAMPLE_RATE = float(getattr(settings, "AUDITOR_MIDDLEWARE_SAMPLE_RATE", 1.0))
 
     def __call__(self, request):
         if not self.AUDITOR_MIDDLEWARE_ENABLE:
@@ -46,6 +46,9 @@ class AuditorMiddleware:
                 response = self.get_response(request)
                 return response
 
+        if self.AUDITOR_MIDDLEWARE_SAMPLE_RATE < 1.0 and random.random() >= self.AUDITOR_MIDDLEWARE_SAMPLE_RATE:
+            return self.get_response(request)
+
         previous_connections = len(connection.queries)
         start_time = time()
 
@@ -86,7 +89,7 @@ class AuditorMiddleware:
         s['response_content'] = "DISABLE"
         s['response_status_code'] = getattr(response, 'status_code', None)
 
-        # Salva os dados de auditoria de forma assíncrona e segura
+        # Enfileira para gravação em lote fora do ciclo da requisição
         self._save_audit_data_async(s)
 
         return response
@@ -105,49 +108,13 @@ class AuditorMiddleware:
         return any(path.startswith(pattern) for pattern in skip_patterns)
 
     def _save_audit_data_async(self, audit_data):
-        """Salva dados de auditoria de forma assíncrona e segura"""
-        try:
-            # Usa lock para evitar concorrência
-            with self._save_lock:
-                # Garantir que todos os campos obrigatórios estão presentes
-                required_fields = ['date', 'path', 'total_time', 'total_queries', 'db_time', 'python_time', 'ip', 'method', 'user_agent', 'host', 'port', 'content_type', 'response_content', 'response_status_code']
-                missing_fields = [field for field in required_fields if field not in audit_data or audit_data[field] is None]
-
-                if missing_fields:
-                    logger.error(f"Missing required fields: {missing_fields}. Unable to save event data: {audit_data}")
-                    return
-
-                # Tenta salvar com timeout e retry
-                self._save_with_retry(audit_data)
-
-        except Exception as e:
-            logger.error(f"Unexpected error in audit save: {e}. Event data: {audit_data}")
-
-    def _save_with_retry(self, audit_data, max_retries=3, retry_delay=0.1):
-        """Salva com retry em caso de erro de banco bloqueado"""
-        for attempt in range(max_retries):
-            try:
-                with transaction.atomic():
-                    event = Auditor(**audit_data)
-                    event.save()
-                return  # Sucesso, sai da função
-                
-            except IntegrityError as e:
-                logger.warning(f"IntegrityError (attempt {attempt + 1}/{max_retries}): {e}")
-                if attempt == max_retries - 1:
-                    logger.error(f"IntegrityError: Error saving statistics to the database. Error: {e}. Event data: {audit_data}")
-                    
-            except DataError as e:
-                logger.warning(f"DataError (attempt {attempt + 1}/{max_retries}): {e}")
-                if attempt == max_retries - 1:
-                    logger.error(f"DataError: Error saving statistics to the database. Error: {e}. Event data: {audit_data}")
-                    
-            except Exception as e:
-                if "database is locked" in str(e).lower():
-                    logger.warning(f"Database locked (attempt {attempt + 1}/{max_retries}): {e}")
-                    if attempt < max_retries - 1:
-                        import time
-                        time.sleep(retry_delay * (attempt + 1))  # Backoff exponencial
-                        continue
-                logger.error(f"Error saving statistics to the database. Error: {e}. Event data: {audit_data}")
-                break
+        """Valida e enfileira os dados de auditoria para o writer em segundo plano"""
+        # Garantir que todos os campos obrigatórios estão presentes
+        required_fields = ['date', 'path', 'total_time', 'total_queries', 'db_time', 'python_time', 'ip', 'method', 'user_agent', 'host', 'port', 'content_type', 'response_content', 'response_status_code']
+        missing_fields = [field for field in required_fields if field not in audit_data or audit_data[field] is None]
+
+        if missing_fields:
+            logger.error(f"Missing required fields: {missing_fields}. Unable to save event data: {audit_data}")
+            return
+
+        audit_writer.enqueue(audit_data)
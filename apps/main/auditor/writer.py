@@ -0,0 +1,125 @@
+"""
+Gravação assíncrona dos registros de auditoria.
+
+O middleware apenas enfileira o dicionário da requisição em uma fila
+limitada do processo; uma thread em segundo plano esvazia a fila e grava em
+lotes com bulk_create. Com a fila cheia o registro é descartado e contado,
+de modo que o banco lento nunca segura as requisições.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """Fila limitada + thread de flush em lotes para o modelo Auditor"""
+
+    def __init__(self, max_queue_size=None, batch_size=None, flush_interval=None):
+        self.max_queue_size = max_queue_size or getattr(settings, 'AUDITOR_MIDDLEWARE_QUEUE_SIZE', 10000)
+        self.batch_size = batch_size or getattr(settings, 'AUDITOR_MIDDLEWARE_BATCH_SIZE', 200)
+        self.flush_interval = flush_interval or getattr(settings, 'AUDITOR_MIDDLEWARE_FLUSH_INTERVAL', 2.0)
+        self.max_retries = getattr(settings, 'AUDITOR_MIDDLEWARE_MAX_RETRIES', 3)
+        self.retry_delay = getattr(settings, 'AUDITOR_MIDDLEWARE_RETRY_DELAY', 0.1)
+
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+        self._stats = {'enqueued': 0, 'dropped': 0, 'written': 0, 'failed': 0}
+
+    # ------------------------------------------------------------------ fila
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='auditor-writer', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, audit_data):
+        """
+        Enfileira um registro sem bloquear. Retorna False quando a fila está
+        cheia e o registro foi descartado.
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(audit_data)
+        except queue.Full:
+            self._stats['dropped'] += 1
+            if self._stats['dropped'] % 1000 == 1:
+                logger.warning(f"Fila de auditoria cheia; {self._stats['dropped']} registros descartados até agora")
+            return False
+        self._stats['enqueued'] += 1
+        return True
+
+    def stats(self):
+        data = dict(self._stats)
+        data['pending'] = self._queue.qsize()
+        return data
+
+    # ----------------------------------------------------------------- flush
+
+    def _drain(self, timeout):
+        """Espera o primeiro item por até `timeout` e pega o resto sem bloquear"""
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+        except queue.Empty:
+            return batch
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._drain(self.flush_interval)
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch):
+        from .models import Auditor
+
+        close_old_connections()
+        objs = [Auditor(**data) for data in batch]
+        for attempt in range(self.max_retries):
+            try:
+                with transaction.atomic():
+                    Auditor.objects.bulk_create(objs, batch_size=self.batch_size)
+                self._stats['written'] += len(objs)
+                return
+            except Exception as e:
+                if attempt < self.max_retries - 1:
+                    logger.warning(f"Falha ao gravar lote de auditoria (tentativa {attempt + 1}/{self.max_retries}): {e}")
+                    time.sleep(self.retry_delay * (attempt + 1))
+                    continue
+                self._stats['failed'] += len(objs)
+                logger.error(f"Erro ao gravar {len(objs)} registros de auditoria. Erro: {e}")
+
+    def flush(self):
+        """Grava imediatamente tudo que está na fila (usado no encerramento e em testes)"""
+        while True:
+            batch = self._drain(0)
+            if not batch:
+                return
+            self._write(batch)
+
+    def stop(self):
+        self._stopped.set()
+        self.flush()
+
+
+audit_writer = AuditWriter()
+atexit.register(audit_writer.stop)
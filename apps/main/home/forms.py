@@ -1,4 +1,4 @@
-from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, PasswordChangeForm, UsernameField, PasswordResetForm, SetPasswordForm, UserChangeForm
+from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, PasswordChangeForm, UsernameField, PasswordResetForm, SetPasswordForm, UserChangeForm, _unicode_ci_compare
 from django.utils.translation import gettext_lazy as _
 from django_ckeditor_5.widgets import CKEditor5Widget
 from django import forms
@@ -199,6 +199,22 @@ class UserPasswordResetForm(PasswordResetForm):
         })
     )
 
+    def get_users(self, email):
+        """
+        Como o PasswordResetForm, mas inclui contas sem senha utilizável: as
+        importadas do L2 com migrate_l2_accounts --bulk só definem a senha por
+        aqui.
+        """
+        email_field_name = User.get_email_field_name()
+        active_users = User._default_manager.filter(**{
+            f'{email_field_name}__iexact': email,
+            'is_active': True,
+        })
+        return (
+            user for user in active_users
+            if _unicode_ci_compare(email, getattr(user, email_field_name))
+        )
+
 
 class UserSetPasswordForm(SetPasswordForm):
     new_password1 = forms.CharField(
@@ -1,3 +1,33 @@
+from django.core import mail
 from django.test import TestCase
 
-# Create your tests here.
+from apps.lineage.server.management.commands.migrate_l2_accounts import Command as MigrateL2AccountsCommand
+
+from .forms import UserPasswordResetForm
+from .models import User
+
+
+class PasswordResetForBulkImportedUsersTests(TestCase):
+
+    def _reset(self, email):
+        form = UserPasswordResetForm({'email': email})
+        self.assertTrue(form.is_valid())
+        form.save(domain_override='example.com')
+
+    def test_bulk_imported_user_receives_reset_email(self):
+        user, password = MigrateL2AccountsCommand().build_bulk_user('jogador', 'jogador@example.com', 0, 64)
+        user.save()
+        self.assertIsNone(password)
+        self.assertFalse(user.has_usable_password())
+
+        self._reset('Jogador@Example.com')
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['jogador@example.com'])
+
+    def test_inactive_user_does_not_receive_reset_email(self):
+        User.objects.create_user(username='inativo', email='inativo@example.com', password='x', is_active=False)
+
+        self._reset('inativo@example.com')
+
+        self.assertEqual(mail.outbox, [])
@@ -24,12 +24,13 @@ from django_otp.plugins.otp_totp.models import TOTPDevice
 
 from apps.lineage.server.utils.crest import attach_crests_to_clans
 from apps.main.home.decorator import conditional_otp_required
-from apps.lineage.server.models import IndexConfig, Apoiador
+from apps.lineage.server.models import Apoiador
 from apps.lineage.wallet.models import Wallet
 from apps.lineage.inventory.models import Inventory
 from apps.lineage.auction.models import Auction
 from apps.lineage.games.utils import verificar_recompensas_por_nivel
 from utils.render_theme_page import render_theme_page
+from core.config_snapshot import get_config_snapshot
 from apps.main.news.models import News
 from utils.services import verificar_conquistas
 from utils.dynamic_import import get_query_class
@@ -98,7 +99,8 @@ def index(request):
             cache.set(online_cache_key, online, 30)  # Cache erro por 30s
 
     # Pega a configuração do índice (ex: nome do servidor)
-    config = IndexConfig.objects.first()
+    snapshot = get_config_snapshot()
+    config = snapshot.index_config
 
     # Contagem de jogadores online
     online_count = online[0]['quant'] if online and isinstance(online, list) and 'quant' in online[0] else 0
@@ -108,7 +110,7 @@ def index(request):
     # Pega a tradução configurada
     translation = None
     if config:
-        translation = config.translations.filter(language=current_lang).first()
+        translation = snapshot.index_translation(current_lang)
 
     # Caso não exista o registro de configuração ou tradução, usa valores padrões
     nome_servidor = "Lineage 2 PDL"
@@ -1,6 +1,8 @@
 import time
+import random
 import requests
 from django.core.cache import cache
+from django.db.models import F
 from django.utils import timezone
 from django.conf import settings
 from .models import License, LicenseVerification
@@ -14,27 +16,99 @@ class LicenseManager:
     
     def __init__(self):
         self.cache_key = 'current_license'
+        self.state_cache_key = 'current_license_state'
         self.verification_interval = settings.LICENSE_CONFIG.get('VERIFICATION_INTERVAL', 3600)
         self.cache_timeout = settings.LICENSE_CONFIG.get('CACHE_TIMEOUT', 3600)
+        # Intervalo (s) em que o estado validado é reaproveitado antes de reverificar
+        self.reverify_interval = settings.LICENSE_CONFIG.get('REVERIFY_INTERVAL', 300)
+        # Tempo (s) que cada processo confia no seu estado local sem consultar o Redis
+        self.local_state_ttl = settings.LICENSE_CONFIG.get('LOCAL_STATE_TTL', 30)
+        # Fração das verificações bem-sucedidas que geram um LicenseVerification
+        self.verification_sample_rate = settings.LICENSE_CONFIG.get('VERIFICATION_SAMPLE_RATE', 1.0)
+        self._local_license = None
+        self._local_state = None
     
     def get_current_license(self):
         """
-        Obtém a licença ativa atual (com cache)
+        Obtém a licença ativa atual (com cache local e compartilhado)
         """
+        local = self._local_license
+        if local and local[1] > time.monotonic():
+            return local[0]
+        
         # Tenta obter do cache primeiro
-        cached_license = cache.get(self.cache_key)
-        if cached_license:
-            return cached_license
+        license = cache.get(self.cache_key)
         
-        # Busca no banco de dados
-        license = License.objects.filter(status='active').first()
+        if not license:
+            # Busca no banco de dados
+            license = License.objects.filter(status='active').first()
+            
+            if license:
+                # Salva no cache
+                cache.set(self.cache_key, license, self.cache_timeout)
         
         if license:
-            # Salva no cache
-            cache.set(self.cache_key, license, self.cache_timeout)
+            self._local_license = (license, time.monotonic() + self.local_state_ttl)
         
         return license
     
+    def is_license_valid(self, request=None):
+        """
+        Caminho rápido usado a cada requisição: reaproveita o último estado
+        validado (memória do processo e depois Redis) e só executa
+        check_license_status() quando o estado expira ou foi invalidado.
+        """
+        state = self._get_cached_state()
+        if state is not None:
+            return state['is_valid']
+        return self.check_license_status(request)
+    
+    def invalidate(self):
+        """
+        Descarta a licença e o estado validado em cache (chamado pelos sinais
+        do admin). Outros processos percebem a mudança em até LOCAL_STATE_TTL.
+        """
+        self._local_license = None
+        self._local_state = None
+        try:
+            cache.delete_many([self.cache_key, self.state_cache_key])
+        except Exception as e:
+            print(f"[LicenseManager] Erro ao invalidar cache da licença: {e}")
+    
+    def _get_cached_state(self):
+        local = self._local_state
+        if local and local[1] > time.monotonic():
+            return local[0]
+        
+        try:
+            state = cache.get(self.state_cache_key)
+        except Exception:
+            state = None
+        
+        if state is not None:
+            self._local_state = (state, time.monotonic() + self.local_state_ttl)
+        return state
+    
+    def _store_state(self, license, is_valid):
+        """
+        Publica o resultado da verificação para este processo e para os demais
+        workers. O estado válido nunca sobrevive à data de expiração da licença.
+        """
+        timeout = self.reverify_interval
+        if is_valid and license and license.expires_at:
+            remaining = int((license.expires_at - timezone.now()).total_seconds())
+            timeout = max(1, min(timeout, remaining))
+        
+        state = {
+            'license_id': license.pk if license else None,
+            'is_valid': is_valid,
+        }
+        try:
+            cache.set(self.state_cache_key, state, timeout)
+        except Exception as e:
+            print(f"[LicenseManager] Erro ao salvar estado da licença: {e}")
+        self._local_state = (state, time.monotonic() + min(timeout, self.local_state_ttl))
+    
     def check_license_status(self, request=None):
         """
         Verifica se a licença atual é válida
@@ -44,14 +118,16 @@ class LicenseManager:
         
         if not current_license:
             self._record_verification(None, request, False, "Nenhuma licença encontrada", start_time)
+            self._store_state(None, False)
             return False
         
         try:
             # Verifica se a licença está ativa
             if current_license.status != 'active':
-                self._record_verification(current_license, request, False, f"Licença com status: {current_license.status}", start_time)
                 # Limpa o cache para garantir que mudanças no admin sejam refletidas
-                cache.delete(self.cache_key)
+                self.invalidate()
+                self._record_verification(current_license, request, False, f"Licença com status: {current_license.status}", start_time)
+                self._store_state(current_license, False)
                 return False
             
             # Verifica se não expirou (apenas para licenças PRO)
@@ -60,8 +136,9 @@ class LicenseManager:
                     current_license.status = 'expired'
                     current_license.save()
                     # Limpa o cache após mudança de status
-                    cache.delete(self.cache_key)
+                    self.invalidate()
                     self._record_verification(current_license, request, False, "Licença expirada", start_time)
+                    self._store_state(current_license, False)
                     return False
             
             # Verifica se deve fazer verificação remota (desabilitada em desenvolvimento)
@@ -69,17 +146,19 @@ class LicenseManager:
                 remote_valid = self._verify_remotely(current_license, request)
                 if not remote_valid:
                     self._record_verification(current_license, request, False, "Falha na verificação remota", start_time)
+                    self._store_state(current_license, False)
                     return False
             
-            # Atualiza última verificação
-            current_license.last_verification = timezone.now()
-            current_license.verification_count += 1
-            current_license.save()
-            
-            # Limpa o cache para garantir dados atualizados
-            cache.delete(self.cache_key)
+            # Atualiza última verificação sem regravar a linha inteira
+            now = timezone.now()
+            License.objects.filter(pk=current_license.pk).update(
+                last_verification=now,
+                verification_count=F('verification_count') + 1,
+            )
+            current_license.last_verification = now
             
             self._record_verification(current_license, request, True, "", start_time)
+            self._store_state(current_license, True)
             return True
             
         except Exception as e:
@@ -95,7 +174,7 @@ class LicenseManager:
         if not license:
             return False
         
-        if not self.check_license_status(request):
+        if not self.is_license_valid(request):
             return False
         
         return license.can_use_feature(feature_name)
@@ -248,6 +327,10 @@ class LicenseManager:
                 print(f"[LicenseManager] Verificação não registrada: Nenhuma licença disponível")
                 return
             
+            # Falhas são sempre registradas; sucessos podem ser amostrados
+            if success and random.random() >= self.verification_sample_rate:
+                return
+            
             response_time = (time.time() - start_time) * 1000  # em milissegundos
             
             verification = LicenseVerification(
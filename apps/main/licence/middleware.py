@@ -53,8 +53,8 @@ class LicenseMiddleware:
                 request.license_status['has_license'] = True
                 request.license_status['license_info'] = license_manager.get_license_info()
                 
-                # Verifica se a licença está válida
-                is_valid = license_manager.check_license_status(request)
+                # Verifica se a licença está válida (estado em cache, reverificado periodicamente)
+                is_valid = license_manager.is_license_valid(request)
                 request.license_status['is_valid'] = is_valid
                 
                 # Se a licença for inválida, redireciona baseado no tipo de usuário
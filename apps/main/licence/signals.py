@@ -1 +1,14 @@
-# signals here
\ No newline at end of file
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import License
+from .manager import license_manager
+
+
+@receiver(post_save, sender=License)
+@receiver(post_delete, sender=License)
+def invalidate_license_state(sender, instance, **kwargs):
+    """
+    Qualquer alteração de licença (admin, comandos, ativação) descarta o
+    estado validado em cache para que a próxima requisição reverifique.
+    """
+    license_manager.invalidate()
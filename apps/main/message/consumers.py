@@ -7,6 +7,10 @@ from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+MESSAGES_PAGE_SIZE = 50
+MESSAGES_MAX_PAGE_SIZE = 100
+GENERIC_AVATAR_URL = '/static/assets/img/team/generic_user.png'
+
 
 class MessageConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -15,6 +19,8 @@ class MessageConsumer(AsyncWebsocketConsumer):
 
         self.user = self.scope["user"]
         self.user_group_name = f"user_{self.user.id}"
+        # URLs de avatar já calculadas nesta conexão: (user_id, arquivo) -> url
+        self._avatar_urls = {}
         
         # Adicionar ao grupo do usuário
         await self.channel_layer.group_add(
@@ -135,15 +141,27 @@ class MessageConsumer(AsyncWebsocketConsumer):
             }))
             return
             
-        # Carregar mensagens
-        messages = await self.load_messages(friend_id)
+        before_id = data.get('before_id')
+        try:
+            limit = int(data.get('limit') or MESSAGES_PAGE_SIZE)
+        except (TypeError, ValueError):
+            limit = MESSAGES_PAGE_SIZE
+        limit = max(1, min(limit, MESSAGES_MAX_PAGE_SIZE))
+
+        # Carregar mensagens (página mais recente ou anteriores a before_id)
+        messages, has_more = await self.load_messages(friend_id, before_id=before_id, limit=limit)
         
-        # Marcar como lidas
-        await self.mark_messages_as_read(friend_id)
+        # Marcar como lidas apenas ao abrir a conversa
+        if not before_id:
+            await self.mark_messages_as_read(friend_id)
         
         await self.send(text_data=json.dumps({
             'type': 'messages_loaded',
-            'messages': messages
+            'friend_id': friend_id,
+            'messages': messages,
+            'has_more': has_more,
+            'before_id': before_id,
+            'next_before_id': messages[0]['id'] if messages and has_more else None
         }))
 
     async def handle_mark_as_read(self, data):
@@ -239,19 +257,31 @@ class MessageConsumer(AsyncWebsocketConsumer):
         return chat
 
     @database_sync_to_async
-    def load_messages(self, friend_id):
-        """Carregar mensagens de um chat"""
+    def load_messages(self, friend_id, before_id=None, limit=MESSAGES_PAGE_SIZE):
+        """
+        Carregar uma página de mensagens de um chat, da mais antiga para a mais
+        recente. Sem before_id retorna as últimas `limit` mensagens; com
+        before_id, as anteriores a ela (cursor pelo id). Retorna
+        (mensagens, has_more).
+        """
         try:
             from apps.main.home.models import User
             
             friend = User.objects.get(id=friend_id)
             chat = self.create_or_get_chat_sync(friend)
             
-            messages = chat.messages.all().select_related('sender').order_by('timestamp')[:500]
+            messages = chat.messages.select_related('sender').order_by('-id')
+            if before_id:
+                messages = messages.filter(id__lt=int(before_id))
+            messages = list(messages[:limit + 1])
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+            messages.reverse()
             
             formatted_messages = []
             for msg in messages:
                 formatted_messages.append({
+                    'id': msg.id,
                     'text': msg.text,
                     'sender': {
                         'username': msg.sender.username,
@@ -259,13 +289,13 @@ class MessageConsumer(AsyncWebsocketConsumer):
                     },
                     'timestamp': msg.timestamp.isoformat(),
                     'is_read': msg.is_read,
-                    'is_own': msg.sender == self.user
+                    'is_own': msg.sender_id == self.user.id
                 })
             
-            return formatted_messages
+            return formatted_messages, has_more
         except Exception as e:
             logger.error(f"Error loading messages: {str(e)}")
-            return []
+            return [], False
 
     @database_sync_to_async
     def mark_messages_as_read(self, friend_id):
@@ -287,28 +317,29 @@ class MessageConsumer(AsyncWebsocketConsumer):
 
     @database_sync_to_async
     def get_unread_counts(self):
-        """Obter contagem de mensagens não lidas por amigo"""
+        """Obter contagem de mensagens não lidas por amigo (duas consultas no total)"""
         try:
-            from .models import Friendship
-            from apps.main.home.models import User
+            from django.db.models import Count, Q
+            from .models import Friendship, Message
             
-            friendships = Friendship.objects.filter(
+            friend_ids = list(Friendship.objects.filter(
                 user=self.user,
                 accepted=True
-            ).values('friend_id')
+            ).values_list('friend_id', flat=True))
             
-            unread_counts = {}
-            for friendship in friendships:
-                friend_id = friendship['friend_id']
-                friend = User.objects.get(id=friend_id)
-                chat = self.create_or_get_chat_sync(friend)
-                
-                unread_count = chat.messages.filter(
-                    sender=friend,
-                    is_read=False
-                ).count()
-                
-                unread_counts[friend_id] = unread_count
+            unread_counts = dict.fromkeys(friend_ids, 0)
+            if not friend_ids:
+                return unread_counts
+            
+            # Mensagens não lidas enviadas pelos amigos nos chats do usuário
+            unread = Message.objects.filter(
+                Q(chat__user1=self.user) | Q(chat__user2=self.user),
+                sender_id__in=friend_ids,
+                is_read=False
+            ).values('sender_id').annotate(total=Count('id')).order_by()
+            
+            for row in unread:
+                unread_counts[row['sender_id']] = row['total']
             
             return unread_counts
         except Exception as e:
@@ -330,16 +361,23 @@ class MessageConsumer(AsyncWebsocketConsumer):
         return self.get_avatar_url_sync(user)
 
     def get_avatar_url_sync(self, user):
-        """Obter URL do avatar do usuário (versão síncrona)"""
-        if user.avatar:
+        """
+        Obter URL do avatar do usuário (versão síncrona). A URL é memorizada
+        por conexão e recalculada apenas se o arquivo do avatar mudar.
+        """
+        if not user.avatar:
+            return GENERIC_AVATAR_URL
+
+        key = (user.id, user.avatar.name)
+        url = self._avatar_urls.get(key)
+        if url is None:
             from django.urls import reverse
-            from django.utils import timezone
             timestamp = int(timezone.now().timestamp())
-            return reverse('serve_files:serve_decrypted_file_with_timestamp', 
+            url = reverse('serve_files:serve_decrypted_file_with_timestamp', 
                          kwargs={'app_name': 'home', 'model_name': 'user', 'field_name': 'avatar', 
                                 'uuid': user.uuid, 'timestamp': timestamp})
-        else:
-            return '/static/assets/img/team/generic_user.png'
+            self._avatar_urls[key] = url
+        return url
 
     @database_sync_to_async
     def get_friends_stats(self):
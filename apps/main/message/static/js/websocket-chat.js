@@ -2,6 +2,9 @@ class WebSocketChat {
     constructor() {
         this.socket = null;
         this.activeFriendId = null;
+        // Cursor do histórico: id da mensagem mais antiga exibida
+        this.nextBeforeId = null;
+        this.loadingOlder = false;
         this.reconnectAttempts = 0;
         this.maxReconnectAttempts = 5;
         this.reconnectDelay = 1000;
@@ -176,10 +179,36 @@ class WebSocketChat {
     }
 
     handleMessagesLoaded(data) {
+        if (data.friend_id != this.activeFriendId) {
+            return;
+        }
+        this.nextBeforeId = data.next_before_id;
+
+        if (data.before_id) {
+            // Página anterior: insere no topo mantendo a posição de leitura
+            const previousHeight = this.chatMessages.scrollHeight;
+            this.prependMessages(data.messages);
+            this.chatMessages.scrollTop += this.chatMessages.scrollHeight - previousHeight;
+            this.loadingOlder = false;
+            return;
+        }
+
         this.displayMessages(data.messages);
         this.scrollToBottom();
     }
 
+    loadOlderMessages() {
+        if (!this.activeFriendId || !this.nextBeforeId || this.loadingOlder) {
+            return;
+        }
+        this.loadingOlder = true;
+        this.sendWebSocketMessage({
+            type: 'load_messages',
+            friend_id: this.activeFriendId,
+            before_id: this.nextBeforeId
+        });
+    }
+
     handleMessagesMarkedRead(data) {
         // Atualizar contador de não lidas
         this.updateUnreadBadge(data.friend_id, false);
@@ -260,6 +289,20 @@ class WebSocketChat {
         `;
         
         this.chatMessages.appendChild(messageDiv);
+        return messageDiv;
+    }
+
+    prependMessages(messages) {
+        const firstChild = this.chatMessages.firstChild;
+        messages.forEach(message => {
+            const messageDiv = this.addMessageToChat({
+                message: message.text,
+                sender_username: message.sender.username,
+                sender_avatar_url: message.sender.avatar_url,
+                timestamp: message.timestamp
+            }, message.is_own);
+            this.chatMessages.insertBefore(messageDiv, firstChild);
+        });
     }
 
     displayMessages(messages) {
@@ -313,6 +356,13 @@ class WebSocketChat {
         // Enviar mensagem
         this.sendBtn.addEventListener('click', () => this.sendMessage());
         
+        // Carregar mensagens anteriores ao chegar no topo do histórico
+        this.chatMessages.addEventListener('scroll', () => {
+            if (this.chatMessages.scrollTop === 0) {
+                this.loadOlderMessages();
+            }
+        });
+        
         // Enter para enviar, Shift+Enter para nova linha
         this.messageInput.addEventListener('keydown', (e) => {
             if (e.key === 'Enter' && !e.shiftKey) {
@@ -381,6 +431,8 @@ class WebSocketChat {
 
     selectFriend(friendId, item) {
         this.activeFriendId = friendId;
+        this.nextBeforeId = null;
+        this.loadingOlder = false;
         
         // Atualizar UI
         this.friendItems.forEach(friend => friend.classList.remove('active'));
@@ -1,8 +1,10 @@
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from core.admin import BaseModelAdmin
 from .models import SystemResource
+from .gate import resource_gate
 
 
 @admin.register(SystemResource)
@@ -45,6 +47,8 @@ class SystemResourceAdmin(BaseModelAdmin):
     def activate_resources(self, request, queryset):
         """Ação para ativar recursos selecionados"""
         updated = queryset.update(is_active=True)
+        # update() não dispara sinais
+        transaction.on_commit(resource_gate.invalidate)
         self.message_user(
             request,
             _('{} recursos foram ativados com sucesso.').format(updated),
@@ -55,6 +59,7 @@ class SystemResourceAdmin(BaseModelAdmin):
     def deactivate_resources(self, request, queryset):
         """Ação para desativar recursos selecionados"""
         updated = queryset.update(is_active=False)
+        transaction.on_commit(resource_gate.invalidate)
         self.message_user(
             request,
             _('{} recursos foram desativados com sucesso.').format(updated),
@@ -5,3 +5,6 @@ class ResourcesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.main.resources'
     verbose_name = 'Recursos do Sistema'
+
+    def ready(self):
+        import apps.main.resources.signals
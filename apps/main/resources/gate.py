@@ -0,0 +1,118 @@
+"""
+Estado dos recursos do sistema em memória.
+
+O conjunto de recursos inativos é carregado por processo e recarregado
+quando o TTL local expira ou quando a versão compartilhada no cache (Redis)
+muda. A versão é incrementada pelos sinais de SystemResource e pelas ações
+em massa do admin, então ligar/desligar um recurso vale para todos os
+workers sem reiniciar e sem consulta ao banco por requisição.
+"""
+import time
+import logging
+import threading
+from typing import Dict, FrozenSet, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'resources:version'
+
+
+class PrefixTable:
+    """
+    Tabela de prefixos de caminhos. A busca testa o caminho inteiro e depois
+    cada prefixo terminado em '/' do mais longo para o mais curto, então o
+    custo é O(tamanho do caminho) e vence sempre o mapeamento mais específico.
+    """
+
+    def __init__(self, mapping: Dict[str, str]):
+        self._mapping = dict(mapping)
+
+    def lookup(self, path: str) -> Optional[str]:
+        mapping = self._mapping
+        resource = mapping.get(path)
+        if resource:
+            return resource
+        end = path.rfind('/', 0, len(path) - 1)
+        while end >= 0:
+            resource = mapping.get(path[:end + 1])
+            if resource:
+                return resource
+            end = path.rfind('/', 0, end)
+        return None
+
+
+class ResourceGate:
+    """Consulta O(1) do estado dos recursos, sem acesso ao banco no caminho quente"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inactive: Optional[FrozenSet[str]] = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+
+    @property
+    def ttl(self) -> float:
+        return getattr(settings, 'RESOURCE_GATE_TTL', 60)
+
+    @property
+    def check_interval(self) -> float:
+        return getattr(settings, 'RESOURCE_GATE_CHECK_INTERVAL', 1)
+
+    def _shared_version(self):
+        try:
+            return cache.get(VERSION_CACHE_KEY, 0)
+        except Exception:
+            return self._version
+
+    def _load(self, version):
+        from .models import SystemResource
+
+        inactive = frozenset(
+            SystemResource.objects.filter(is_active=False).values_list('name', flat=True)
+        )
+        self._inactive = inactive
+        self._version = version
+        self._loaded_at = time.monotonic()
+        return inactive
+
+    def inactive_resources(self) -> FrozenSet[str]:
+        inactive = self._inactive
+        now = time.monotonic()
+        if inactive is not None and now - self._checked_at < self.check_interval:
+            return inactive
+
+        version = self._shared_version()
+        self._checked_at = now
+        if inactive is not None and version == self._version and now - self._loaded_at < self.ttl:
+            return inactive
+
+        with self._lock:
+            return self._load(version)
+
+    def is_resource_active(self, resource_name: str) -> bool:
+        # Recursos sem registro contam como ativos
+        return resource_name not in self.inactive_resources()
+
+    def is_effectively_active(self, resource_name: str, parent: Optional[str] = None) -> bool:
+        """Recurso ativo e, se houver, módulo pai também ativo"""
+        inactive = self.inactive_resources()
+        if parent and parent in inactive:
+            return False
+        return resource_name not in inactive
+
+    def invalidate(self):
+        """Descarta o estado neste processo e sinaliza os demais workers"""
+        self._inactive = None
+        try:
+            cache.incr(VERSION_CACHE_KEY)
+        except ValueError:
+            cache.set(VERSION_CACHE_KEY, 1, timeout=None)
+        except Exception as e:
+            logger.warning(f"Não foi possível atualizar a versão dos recursos: {e}")
+
+
+resource_gate = ResourceGate()
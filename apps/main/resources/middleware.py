@@ -1,8 +1,7 @@
 from django.shortcuts import render
 from django.http import HttpResponseNotFound
 import logging
-from functools import lru_cache
-from .models import SystemResource  # import fixo, não dentro da função
+from .gate import PrefixTable, resource_gate
 
 logger = logging.getLogger(__name__)
 
@@ -83,6 +82,9 @@ class ResourceAccessMiddleware:
             'payment_history': 'payment_module',
         }
 
+        # Busca por prefixo mais longo, pré-compilada uma vez por processo
+        self.path_table = PrefixTable(self.path_mapping)
+
     def __call__(self, request):
         logger.debug(f"Middleware: verificando caminho {request.path}")
 
@@ -95,14 +97,7 @@ class ResourceAccessMiddleware:
     def _check_resource_access(self, path: str) -> bool:
         """Verifica se o recurso solicitado está ativo"""
         try:
-            resource_name = self.path_mapping.get(path)
-
-            # se não achou, tenta por prefixo (mais caro, só se necessário)
-            if not resource_name:
-                for mapped_path, mapped_resource in self.path_mapping.items():
-                    if path.startswith(mapped_path):
-                        resource_name = mapped_resource
-                        break
+            resource_name = self.path_table.lookup(path)
 
             if resource_name:
                 return self._check_resource_hierarchy(resource_name)
@@ -113,16 +108,15 @@ class ResourceAccessMiddleware:
             logger.error(f"Erro em _check_resource_access: {e}")
             return True
 
-    @lru_cache(maxsize=256)
     def _check_resource_hierarchy(self, resource_name: str) -> bool:
-        """Verifica recurso e seu módulo pai com cache"""
+        """Verifica recurso e seu módulo pai no estado em memória (resource_gate)"""
         parent = self.hierarchy.get(resource_name)
 
-        if parent and not SystemResource.is_resource_active(parent):
-            logger.debug(f"Módulo pai '{parent}' inativo -> bloqueando '{resource_name}'")
+        if not resource_gate.is_effectively_active(resource_name, parent):
+            logger.debug(f"Recurso '{resource_name}' ou módulo pai '{parent}' inativo")
             return False
 
-        return SystemResource.is_resource_active(resource_name)
+        return True
 
     def _handle_inactive_resource(self, request):
         """Retorna resposta para recurso inativo"""
@@ -0,0 +1,11 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import SystemResource
+from .gate import resource_gate
+
+
+@receiver([post_save, post_delete], sender=SystemResource)
+def invalidate_resource_gate(sender, **kwargs):
+    transaction.on_commit(resource_gate.invalidate)
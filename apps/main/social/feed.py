@@ -0,0 +1,161 @@
+"""
+Motor do feed da rede social.
+
+O feed é paginado ANTES de qualquer anotação: apenas os posts da página
+atual recebem os dados do usuário (reação, denúncia pendente, ocultação),
+calculados em poucas consultas em lote em vez de várias por post.
+"""
+import base64
+import binascii
+
+from django.db.models import Prefetch, Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Post, Like, Follow, Report, ModerationAction, PostHashtag
+
+
+FEED_PAGE_SIZE = 10
+FEED_ORDERING = ('-created_at', '-id')
+HIDDEN_ACTION_TYPES = ('hide_content', 'delete_content')
+
+
+def can_moderate(user):
+    """Verifica se o usuário tem permissões de moderação no feed"""
+    if not user or not user.is_authenticated:
+        return False
+    return user.is_superuser or user.is_staff or user.has_perm('social.can_moderate_content')
+
+
+def _base_queryset():
+    return Post.objects.select_related('author').prefetch_related(
+        Prefetch('hashtags', queryset=PostHashtag.objects.select_related('hashtag'))
+    ).order_by(*FEED_ORDERING)
+
+
+def hidden_post_ids():
+    """Subconsulta com os posts ocultos/deletados por moderação ativa"""
+    return ModerationAction.objects.filter(
+        action_type__in=HIDDEN_ACTION_TYPES,
+        is_active=True,
+        target_post__isnull=False
+    ).values('target_post_id')
+
+
+def build_feed_queryset(user):
+    """
+    Posts de quem o usuário segue + posts públicos + posts próprios.
+    Moderadores também veem posts ocultos.
+    """
+    following_users = Follow.objects.filter(follower=user).values('following_id')
+    posts = _base_queryset().filter(
+        Q(author__in=following_users) | Q(is_public=True) | Q(author=user)
+    )
+    if not can_moderate(user):
+        # Usuários regulares não veem posts ocultos ou deletados
+        posts = posts.exclude(id__in=hidden_post_ids())
+    return posts
+
+
+def build_public_feed_queryset():
+    """Apenas posts públicos e não ocultos por moderação"""
+    return _base_queryset().filter(is_public=True).exclude(id__in=hidden_post_ids())
+
+
+def encode_cursor(post):
+    raw = f"{post.created_at.isoformat()}|{post.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """Retorna (created_at, id) ou None se o cursor for inválido"""
+    if not value:
+        return None
+    try:
+        padded = value + '=' * (-len(value) % 4)
+        created_at_raw, post_id = base64.urlsafe_b64decode(padded.encode()).decode().rsplit('|', 1)
+        created_at = parse_datetime(created_at_raw)
+        if created_at is None:
+            return None
+        return created_at, int(post_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+class FeedPage:
+    """Página obtida por keyset (cursor em created_at/id)"""
+
+    has_other_pages = False
+
+    def __init__(self, posts, next_cursor=None):
+        self.object_list = posts
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def get_feed_page(queryset, cursor=None, page_size=FEED_PAGE_SIZE):
+    """
+    Busca uma página do feed por keyset pagination. Custa uma única consulta
+    (mais os prefetches da página), independente do tamanho do histórico.
+    """
+    position = decode_cursor(cursor)
+    if position:
+        created_at, post_id = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=post_id)
+        )
+
+    posts = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(posts) > page_size:
+        posts = posts[:page_size]
+        next_cursor = encode_cursor(posts[-1])
+    return FeedPage(posts, next_cursor)
+
+
+def annotate_posts_for_viewer(posts, user):
+    """
+    Anota os posts da página com o estado do usuário atual:
+    is_liked_by_current_user, current_user_reaction, is_flagged e is_hidden.
+    Usa no máximo três consultas, independentemente do número de posts.
+    """
+    posts = list(posts)
+    for post in posts:
+        post.is_liked_by_current_user = False
+        post.current_user_reaction = None
+        post.is_flagged = False
+        post.is_hidden = False
+
+    if not posts or not user or not user.is_authenticated:
+        return posts
+
+    post_ids = [post.pk for post in posts]
+
+    reactions = dict(
+        Like.objects.filter(post_id__in=post_ids, user=user).values_list('post_id', 'reaction_type')
+    )
+    flagged = set(
+        Report.objects.filter(reported_post_id__in=post_ids, status='pending').values_list('reported_post_id', flat=True)
+    )
+    hidden = set(
+        ModerationAction.objects.filter(
+            target_post_id__in=post_ids,
+            action_type__in=HIDDEN_ACTION_TYPES,
+            is_active=True
+        ).values_list('target_post_id', flat=True)
+    )
+
+    for post in posts:
+        post.current_user_reaction = reactions.get(post.pk)
+        post.is_liked_by_current_user = post.pk in reactions
+        post.is_flagged = post.pk in flagged
+        post.is_hidden = post.pk in hidden
+    return posts
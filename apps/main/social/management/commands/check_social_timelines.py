@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.main.social.timeline import timeline_store
+
+
+class Command(BaseCommand):
+    help = 'Verifica a consistência das timelines materializadas com o banco'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--depth',
+            type=int,
+            default=50,
+            help='Quantidade de posts mais recentes comparados por usuário (padrão: 50)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Verifica no máximo N usuários (os mais recentemente ativos)',
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Reconstrói as timelines divergentes',
+        )
+
+    def handle(self, *args, **options):
+        if not timeline_store.enabled:
+            raise CommandError(
+                'Timelines desativadas: defina SOCIAL_TIMELINE_ENABLED=True e use o cache django-redis.'
+            )
+
+        User = get_user_model()
+        users = User.objects.filter(is_active=True).order_by('-last_login').only('id', 'username')
+        if options['limit']:
+            users = users[:options['limit']]
+
+        checked = divergent = fixed = 0
+        for user in users.iterator():
+            checked += 1
+            missing, stale = timeline_store.check_user(user, depth=options['depth'])
+            if not missing and not stale:
+                continue
+
+            divergent += 1
+            self.stdout.write(
+                self.style.WARNING(
+                    f'⚠️  {user.username}: {len(missing)} posts faltando, {len(stale)} sobrando'
+                )
+            )
+            if options['fix']:
+                timeline_store.rebuild_user(user)
+                fixed += 1
+
+        self.stdout.write(f'\n📊 Usuários verificados: {checked}')
+        self.stdout.write(f'📊 Timelines divergentes: {divergent}')
+        if options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'✅ Timelines reconstruídas: {fixed}'))
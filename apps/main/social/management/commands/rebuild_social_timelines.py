@@ -0,0 +1,51 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.main.social.timeline import timeline_store
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói as timelines materializadas da rede social (Redis) a partir do banco'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='usernames',
+            help='Reconstrói apenas a timeline deste usuário (pode repetir)',
+        )
+        parser.add_argument(
+            '--skip-shared',
+            action='store_true',
+            help='Não reconstrói os sets por autor, público e de autores populares',
+        )
+
+    def handle(self, *args, **options):
+        if not timeline_store.enabled:
+            raise CommandError(
+                'Timelines desativadas: defina SOCIAL_TIMELINE_ENABLED=True e use o cache django-redis.'
+            )
+
+        start = time.time()
+        User = get_user_model()
+
+        if not options['skip_shared'] and not options['usernames']:
+            self.stdout.write('🔄 Reconstruindo sets por autor, público e autores populares...')
+            timeline_store.rebuild_shared()
+
+        users = User.objects.filter(is_active=True)
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        total = 0
+        for user in users.only('id').iterator():
+            timeline_store.rebuild_user(user)
+            total += 1
+            if total % 500 == 0:
+                self.stdout.write(f'   {total} timelines reconstruídas...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ {total} timelines reconstruídas em {time.time() - start:.1f}s')
+        )
@@ -1,11 +1,16 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 from django.contrib import messages
 from django.utils.translation import gettext as _
-from .models import Post, Comment, ContentFilter, Report, ModerationLog, ReportFilterFlag
+from .models import Post, Comment, Follow, ContentFilter, Report, ModerationLog, ReportFilterFlag
+from .timeline import timeline_store
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 
 @receiver(post_save, sender=Post)
 def apply_content_filters_to_post(sender, instance, created, **kwargs):
@@ -393,4 +398,54 @@ def _extract_matched_pattern(content, content_filter):
         
     except Exception as e:
         print(f"Erro ao extrair padrão: {e}")
-        return content[:50] + '...' if len(content) > 50 else content
\ No newline at end of file
+        return content[:50] + '...' if len(content) > 50 else content
+
+
+# ============================================================================
+# TIMELINES MATERIALIZADAS
+# ============================================================================
+
+def _update_timeline(action, *args):
+    """Executa uma operação da timeline sem afetar a requisição em caso de falha"""
+    try:
+        action(*args)
+    except Exception as e:
+        logger.warning(f"Falha ao atualizar timeline social: {e}")
+
+
+@receiver(post_save, sender=Post)
+def update_timelines_on_post_save(sender, instance, created, **kwargs):
+    """Fan-out de posts novos e atualização da visibilidade de posts editados"""
+    if not timeline_store.enabled:
+        return
+
+    if created:
+        from .tasks import fanout_post_to_timelines
+        post_id = instance.pk
+        transaction.on_commit(lambda: _update_timeline(fanout_post_to_timelines.delay, post_id))
+    else:
+        transaction.on_commit(lambda: _update_timeline(timeline_store.update_post_visibility, instance))
+
+
+@receiver(post_delete, sender=Post)
+def update_timelines_on_post_delete(sender, instance, **kwargs):
+    if not timeline_store.enabled:
+        return
+    post_id, author_id = instance.pk, instance.author_id
+    transaction.on_commit(lambda: _update_timeline(timeline_store.remove_post, post_id, author_id))
+
+
+@receiver(post_save, sender=Follow)
+def update_timelines_on_follow(sender, instance, created, **kwargs):
+    if not created or not timeline_store.enabled:
+        return
+    follower_id, following_id = instance.follower_id, instance.following_id
+    transaction.on_commit(lambda: _update_timeline(timeline_store.follow, follower_id, following_id))
+
+
+@receiver(post_delete, sender=Follow)
+def update_timelines_on_unfollow(sender, instance, **kwargs):
+    if not timeline_store.enabled:
+        return
+    follower_id, following_id = instance.follower_id, instance.following_id
+    transaction.on_commit(lambda: _update_timeline(timeline_store.unfollow, follower_id, following_id))
@@ -0,0 +1,26 @@
+import logging
+
+from celery import shared_task
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def fanout_post_to_timelines(post_id):
+    """Distribui um post recém-criado para as timelines materializadas"""
+    from .models import Post
+    from .timeline import timeline_store
+
+    if not timeline_store.enabled:
+        return
+
+    post = Post.objects.filter(pk=post_id).only('id', 'author_id', 'is_public', 'created_at').first()
+    if not post:
+        return
+
+    try:
+        timeline_store.fanout_post(post)
+    except Exception as e:
+        logger.error(f"Erro no fan-out do post {post_id}: {str(e)}")
+        raise
@@ -0,0 +1,301 @@
+"""
+Timelines materializadas da rede social (opcional).
+
+Quando SOCIAL_TIMELINE_ENABLED=True e o cache padrão é o django-redis, cada
+usuário ganha um sorted set no Redis com os ids dos posts do seu feed
+(score = timestamp de criação). Os posts entram por fan-out-on-write a
+partir dos sinais de Post/Follow; autores com muitos seguidores
+(SOCIAL_TIMELINE_FANOUT_LIMIT) não fazem fan-out e são lidos sob demanda
+(fan-out-on-read) a partir do sorted set do próprio autor. Posts públicos
+ficam em um sorted set global.
+
+A leitura apenas propõe ids candidatos: visibilidade e ocultação por
+moderação continuam sendo aplicadas pelo banco em uma única consulta por pk.
+Sem Redis disponível o feed volta ao caminho tradicional (feed.py).
+"""
+import logging
+
+from django.conf import settings
+
+from .feed import FeedPage, FEED_PAGE_SIZE, build_feed_queryset, decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'social:timeline'
+PUBLIC_KEY = f'{KEY_PREFIX}:public'
+POPULAR_AUTHORS_KEY = f'{KEY_PREFIX}:popular'
+
+
+def user_key(user_id):
+    return f'{KEY_PREFIX}:user:{user_id}'
+
+
+def author_key(author_id):
+    return f'{KEY_PREFIX}:author:{author_id}'
+
+
+def post_score(post):
+    return post.created_at.timestamp()
+
+
+class TimelineStore:
+    """Operações sobre os sorted sets das timelines"""
+
+    def __init__(self):
+        self.max_length = getattr(settings, 'SOCIAL_TIMELINE_MAX_LENGTH', 800)
+        self.fanout_limit = getattr(settings, 'SOCIAL_TIMELINE_FANOUT_LIMIT', 1000)
+        self._redis = None
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'SOCIAL_TIMELINE_ENABLED', False) and self.redis is not None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            try:
+                from django_redis import get_redis_connection
+                self._redis = get_redis_connection('default')
+            except Exception:
+                # Cache padrão não é django-redis (ex.: LocMemCache em DEBUG)
+                return None
+        return self._redis
+
+    # ------------------------------------------------------------------ escrita
+
+    def _add(self, pipe, key, entries):
+        if not entries:
+            return
+        pipe.zadd(key, entries)
+        # Mantém apenas os N posts mais recentes
+        pipe.zremrangebyrank(key, 0, -(self.max_length + 1))
+
+    def is_popular(self, author_id, followers_count=None):
+        if followers_count is None:
+            from .models import Follow
+            followers_count = Follow.objects.filter(following_id=author_id).count()
+        return followers_count >= self.fanout_limit
+
+    def fanout_post(self, post):
+        """Distribui um post novo para as timelines (fan-out-on-write)"""
+        from .models import Follow
+
+        entry = {str(post.pk): post_score(post)}
+        follower_ids = list(
+            Follow.objects.filter(following_id=post.author_id).values_list('follower_id', flat=True)
+        )
+        popular = self.is_popular(post.author_id, len(follower_ids))
+
+        pipe = self.redis.pipeline(transaction=False)
+        self._add(pipe, author_key(post.author_id), entry)
+        self._add(pipe, user_key(post.author_id), entry)
+        if post.is_public:
+            self._add(pipe, PUBLIC_KEY, entry)
+
+        if popular:
+            # Seguidores buscam os posts deste autor na leitura
+            pipe.sadd(POPULAR_AUTHORS_KEY, post.author_id)
+        else:
+            pipe.srem(POPULAR_AUTHORS_KEY, post.author_id)
+            for follower_id in follower_ids:
+                self._add(pipe, user_key(follower_id), entry)
+        pipe.execute()
+
+    def update_post_visibility(self, post):
+        if post.is_public:
+            self.redis.zadd(PUBLIC_KEY, {str(post.pk): post_score(post)})
+        else:
+            self.redis.zrem(PUBLIC_KEY, str(post.pk))
+
+    def remove_post(self, post_id, author_id):
+        """
+        Remove o post dos sets do autor e global. Nas timelines dos seguidores
+        o id é descartado na leitura (o banco não o retorna mais) e o
+        verificador de consistência limpa as sobras.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zrem(author_key(author_id), str(post_id))
+        pipe.zrem(user_key(author_id), str(post_id))
+        pipe.zrem(PUBLIC_KEY, str(post_id))
+        pipe.execute()
+
+    def follow(self, follower_id, following_id):
+        """Copia os posts recentes do autor para a timeline do novo seguidor"""
+        if self.redis.sismember(POPULAR_AUTHORS_KEY, following_id):
+            return
+        entries = self.redis.zrevrange(author_key(following_id), 0, self.max_length - 1, withscores=True)
+        if entries:
+            pipe = self.redis.pipeline(transaction=False)
+            self._add(pipe, user_key(follower_id), {member: score for member, score in entries})
+            pipe.execute()
+
+    def unfollow(self, follower_id, following_id):
+        members = self.redis.zrange(author_key(following_id), 0, -1)
+        if members:
+            self.redis.zrem(user_key(follower_id), *members)
+
+    def expected_user_entries(self, user, limit=None):
+        """Entradas (post_id -> score) que a timeline do usuário deveria ter"""
+        from .models import Post, Follow
+
+        following_ids = list(Follow.objects.filter(follower=user).values_list('following_id', flat=True))
+        popular = {int(author_id) for author_id in self.redis.smembers(POPULAR_AUTHORS_KEY)}
+        author_ids = [author_id for author_id in following_ids if author_id not in popular] + [user.pk]
+
+        posts = Post.objects.filter(author_id__in=author_ids).order_by('-created_at', '-id').values_list(
+            'id', 'created_at'
+        )[:limit or self.max_length]
+        return {str(post_id): created_at.timestamp() for post_id, created_at in posts}
+
+    def rebuild_user(self, user):
+        """Reconstrói a timeline de um usuário a partir do banco"""
+        entries = self.expected_user_entries(user)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(user_key(user.pk))
+        self._add(pipe, user_key(user.pk), entries)
+        pipe.execute()
+
+    def check_user(self, user, depth=50):
+        """
+        Compara os `depth` posts mais recentes da timeline com o banco.
+        Retorna (ids faltando no Redis, ids sobrando no Redis).
+        """
+        expected_entries = self.expected_user_entries(user, limit=depth)
+        expected = set(expected_entries)
+        stored_entries = {
+            (member.decode() if isinstance(member, bytes) else str(member)): score
+            for member, score in self.redis.zrevrange(user_key(user.pk), 0, depth - 1, withscores=True)
+        }
+        stored = set(stored_entries)
+
+        # Com a timeline cheia, só conta como sobra o que é mais novo que o
+        # último post esperado (o resto apenas ficou fora da janela comparada)
+        oldest_expected = min(expected_entries.values()) if len(expected) >= depth else float('-inf')
+        stale = {member for member in stored - expected if stored_entries[member] >= oldest_expected}
+        return expected - stored, stale
+
+    def rebuild_shared(self):
+        """Reconstrói os sets por autor, o set público e o conjunto de autores populares"""
+        from django.db.models import Count
+        from .models import Post, Follow
+
+        popular_ids = list(
+            Follow.objects.values('following_id').annotate(total=Count('id')).filter(
+                total__gte=self.fanout_limit
+            ).values_list('following_id', flat=True)
+        )
+
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(PUBLIC_KEY, POPULAR_AUTHORS_KEY)
+        if popular_ids:
+            pipe.sadd(POPULAR_AUTHORS_KEY, *popular_ids)
+        public_posts = Post.objects.filter(is_public=True).order_by('-created_at', '-id').values_list(
+            'id', 'created_at'
+        )[:self.max_length]
+        self._add(pipe, PUBLIC_KEY, {str(post_id): created_at.timestamp() for post_id, created_at in public_posts})
+        pipe.execute()
+
+        author_ids = Post.objects.order_by().values_list('author_id', flat=True).distinct()
+        for author_id in author_ids.iterator():
+            posts = Post.objects.filter(author_id=author_id).order_by('-created_at', '-id').values_list(
+                'id', 'created_at'
+            )[:self.max_length]
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.delete(author_key(author_id))
+            self._add(pipe, author_key(author_id), {str(post_id): created_at.timestamp() for post_id, created_at in posts})
+            pipe.execute()
+
+    # ------------------------------------------------------------------ leitura
+
+    def _source_keys(self, user):
+        from .models import Follow
+
+        keys = [user_key(user.pk), PUBLIC_KEY]
+        popular = {int(author_id) for author_id in self.redis.smembers(POPULAR_AUTHORS_KEY)}
+        if popular:
+            followed_popular = Follow.objects.filter(
+                follower=user, following_id__in=popular
+            ).values_list('following_id', flat=True)
+            keys.extend(author_key(author_id) for author_id in followed_popular)
+        return keys
+
+    def candidate_ids(self, user, cursor=None, limit=FEED_PAGE_SIZE):
+        """
+        Retorna até `limit` pares (score, post_id) mais recentes que o cursor,
+        mesclando a timeline do usuário, o set público e os autores populares.
+        """
+        position = decode_cursor(cursor)
+        max_score = '+inf'
+        if position:
+            cursor_score, cursor_id = position[0].timestamp(), position[1]
+            max_score = cursor_score
+
+        pipe = self.redis.pipeline(transaction=False)
+        for key in self._source_keys(user):
+            # Busca alguns extras para cobrir empates de score no limite do cursor
+            pipe.zrevrangebyscore(key, max_score, '-inf', start=0, num=limit * 2, withscores=True)
+
+        merged = {}
+        for entries in pipe.execute():
+            for member, score in entries:
+                post_id = int(member)
+                if position and (score, post_id) >= (cursor_score, cursor_id):
+                    continue
+                merged[post_id] = score
+
+        ordered = sorted(merged.items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return [(score, post_id) for post_id, score in ordered[:limit]]
+
+    def get_page(self, user, cursor=None, page_size=FEED_PAGE_SIZE, max_rounds=3):
+        """
+        Página do feed lida da timeline. Os candidatos passam pelo mesmo filtro
+        de visibilidade do feed tradicional; ids descartados (deletados,
+        ocultos) fazem a leitura avançar até completar a página.
+        """
+        posts = []
+        next_cursor = None
+        for _ in range(max_rounds):
+            candidates = self.candidate_ids(user, cursor=cursor, limit=page_size + 1)
+            ids = [post_id for _, post_id in candidates]
+            found = build_feed_queryset(user).in_bulk(ids) if ids else {}
+            posts.extend(found[post_id] for post_id in ids if post_id in found)
+            if len(candidates) <= page_size:
+                # Fim da timeline
+                next_cursor = None
+                break
+            cursor = encode_cursor(found.get(ids[-1]) or _CursorPosition(candidates[-1]))
+            next_cursor = cursor
+            if len(posts) > page_size:
+                break
+
+        if len(posts) > page_size:
+            posts = posts[:page_size]
+            next_cursor = encode_cursor(posts[-1])
+        return FeedPage(posts, next_cursor)
+
+
+class _CursorPosition:
+    """Posição de cursor para um id que não existe mais no banco"""
+
+    def __init__(self, candidate):
+        from datetime import datetime, timezone as dt_timezone
+
+        score, self.pk = candidate
+        self.created_at = datetime.fromtimestamp(score, tz=dt_timezone.utc)
+
+
+timeline_store = TimelineStore()
+
+
+def get_timeline_page(user, cursor=None, page_size=FEED_PAGE_SIZE):
+    """
+    Retorna a página do feed a partir da timeline materializada, ou None
+    quando o recurso está desativado/indisponível (o chamador usa o banco).
+    """
+    if not timeline_store.enabled:
+        return None
+    try:
+        return timeline_store.get_page(user, cursor=cursor, page_size=page_size)
+    except Exception as e:
+        logger.warning(f"Falha ao ler timeline do usuário {user.pk}: {e}")
+        return None
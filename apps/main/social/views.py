@@ -17,6 +17,11 @@ from datetime import datetime, timedelta
 import re
 
 from .models import Post, Comment, Like, Follow, UserProfile, Share, Hashtag, PostHashtag, CommentLike, Report, ModerationAction, ContentFilter, ModerationLog, VerificationRequest
+from .feed import (
+    FEED_PAGE_SIZE, build_feed_queryset, build_public_feed_queryset,
+    get_feed_page, annotate_posts_for_viewer
+)
+from .timeline import get_timeline_page
 from .forms import PostForm, CommentForm, UserProfileForm, SearchForm, ShareForm, ReactionForm, HashtagForm, ReportForm, SearchReportForm, BulkModerationForm, ModerationActionForm, ContentFilterForm
 
 User = get_user_model()
@@ -25,57 +30,24 @@ User = get_user_model()
 @login_required
 def feed(request):
     """Feed principal da rede social"""
-    # Buscar posts de usuários que o usuário segue + posts públicos + posts próprios
-    following_users = request.user.following.values_list('following_id', flat=True)
-    
-    # Filtrar posts baseado em permissões de moderação
-    if request.user.is_superuser or request.user.is_staff or request.user.has_perm('social.can_moderate_content'):
-        # Moderadores veem todos os posts, incluindo os ocultos
-        posts = Post.objects.filter(
-            Q(author__in=following_users) | Q(is_public=True) | Q(author=request.user)
-        ).select_related('author').prefetch_related(
-            'likes', 'comments', 'hashtags', 'reports'
-        ).order_by('-created_at')
-    else:
-        # Usuários regulares não veem posts ocultos ou deletados
-        hidden_posts = ModerationAction.objects.filter(
-            action_type__in=['hide_content', 'delete_content'],
-            is_active=True,
-            target_post__isnull=False
-        ).values_list('target_post_id', flat=True)
-        
-        posts = Post.objects.filter(
-            Q(author__in=following_users) | Q(is_public=True) | Q(author=request.user)
-        ).exclude(
-            id__in=hidden_posts
-        ).select_related('author').prefetch_related(
-            'likes', 'comments', 'hashtags', 'reports'
-        ).order_by('-created_at')
+    # Posts de usuários que o usuário segue + posts públicos + posts próprios
+    # (moderadores também veem posts ocultos)
+    posts = build_feed_queryset(request.user)
     
-    # Anotar posts com informação se o usuário atual deu like e status de moderação
-    for post in posts:
-        post.is_liked_by_current_user = post.is_liked_by(request.user)
-        
-        # Obter a reação atual do usuário
-        try:
-            user_like = post.likes.get(user=request.user)
-            post.current_user_reaction = user_like.reaction_type
-        except Like.DoesNotExist:
-            post.current_user_reaction = None
-            
-        # Verificar se o post foi denunciado
-        post.is_flagged = post.reports.filter(status='pending').exists()
-        # Verificar se o post está oculto por moderação
-        post.is_hidden = ModerationAction.objects.filter(
-            target_post=post,
-            action_type__in=['hide_content', 'delete_content'],
-            is_active=True
-        ).exists()
-    
-    # Paginação
-    paginator = Paginator(posts, 10)
+    # Paginação primeiro: ?cursor= usa keyset, ?page= mantém a paginação numerada.
+    # Com timelines materializadas ativas, a página por cursor vem do Redis.
+    cursor = request.GET.get('cursor')
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = None if page_number else get_timeline_page(request.user, cursor=cursor, page_size=FEED_PAGE_SIZE)
+    if page_obj is None:
+        if cursor:
+            page_obj = get_feed_page(posts, cursor=cursor, page_size=FEED_PAGE_SIZE)
+        else:
+            paginator = Paginator(posts, FEED_PAGE_SIZE)
+            page_obj = paginator.get_page(page_number)
+    
+    # Anotar apenas os posts da página com like/reação e status de moderação
+    page_obj.object_list = annotate_posts_for_viewer(page_obj.object_list, request.user)
     
     # Buscar perfil do usuário
     profile, created = UserProfile.objects.get_or_create(user=request.user)
@@ -163,6 +135,7 @@ def feed(request):
     
     context = {
         'page_obj': page_obj,
+        'next_cursor': getattr(page_obj, 'next_cursor', None),
         'form': form,
         'profile': profile,
         'user_stats': user_stats,
@@ -2608,18 +2581,10 @@ def verification_admin_bulk_action_view(request):
 def public_feed(request):
     """Feed público da rede social - mostra apenas os últimos 10 posts públicos"""
     # Buscar apenas posts públicos, sem necessidade de autenticação
-    posts = Post.objects.filter(
-        is_public=True
-    ).select_related('author').prefetch_related(
-        'likes', 'comments', 'hashtags'
-    ).order_by('-created_at')[:10]  # Apenas os últimos 10 posts
+    page = get_feed_page(build_public_feed_queryset(), page_size=FEED_PAGE_SIZE)  # Apenas os últimos 10 posts
     
     # Anotar posts com informações básicas (sem informações do usuário logado)
-    for post in posts:
-        post.is_liked_by_current_user = False  # Usuário não logado
-        post.current_user_reaction = None  # Sem reação
-        post.is_flagged = False  # Não mostrar informações de moderação
-        post.is_hidden = False  # Não mostrar informações de moderação
+    posts = annotate_posts_for_viewer(page.object_list, None)
     
     # Hashtags populares (para sidebar se necessário)
     popular_hashtags = Hashtag.objects.filter(posts_count__gt=0).order_by('-posts_count')[:5]
@@ -0,0 +1,193 @@
+"""
+Snapshot das configurações singleton do site.
+
+Tema ativo (e a lista de arquivos dele), background, variáveis de tema,
+ApiEndpointToggle e IndexConfig são carregados juntos em um objeto imutável
+por processo. As páginas leem desse objeto sem consultar o banco; os sinais
+de post_save/post_delete dos modelos incrementam uma versão compartilhada no
+cache (Redis) e cada worker recarrega o snapshot quando percebe a mudança.
+"""
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.text import slugify
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = 'config_snapshot:version'
+THEME_LANGUAGES = ('pt', 'en', 'es')
+EMPTY = MappingProxyType({})
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    version: Any = None
+    theme_slug: Optional[str] = None
+    theme_files: Mapping[str, str] = field(default_factory=lambda: EMPTY)
+    background_url: Optional[str] = None
+    # {idioma: {nome: valor convertido}}
+    theme_variables: Mapping[str, Mapping[str, Any]] = field(default_factory=lambda: EMPTY)
+    # None quando não existe registro de ApiEndpointToggle
+    endpoint_toggles: Optional[Mapping[str, Any]] = None
+    index_config: Any = None
+    # {idioma: IndexConfigTranslation}
+    index_translations: Mapping[str, Any] = field(default_factory=lambda: EMPTY)
+    loaded_at: float = field(default_factory=time.time)
+
+    def endpoint_enabled(self, endpoint_field: str) -> bool:
+        if self.endpoint_toggles is None:
+            return False
+        return bool(self.endpoint_toggles.get(endpoint_field, False))
+
+    def theme_variables_for(self, lang_code: str) -> Mapping[str, Any]:
+        # Idiomas sem coluna própria caem no valor em português
+        return self.theme_variables.get(lang_code) or self.theme_variables.get('pt', EMPTY)
+
+    def index_translation(self, lang_code: str):
+        return self.index_translations.get(lang_code)
+
+
+def _load_theme():
+    from apps.main.administrator.models import Theme
+
+    theme = Theme.objects.filter(ativo=True).only('slug').first()
+    if not theme:
+        return None, EMPTY
+
+    safe_slug = slugify(theme.slug)
+    theme_path = os.path.join(settings.BASE_DIR, 'themes', 'installed', safe_slug)
+    theme_files = {}
+    if os.path.isdir(theme_path):
+        theme_files = {
+            f: os.path.join('installed', safe_slug, f)
+            for f in os.listdir(theme_path)
+            if os.path.isfile(os.path.join(theme_path, f))
+        }
+    return safe_slug, MappingProxyType(theme_files)
+
+
+def _load_background():
+    from apps.main.administrator.models import BackgroundSetting
+
+    bg = BackgroundSetting.get_active()
+    return bg.image.url if bg and bg.image else None
+
+
+def _load_theme_variables():
+    from apps.main.administrator.models import ThemeVariable
+
+    variables = list(ThemeVariable.objects.all())
+    return MappingProxyType({
+        lang: MappingProxyType({var.nome: var.get_valor_convertido(lang) for var in variables})
+        for lang in THEME_LANGUAGES
+    })
+
+
+def _load_endpoint_toggles():
+    from apps.lineage.server.models import ApiEndpointToggle
+
+    toggle = ApiEndpointToggle.objects.first()
+    if not toggle:
+        return None
+    return MappingProxyType({
+        f.attname: getattr(toggle, f.attname) for f in toggle._meta.concrete_fields
+    })
+
+
+def _load_index_config():
+    from apps.lineage.server.models import IndexConfig
+
+    config = IndexConfig.objects.first()
+    translations = {}
+    if config:
+        for translation in config.translations.all():
+            translations.setdefault(translation.language, translation)
+    return config, MappingProxyType(translations)
+
+
+def build_snapshot(version=None) -> ConfigSnapshot:
+    theme_slug, theme_files = _load_theme()
+    index_config, index_translations = _load_index_config()
+    return ConfigSnapshot(
+        version=version,
+        theme_slug=theme_slug,
+        theme_files=theme_files,
+        background_url=_load_background(),
+        theme_variables=_load_theme_variables(),
+        endpoint_toggles=_load_endpoint_toggles(),
+        index_config=index_config,
+        index_translations=index_translations,
+    )
+
+
+class ConfigSnapshotService:
+    """
+    Mantém o snapshot do processo. A versão compartilhada é consultada no
+    máximo a cada CONFIG_SNAPSHOT_CHECK_INTERVAL segundos; no processo que
+    salvou a alteração a troca é imediata.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._checked_at = 0.0
+
+    @property
+    def check_interval(self) -> float:
+        return getattr(settings, 'CONFIG_SNAPSHOT_CHECK_INTERVAL', 2)
+
+    def _shared_version(self):
+        try:
+            return cache.get(VERSION_CACHE_KEY, 0)
+        except Exception:
+            return self._snapshot.version if self._snapshot else 0
+
+    def get(self) -> ConfigSnapshot:
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < self.check_interval:
+            return snapshot
+
+        version = self._shared_version()
+        self._checked_at = now
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = build_snapshot(version)
+            return self._snapshot
+
+    def invalidate(self):
+        """Descarta o snapshot neste processo e sinaliza os demais workers"""
+        self._snapshot = None
+        try:
+            cache.incr(VERSION_CACHE_KEY)
+        except ValueError:
+            cache.set(VERSION_CACHE_KEY, 1, timeout=None)
+        except Exception as e:
+            logger.warning(f"Não foi possível atualizar a versão do snapshot de configuração: {e}")
+
+
+config_snapshot = ConfigSnapshotService()
+
+
+def get_config_snapshot() -> ConfigSnapshot:
+    return config_snapshot.get()
+
+
+def invalidate_config_snapshot(*args, **kwargs):
+    """
+    Receiver de post_save/post_delete dos modelos de configuração. Só
+    invalida após o commit, senão outro worker poderia recarregar os dados
+    antigos já com a versão nova.
+    """
+    transaction.on_commit(config_snapshot.invalidate)
@@ -1,9 +1,9 @@
 from django.conf import settings
-import os
-from django.utils.text import slugify
 from django.templatetags.static import static
 from django.utils.translation import get_language
 
+from core.config_snapshot import get_config_snapshot
+
 
 def project_metadata(request):
     return {
@@ -26,42 +26,21 @@ def project_metadata(request):
 
 
 def active_theme(request):
-    from apps.main.administrator.models import Theme
-
-    theme = Theme.objects.filter(ativo=True).first()
-    base_template = "layouts/base-default.html"
-    theme_files = {}
-
-    if theme:
-        safe_slug = slugify(theme.slug)
-        theme_path = os.path.join(settings.BASE_DIR, 'themes', 'installed', safe_slug)
+    snapshot = get_config_snapshot()
+    safe_slug = snapshot.theme_slug
+    base_template = f"installed/{safe_slug}/base.html" if safe_slug else "layouts/base-default.html"
 
-        if os.path.isdir(theme_path):
-            theme_files = {
-                f: os.path.join('installed', safe_slug, f)
-                for f in os.listdir(theme_path)
-                if os.path.isfile(os.path.join(theme_path, f))
-            }
-
-        base_template = f"installed/{safe_slug}/base.html"
-    
     return {
-        'active_theme': safe_slug if theme else None,
+        'active_theme': safe_slug,
         'base_template': base_template,
-        'theme_slug': safe_slug if theme else None,
-        'path_theme': f'/themes/installed/{safe_slug}' if theme else None,
-        'theme_files': theme_files,
+        'theme_slug': safe_slug,
+        'path_theme': f'/themes/installed/{safe_slug}' if safe_slug else None,
+        'theme_files': dict(snapshot.theme_files),
     }
 
 
 def background_setting(request):
-    from apps.main.administrator.models import BackgroundSetting
-
-    bg = BackgroundSetting.get_active()
-    if bg and bg.image:
-        bg_url = bg.image.url
-    else:
-        bg_url = static('assets/img/l2/bgs/bg.png')  # Caminho padrão
+    bg_url = get_config_snapshot().background_url or static('assets/img/l2/bgs/bg.png')  # Caminho padrão
 
     return {
         'background_url': bg_url
@@ -69,13 +48,9 @@ def background_setting(request):
 
 
 def theme_variables(request):
-    from apps.main.administrator.models import ThemeVariable
-
     lang_code = get_language()[:2]  # exemplo: 'pt', 'en', 'es'
 
-    variables = ThemeVariable.objects.all()
-    context = {var.nome: var.get_valor_convertido(lang_code) for var in variables}
-    return context
+    return dict(get_config_snapshot().theme_variables_for(lang_code))
 
 
 def slogan_flag(request):
@@ -1,8 +1,26 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
+from functools import partial
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
+# {classe do modelo: attnames dos FileField/ImageField}
+_file_fields_by_model = {}
+
+
+def delete_media_files(files):
+    """Remove do storage os arquivos [(storage, nome)] que foram substituídos"""
+    for storage, name in files:
+        try:
+            if storage.exists(name):
+                storage.delete(name)
+        except Exception as e:
+            # Falha na remoção não deve quebrar o fluxo principal
+            logger.warning(f"Não foi possível remover o arquivo de mídia {name}: {e}")
+
 
 class BaseModel(models.Model):
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
@@ -26,46 +44,87 @@ class BaseModel(models.Model):
         editable=False
     )
 
-    def delete_old_media_files(self):
-        """Remove arquivos de mídia antigos antes de salvar novos"""
-        from django.core.files.storage import default_storage
-        
-        try:
-            # Se já existe no banco (é uma edição), verificar arquivos antigos
-            if self.pk:
-                # Obter a classe atual para fazer a query
-                model_class = self.__class__
-                old_instance = model_class.objects.get(pk=self.pk)
-                
-                # Percorrer todos os campos do modelo
-                for field in self._meta.fields:
-                    # Verificar se é um campo de arquivo (ImageField ou FileField)
-                    if isinstance(field, (models.ImageField, models.FileField)):
-                        field_name = field.name
-                        old_file = getattr(old_instance, field_name, None)
-                        new_file = getattr(self, field_name, None)
-                        
-                        # Se o arquivo antigo existe e é diferente do novo
-                        if old_file and (not new_file or old_file.name != new_file.name):
-                            try:
-                                # Verificar se o arquivo existe no storage antes de tentar deletar
-                                if default_storage.exists(old_file.name):
-                                    default_storage.delete(old_file.name)
-                            except Exception:
-                                # Ignorar erros de remoção para não quebrar o fluxo principal
-                                pass
-        except Exception:
-            # Ignorar erros gerais para não quebrar o sistema
-            pass
+    @classmethod
+    def _file_field_names(cls):
+        """Nomes dos campos de arquivo do modelo, calculados uma vez por classe"""
+        names = _file_fields_by_model.get(cls)
+        if names is None:
+            # ImageField é subclasse de FileField
+            names = _file_fields_by_model[cls] = tuple(
+                field.attname for field in cls._meta.concrete_fields
+                if isinstance(field, models.FileField)
+            )
+        return names
+
+    def _current_file_names(self, names):
+        # Lê direto do __dict__: campos adiados não carregados ficam de fora
+        # em vez de disparar uma consulta
+        current = {}
+        for name in names:
+            if name in self.__dict__:
+                value = self.__dict__[name]
+                current[name] = getattr(value, 'name', value) or None
+        return current
+
+    def _snapshot_media_files(self, names=None):
+        """Guarda os nomes dos arquivos como estão no banco"""
+        file_fields = self._file_field_names()
+        if not file_fields:
+            return
+        if names is not None:
+            file_fields = [name for name in file_fields if name in names]
+        snapshot = self.__dict__.setdefault('_original_file_names', {})
+        snapshot.update(self._current_file_names(file_fields))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_media_files()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot_media_files(fields)
 
     def save(self, *args, **kwargs):
-        """Override save para remover arquivos antigos automaticamente"""
-        # Remover arquivos antigos antes de salvar
-        self.delete_old_media_files()
-        
-        # Chamar o save original
+        """
+        Remove os arquivos de mídia substituídos. Os nomes originais vêm do
+        snapshot feito ao carregar do banco, então o save não faz SELECT
+        extra; modelos sem campos de arquivo e saves com update_fields que
+        não incluem esses campos não fazem nada além do save normal.
+        """
         super().save(*args, **kwargs)
 
+        file_fields = self._file_field_names()
+        if not file_fields:
+            return
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = {self._meta.get_field(name).attname for name in update_fields}
+            file_fields = [name for name in file_fields if name in update_fields]
+            if not file_fields:
+                return
+
+        # Compara depois do save: o pre_save do FileField já gravou o arquivo
+        # novo e definiu o nome final no storage
+        original = self.__dict__.get('_original_file_names') or {}
+        current = self._current_file_names(file_fields)
+        replaced = [
+            (self._meta.get_field(name).storage, original[name])
+            for name, new_name in current.items()
+            if original.get(name) and original[name] != new_name
+        ]
+        self._snapshot_media_files(file_fields)
+
+        if replaced:
+            # Só apaga depois do commit: em rollback o banco volta a apontar
+            # para o arquivo antigo
+            transaction.on_commit(
+                partial(delete_media_files, replaced),
+                using=self._state.db,
+            )
+
     class Meta:
         abstract = True
 
@@ -210,6 +210,7 @@ MIDDLEWARE = [
     
     # Request timeout monitoring - deve vir cedo para monitorar tudo
     "middlewares.request_timeout_middleware.RequestTimeoutMiddleware",
+    "middlewares.api_metrics_middleware.APIMetricsMiddleware",
 
     'allauth.account.middleware.AccountMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -376,6 +377,15 @@ SOCIAL_LOGIN_DISCORD_ENABLED = str2bool(os.environ.get('SOCIAL_LOGIN_DISCORD_ENA
 # Show social login section in templates
 SOCIAL_LOGIN_SHOW_SECTION = str2bool(os.environ.get('SOCIAL_LOGIN_SHOW_SECTION', False))
 
+# =========================== SOCIAL TIMELINE CONFIGS ===========================
+
+# Timelines materializadas no Redis (fan-out-on-write); requer o cache django-redis
+SOCIAL_TIMELINE_ENABLED = str2bool(os.environ.get('SOCIAL_TIMELINE_ENABLED', False))
+# Autores com pelo menos este número de seguidores são lidos sob demanda (fan-out-on-read)
+SOCIAL_TIMELINE_FANOUT_LIMIT = int(os.environ.get('SOCIAL_TIMELINE_FANOUT_LIMIT', 1000))
+# Quantidade máxima de posts mantidos por timeline
+SOCIAL_TIMELINE_MAX_LENGTH = int(os.environ.get('SOCIAL_TIMELINE_MAX_LENGTH', 800))
+
 # =========================== INTERNATIONALIZATION CONFIGS ===========================
 
 LANGUAGE_CODE = os.getenv("CONFIG_LANGUAGE_CODE", "pt")
@@ -524,6 +534,15 @@ CACHES = {
     }
 }
 
+# Intervalo (s) em que cada worker confere a versão do snapshot de configuração
+# (tema, background, variáveis, toggles de API, IndexConfig)
+CONFIG_SNAPSHOT_CHECK_INTERVAL = float(os.getenv('CONFIG_SNAPSHOT_CHECK_INTERVAL', 2))
+
+# Estado dos recursos do sistema (ResourceAccessMiddleware): TTL local e
+# intervalo de conferência da versão compartilhada, em segundos
+RESOURCE_GATE_TTL = float(os.getenv('RESOURCE_GATE_TTL', 60))
+RESOURCE_GATE_CHECK_INTERVAL = float(os.getenv('RESOURCE_GATE_CHECK_INTERVAL', 1))
+
 # =========================== CELERY CONFIGS ===========================
 
 if DEBUG:
@@ -547,6 +566,18 @@ else:
             'task': 'apps.lineage.server.tasks.verificar_cupons_expirados',
             'schedule': crontab(minute='*/1'),
         },
+        'fechar-fluxo-caixa-diariamente': {
+            'task': 'apps.lineage.accountancy.tasks.fechar_fluxo_caixa',
+            'schedule': crontab(hour=0, minute=5),
+        },
+        'gerar-resumo-saldos-diariamente': {
+            'task': 'apps.lineage.accountancy.tasks.gerar_resumo_saldos',
+            'schedule': crontab(hour=3, minute=0),
+        },
+        'processar-entregas-servidor-cada-minuto': {
+            'task': 'apps.lineage.wallet.tasks.processar_entregas_servidor',
+            'schedule': crontab(minute='*/1'),
+        },
         'reconciliar-pagamentos-mercadopago-cada-minuto': {
             'task': 'apps.lineage.payment.tasks.reconciliar_pendentes_mp',
             'schedule': crontab(minute='*/1'),
@@ -563,6 +594,22 @@ CELERY_TIMEZONE = TIME_ZONE
 # Pode ser definido como False se não precisar de rastreio
 CELERY_TRACK_STARTED = True
 
+# Encerramento automático de leilões: tamanho do lote travado por transação e
+# tarefa com ETA no end_time de cada leilão (o beat continua como garantia).
+# Com broker Redis, ETAs maiores que o visibility_timeout podem ser reentregues;
+# a tarefa é idempotente.
+AUCTION_SETTLE_BATCH_SIZE = int(os.getenv('CONFIG_AUCTION_SETTLE_BATCH_SIZE', 50))
+AUCTION_EXPIRY_ETA_ENABLED = str2bool(os.getenv('CONFIG_AUCTION_EXPIRY_ETA_ENABLED', 'False'))
+
+# Outbox das entregas no banco do jogo (apps.lineage.wallet.outbox): entregas
+# reservadas por execução, personagens atendidos em paralelo, tentativas antes
+# de falhar (e estornar) e segundos até uma entrega em processamento ser
+# considerada interrompida
+WALLET_OUTBOX_BATCH_SIZE = int(os.getenv('CONFIG_WALLET_OUTBOX_BATCH_SIZE', 100))
+WALLET_OUTBOX_MAX_WORKERS = int(os.getenv('CONFIG_WALLET_OUTBOX_MAX_WORKERS', 4))
+WALLET_OUTBOX_MAX_ATTEMPTS = int(os.getenv('CONFIG_WALLET_OUTBOX_MAX_ATTEMPTS', 8))
+WALLET_OUTBOX_STALE_AFTER = int(os.getenv('CONFIG_WALLET_OUTBOX_STALE_AFTER', 600))
+
 # =========================== CHANNELS CONFIGS ===========================
 
 if DEBUG:
@@ -637,6 +684,12 @@ AUDITOR_MIDDLEWARE_RESTRICT_PATHS = [
 ]
 AUDITOR_MIDDLEWARE_MAX_RETRIES = 3
 AUDITOR_MIDDLEWARE_RETRY_DELAY = 0.1
+# Fração das requisições auditadas (0.0 a 1.0)
+AUDITOR_MIDDLEWARE_SAMPLE_RATE = float(os.environ.get('CONFIG_AUDITOR_MIDDLEWARE_SAMPLE_RATE', '1.0'))
+# Fila em memória do writer assíncrono: registros além do limite são descartados
+AUDITOR_MIDDLEWARE_QUEUE_SIZE = int(os.environ.get('CONFIG_AUDITOR_MIDDLEWARE_QUEUE_SIZE', 10000))
+AUDITOR_MIDDLEWARE_BATCH_SIZE = int(os.environ.get('CONFIG_AUDITOR_MIDDLEWARE_BATCH_SIZE', 200))
+AUDITOR_MIDDLEWARE_FLUSH_INTERVAL = float(os.environ.get('CONFIG_AUDITOR_MIDDLEWARE_FLUSH_INTERVAL', 2.0))
 
 # =========================== EXTRA CONFIGS ===========================
 
@@ -756,6 +809,13 @@ if not RENDER_EXTERNAL_HOSTNAME:
 MERCADO_PAGO_SUCCESS_URL = f"https://{RENDER_EXTERNAL_HOSTNAME}/app/payment/mercadopago/sucesso/"
 MERCADO_PAGO_FAILURE_URL = f"https://{RENDER_EXTERNAL_HOSTNAME}/app/payment/mercadopago/erro/"
 
+# Reconciliação periódica dos pagamentos pendentes (apps.lineage.payment.reconciliation)
+MERCADO_PAGO_API_BASE_URL = os.getenv('CONFIG_MERCADO_PAGO_API_BASE_URL', 'https://api.mercadopago.com')
+MP_RECONCILE_MAX_WORKERS = int(os.getenv('CONFIG_MP_RECONCILE_MAX_WORKERS', 8))
+MP_RECONCILE_MAX_PER_RUN = int(os.getenv('CONFIG_MP_RECONCILE_MAX_PER_RUN', 200))
+MP_RECONCILE_TIME_BUDGET = float(os.getenv('CONFIG_MP_RECONCILE_TIME_BUDGET', 45))
+MP_RECONCILE_HTTP_TIMEOUT = float(os.getenv('CONFIG_MP_RECONCILE_HTTP_TIMEOUT', 10))
+
 # =========================== STRIPE CONFIGS ===========================
 
 STRIPE_WEBHOOK_SECRET = get_env_variable('CONFIG_STRIPE_WEBHOOK_SECRET')
@@ -964,6 +1024,12 @@ FAKE_PLAYERS_MAX = int(os.getenv('FAKE_PLAYERS_MAX', 0))
 LICENSE_CONFIG = {
     'ENCRYPTION_KEY': os.environ.get('PDL_ENCRYPTION_KEY', ''),  # Chave Fernet usada no script gerador
     'DNS_TIMEOUT': int(os.environ.get('PDL_DNS_TIMEOUT', '10')),
+    # Reverificação da licença: o estado validado é reaproveitado por REVERIFY_INTERVAL
+    # segundos (Redis) e cada worker confia no seu estado local por LOCAL_STATE_TTL
+    'REVERIFY_INTERVAL': int(os.environ.get('PDL_LICENSE_REVERIFY_INTERVAL', '300')),
+    'LOCAL_STATE_TTL': int(os.environ.get('PDL_LICENSE_LOCAL_STATE_TTL', '30')),
+    # Fração das verificações bem-sucedidas registradas em LicenseVerification (0.0 a 1.0)
+    'VERIFICATION_SAMPLE_RATE': float(os.environ.get('PDL_LICENSE_VERIFICATION_SAMPLE_RATE', '1.0')),
 }
 
 # Web Push VAPID keys (gere usando pywebpush ou web-push)
@@ -0,0 +1,25 @@
+import time
+
+from apps.api.monitoring import APIMetrics
+
+
+class APIMetricsMiddleware:
+    """
+    Registra métricas (contagem, status e latência) das requisições da API.
+    """
+
+    API_PREFIX = '/api/'
+    # Documentação/esquema não entram nas métricas
+    IGNORED_PREFIXES = ('/api/v1/schema/',)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith(self.API_PREFIX) or request.path.startswith(self.IGNORED_PREFIXES):
+            return self.get_response(request)
+
+        start_time = time.perf_counter()
+        response = self.get_response(request)
+        APIMetrics.record_request(request, response, time.perf_counter() - start_time)
+        return response
@@ -1,14 +1,19 @@
 from .validators import registrar_validador
+from .services import registrar_evento_conquista, invalidar_recompensas_conquistas
 from django.utils.translation import get_language_from_request
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
-from apps.main.home.models import AddressUser
+from apps.main.home.models import AddressUser, PerfilGamer
 from apps.main.solicitation.models import Solicitation
 from apps.main.message.models import Friendship
 
 from apps.lineage.shop.models import ShopPurchase, Cart
 from apps.lineage.auction.models import Bid, Auction
 from apps.lineage.payment.models import PedidoPagamento, Pagamento
-from apps.lineage.wallet.models import TransacaoWallet
+from apps.lineage.wallet.models import TransacaoWallet, TransacaoBonus
+from apps.lineage.games.models import Recompensa
 from apps.lineage.inventory.models import InventoryItem, InventoryLog
 
 import time
@@ -18,27 +23,27 @@ import time
 def primeiro_login(user, request=None):
     return True  # Apenas logar
 
-@registrar_validador('10_leiloes')
+@registrar_validador('10_leiloes', eventos=['leiloes'])
 def dez_leiloes(user, request=None):
     return user.auctions.count() >= 10
 
-@registrar_validador('primeira_solicitacao')
+@registrar_validador('primeira_solicitacao', eventos=['solicitacoes'])
 def primeira_solicitacao(user, request=None):
     return Solicitation.objects.filter(user=user).exists()
 
-@registrar_validador('avatar_editado')
+@registrar_validador('avatar_editado', eventos=['usuario'])
 def avatar_editado(user, request=None):
     return bool(getattr(user, 'avatar', None))
 
-@registrar_validador('endereco_cadastrado')
+@registrar_validador('endereco_cadastrado', eventos=['endereco'])
 def endereco(user, request=None):
     return AddressUser.objects.filter(user=user).exists()
 
-@registrar_validador('email_verificado')
+@registrar_validador('email_verificado', eventos=['usuario'])
 def email_verificado(user, request=None):
     return getattr(user, 'is_email_verified', False)
 
-@registrar_validador('2fa_ativado')
+@registrar_validador('2fa_ativado', eventos=['usuario'])
 def dois_fatores(user, request=None):
     return getattr(user, 'is_2fa_enabled', False)
 
@@ -49,35 +54,35 @@ def idioma(user, request=None):
     idioma = get_language_from_request(request)
     return idioma != 'pt-br'  # ou qualquer padrão
 
-@registrar_validador('primeiro_amigo')
+@registrar_validador('primeiro_amigo', eventos=['amigos'])
 def primeiro_amigo(user, request=None):
     return Friendship.objects.filter(user=user).exists()
 
-@registrar_validador('primeiro_amigo_aceito')
+@registrar_validador('primeiro_amigo_aceito', eventos=['amigos'])
 def primeiro_amigo_aceito(user, request=None):
     return Friendship.objects.filter(user=user, accepted=True).exists()
 
-@registrar_validador('primeira_compra')
+@registrar_validador('primeira_compra', eventos=['compras'])
 def primeira_compra(user, request=None):
     return ShopPurchase.objects.filter(user=user).exists()
 
-@registrar_validador('primeiro_lance')
+@registrar_validador('primeiro_lance', eventos=['lances'])
 def primeiro_lance(user, request=None):
     return Bid.objects.filter(bidder=user).exists()
 
-@registrar_validador('primeiro_cupom')
+@registrar_validador('primeiro_cupom', eventos=['carrinho'])
 def primeiro_cupom(user, request=None):
     return Cart.objects.filter(user=user, promocao_aplicada__isnull=False).exists()
 
-@registrar_validador('primeiro_pedido_pagamento')
+@registrar_validador('primeiro_pedido_pagamento', eventos=['pedidos'])
 def primeiro_pedido_pagamento(user, request=None):
     return PedidoPagamento.objects.filter(usuario=user).exists()
 
-@registrar_validador('primeiro_pagamento_concluido')
+@registrar_validador('primeiro_pagamento_concluido', eventos=['pagamentos'])
 def primeiro_pagamento_concluido(user, request=None):
     return Pagamento.objects.filter(usuario=user, status='approved').exists()
 
-@registrar_validador('primeira_transferencia_para_o_jogo')
+@registrar_validador('primeira_transferencia_para_o_jogo', eventos=['carteira'])
 def primeira_transferencia_para_o_jogo(user, request=None):
     return TransacaoWallet.objects.filter(
         wallet__usuario=user,
@@ -85,7 +90,7 @@ def primeira_transferencia_para_o_jogo(user, request=None):
         descricao__icontains="Transferência para o servidor"
     ).exists()
 
-@registrar_validador('primeira_transferencia_para_jogador')
+@registrar_validador('primeira_transferencia_para_jogador', eventos=['carteira'])
 def primeira_transferencia_para_jogador(user, request=None):
     return TransacaoWallet.objects.filter(
         wallet__usuario=user,
@@ -93,19 +98,19 @@ def primeira_transferencia_para_jogador(user, request=None):
         descricao__icontains="Transferência para jogador"
     ).exists()
 
-@registrar_validador('primeira_retirada_item')
+@registrar_validador('primeira_retirada_item', eventos=['inventario'])
 def primeira_retirada_item(user, request=None):
     return InventoryItem.objects.filter(inventory__user=user).exists()
 
-@registrar_validador('primeira_insercao_item')
+@registrar_validador('primeira_insercao_item', eventos=['inventario_log'])
 def primeira_insercao_item(user, request=None):
     return InventoryLog.objects.filter(user=user, acao='INSERIU_NO_JOGO').exists()
 
-@registrar_validador('primeira_troca_itens')
+@registrar_validador('primeira_troca_itens', eventos=['inventario_log'])
 def primeira_troca_itens(user, request=None):
     return InventoryLog.objects.filter(user=user, acao='TROCA_ENTRE_PERSONAGENS').exists()
 
-@registrar_validador('nivel_10')
+@registrar_validador('nivel_10', eventos=['perfil'])
 def nivel_10(user, request=None):
     try:
         perfil = user.perfilgamer
@@ -113,15 +118,15 @@ def nivel_10(user, request=None):
     except:
         return False
 
-@registrar_validador('50_lances')
+@registrar_validador('50_lances', eventos=['lances'])
 def cinquenta_lances(user, request=None):
     return Bid.objects.filter(bidder=user).count() >= 50
 
-@registrar_validador('primeiro_vencedor_leilao')
+@registrar_validador('primeiro_vencedor_leilao', eventos=['leiloes'])
 def primeiro_vencedor_leilao(user, request=None):
     return Auction.objects.filter(highest_bidder=user, status='finished').exists()
 
-@registrar_validador('1000_xp')
+@registrar_validador('1000_xp', eventos=['perfil'])
 def mil_xp(user, request=None):
     try:
         perfil = user.perfilgamer
@@ -137,7 +142,7 @@ def mil_xp(user, request=None):
     except:
         return False
 
-@registrar_validador('100_transacoes')
+@registrar_validador('100_transacoes', eventos=['carteira', 'bonus'])
 def cem_transacoes(user, request=None):
     from apps.lineage.wallet.models import TransacaoWallet, TransacaoBonus
     # Conta transações normais e de bônus
@@ -145,12 +150,12 @@ def cem_transacoes(user, request=None):
     transacoes_bonus = TransacaoBonus.objects.filter(wallet__usuario=user).count()
     return (transacoes_normais + transacoes_bonus) >= 100
 
-@registrar_validador('primeiro_bonus')
+@registrar_validador('primeiro_bonus', eventos=['bonus'])
 def primeiro_bonus(user, request=None):
     from apps.lineage.wallet.models import TransacaoBonus
     return TransacaoBonus.objects.filter(wallet__usuario=user, tipo='ENTRADA').exists()
 
-@registrar_validador('nivel_25')
+@registrar_validador('nivel_25', eventos=['perfil'])
 def nivel_25(user, request=None):
     try:
         perfil = user.perfilgamer
@@ -158,29 +163,29 @@ def nivel_25(user, request=None):
     except:
         return False
 
-@registrar_validador('primeira_solicitacao_resolvida')
+@registrar_validador('primeira_solicitacao_resolvida', eventos=['solicitacoes'])
 def primeira_solicitacao_resolvida(user, request=None):
     from apps.main.solicitation.models import Solicitation
     return Solicitation.objects.filter(user=user, status='closed').exists()
 
 # =========================== NOVAS CONQUISTAS CRIATIVAS ===========================
 
-@registrar_validador('colecionador_itens')
+@registrar_validador('colecionador_itens', eventos=['inventario'])
 def colecionador_itens(user, request=None):
     """Possui 10 ou mais itens no inventário"""
     return InventoryItem.objects.filter(inventory__user=user).count() >= 10
 
-@registrar_validador('mestre_inventario')
+@registrar_validador('mestre_inventario', eventos=['inventario'])
 def mestre_inventario(user, request=None):
     """Possui 50 ou mais itens no inventário"""
     return InventoryItem.objects.filter(inventory__user=user).count() >= 50
 
-@registrar_validador('trocador_incansavel')
+@registrar_validador('trocador_incansavel', eventos=['inventario_log'])
 def trocador_incansavel(user, request=None):
     """Realizou 10 ou mais trocas de itens"""
     return InventoryLog.objects.filter(user=user, acao='TROCA_ENTRE_PERSONAGENS').count() >= 10
 
-@registrar_validador('gerenciador_economico')
+@registrar_validador('gerenciador_economico', eventos=['carteira'])
 def gerenciador_economico(user, request=None):
     """Realizou 20 ou mais transferências para o jogo"""
     return TransacaoWallet.objects.filter(
@@ -189,7 +194,7 @@ def gerenciador_economico(user, request=None):
         descricao__icontains="Transferência para o servidor"
     ).count() >= 20
 
-@registrar_validador('benfeitor_comunitario')
+@registrar_validador('benfeitor_comunitario', eventos=['carteira'])
 def benfeitor_comunitario(user, request=None):
     """Realizou 10 ou mais transferências para outros jogadores"""
     return TransacaoWallet.objects.filter(
@@ -198,7 +203,7 @@ def benfeitor_comunitario(user, request=None):
         descricao__icontains="Transferência para jogador"
     ).count() >= 10
 
-@registrar_validador('bonus_diario_7dias')
+@registrar_validador('bonus_diario_7dias', eventos=['bonus'])
 def bonus_diario_7dias(user, request=None):
     """Recebeu bônus diário por 7 dias consecutivos"""
     from apps.lineage.wallet.models import TransacaoBonus
@@ -215,7 +220,7 @@ def bonus_diario_7dias(user, request=None):
     ).count()
     return bonus_recentes >= 7
 
-@registrar_validador('bonus_diario_30dias')
+@registrar_validador('bonus_diario_30dias', eventos=['bonus'])
 def bonus_diario_30dias(user, request=None):
     """Recebeu bônus diário por 30 dias consecutivos"""
     from apps.lineage.wallet.models import TransacaoBonus
@@ -231,97 +236,97 @@ def bonus_diario_30dias(user, request=None):
     ).count()
     return bonus_recentes >= 30
 
-@registrar_validador('patrocinador_ouro')
+@registrar_validador('patrocinador_ouro', eventos=['pagamentos'])
 def patrocinador_ouro(user, request=None):
     """Realizou 5 ou mais pagamentos aprovados"""
     return Pagamento.objects.filter(usuario=user, status='approved').count() >= 5
 
-@registrar_validador('patrocinador_diamante')
+@registrar_validador('patrocinador_diamante', eventos=['pagamentos'])
 def patrocinador_diamante(user, request=None):
     """Realizou 10 ou mais pagamentos aprovados"""
     return Pagamento.objects.filter(usuario=user, status='approved').count() >= 10
 
-@registrar_validador('comprador_frequente')
+@registrar_validador('comprador_frequente', eventos=['compras'])
 def comprador_frequente(user, request=None):
     """Realizou 5 ou mais compras na loja"""
     return ShopPurchase.objects.filter(user=user).count() >= 5
 
-@registrar_validador('comprador_vip')
+@registrar_validador('comprador_vip', eventos=['compras'])
 def comprador_vip(user, request=None):
     """Realizou 15 ou mais compras na loja"""
     return ShopPurchase.objects.filter(user=user).count() >= 15
 
-@registrar_validador('leiloeiro_profissional')
+@registrar_validador('leiloeiro_profissional', eventos=['leiloes'])
 def leiloeiro_profissional(user, request=None):
     """Criou 25 ou mais leilões"""
     return user.auctions.count() >= 25
 
-@registrar_validador('leiloeiro_mestre')
+@registrar_validador('leiloeiro_mestre', eventos=['leiloes'])
 def leiloeiro_mestre(user, request=None):
     """Criou 50 ou mais leilões"""
     return user.auctions.count() >= 50
 
-@registrar_validador('lanceador_profissional')
+@registrar_validador('lanceador_profissional', eventos=['lances'])
 def lanceador_profissional(user, request=None):
     """Realizou 100 ou mais lances"""
     return Bid.objects.filter(bidder=user).count() >= 100
 
-@registrar_validador('lanceador_mestre')
+@registrar_validador('lanceador_mestre', eventos=['lances'])
 def lanceador_mestre(user, request=None):
     """Realizou 200 ou mais lances"""
     return Bid.objects.filter(bidder=user).count() >= 200
 
-@registrar_validador('vencedor_serie')
+@registrar_validador('vencedor_serie', eventos=['leiloes'])
 def vencedor_serie(user, request=None):
     """Venceu 3 ou mais leilões"""
     return Auction.objects.filter(highest_bidder=user, status='finished').count() >= 3
 
-@registrar_validador('vencedor_mestre')
+@registrar_validador('vencedor_mestre', eventos=['leiloes'])
 def vencedor_mestre(user, request=None):
     """Venceu 10 ou mais leilões"""
     return Auction.objects.filter(highest_bidder=user, status='finished').count() >= 10
 
-@registrar_validador('cupom_mestre')
+@registrar_validador('cupom_mestre', eventos=['carrinho'])
 def cupom_mestre(user, request=None):
     """Aplicou 5 ou mais cupons promocionais"""
     return Cart.objects.filter(user=user, promocao_aplicada__isnull=False).count() >= 5
 
-@registrar_validador('cupom_expert')
+@registrar_validador('cupom_expert', eventos=['carrinho'])
 def cupom_expert(user, request=None):
     """Aplicou 15 ou mais cupons promocionais"""
     return Cart.objects.filter(user=user, promocao_aplicada__isnull=False).count() >= 15
 
-@registrar_validador('solicitante_frequente')
+@registrar_validador('solicitante_frequente', eventos=['solicitacoes'])
 def solicitante_frequente(user, request=None):
     """Abriu 5 ou mais solicitações de suporte"""
     return Solicitation.objects.filter(user=user).count() >= 5
 
-@registrar_validador('solicitante_expert')
+@registrar_validador('solicitante_expert', eventos=['solicitacoes'])
 def solicitante_expert(user, request=None):
     """Abriu 15 ou mais solicitações de suporte"""
     return Solicitation.objects.filter(user=user).count() >= 15
 
-@registrar_validador('resolvedor_problemas')
+@registrar_validador('resolvedor_problemas', eventos=['solicitacoes'])
 def resolvedor_problemas(user, request=None):
     """Teve 3 ou mais solicitações resolvidas"""
     return Solicitation.objects.filter(user=user, status='closed').count() >= 3
 
-@registrar_validador('resolvedor_mestre')
+@registrar_validador('resolvedor_mestre', eventos=['solicitacoes'])
 def resolvedor_mestre(user, request=None):
     """Teve 10 ou mais solicitações resolvidas"""
     return Solicitation.objects.filter(user=user, status='closed').count() >= 10
 
-@registrar_validador('rede_social')
+@registrar_validador('rede_social', eventos=['amigos'])
 def rede_social(user, request=None):
     """Tem 5 ou mais amigos aceitos"""
     return Friendship.objects.filter(user=user, accepted=True).count() >= 5
 
-@registrar_validador('rede_social_mestre')
+@registrar_validador('rede_social_mestre', eventos=['amigos'])
 def rede_social_mestre(user, request=None):
     """Tem 15 ou mais amigos aceitos"""
     return Friendship.objects.filter(user=user, accepted=True).count() >= 15
 
-@registrar_validador('nivel_50')
+@registrar_validador('nivel_50', eventos=['perfil'])
 def nivel_50(user, request=None):
     """Alcançou o nível 50 no sistema"""
     try:
@@ -330,7 +335,7 @@ def nivel_50(user, request=None):
     except:
         return False
 
-@registrar_validador('nivel_75')
+@registrar_validador('nivel_75', eventos=['perfil'])
 def nivel_75(user, request=None):
     """Alcançou o nível 75 no sistema"""
     try:
@@ -339,7 +344,7 @@ def nivel_75(user, request=None):
     except:
         return False
 
-@registrar_validador('nivel_100')
+@registrar_validador('nivel_100', eventos=['perfil'])
 def nivel_100(user, request=None):
     """Alcançou o nível 100 no sistema"""
     try:
@@ -348,7 +353,7 @@ def nivel_100(user, request=None):
     except:
         return False
 
-@registrar_validador('5000_xp')
+@registrar_validador('5000_xp', eventos=['perfil'])
 def cinco_mil_xp(user, request=None):
     """Acumulou 5000 pontos de experiência"""
     try:
@@ -363,7 +368,7 @@ def cinco_mil_xp(user, request=None):
     except:
         return False
 
-@registrar_validador('10000_xp')
+@registrar_validador('10000_xp', eventos=['perfil'])
 def dez_mil_xp(user, request=None):
     """Acumulou 10000 pontos de experiência"""
     try:
@@ -378,7 +383,7 @@ def dez_mil_xp(user, request=None):
     except:
         return False
 
-@registrar_validador('250_transacoes')
+@registrar_validador('250_transacoes', eventos=['carteira', 'bonus'])
 def duzentos_cinquenta_transacoes(user, request=None):
     """Realizou 250 transações na carteira"""
     from apps.lineage.wallet.models import TransacaoWallet, TransacaoBonus
@@ -386,7 +391,7 @@ def duzentos_cinquenta_transacoes(user, request=None):
     transacoes_bonus = TransacaoBonus.objects.filter(wallet__usuario=user).count()
     return (transacoes_normais + transacoes_bonus) >= 250
 
-@registrar_validador('500_transacoes')
+@registrar_validador('500_transacoes', eventos=['carteira', 'bonus'])
 def quinhentas_transacoes(user, request=None):
     """Realizou 500 transações na carteira"""
     from apps.lineage.wallet.models import TransacaoWallet, TransacaoBonus
@@ -394,14 +399,39 @@ def quinhentas_transacoes(user, request=None):
     transacoes_bonus = TransacaoBonus.objects.filter(wallet__usuario=user).count()
     return (transacoes_normais + transacoes_bonus) >= 500
 
-@registrar_validador('bonus_mestre')
+@registrar_validador('bonus_mestre', eventos=['bonus'])
 def bonus_mestre(user, request=None):
     """Recebeu 10 ou mais bônus"""
     from apps.lineage.wallet.models import TransacaoBonus
     return TransacaoBonus.objects.filter(wallet__usuario=user, tipo='ENTRADA').count() >= 10
 
-@registrar_validador('bonus_expert')
+@registrar_validador('bonus_expert', eventos=['bonus'])
 def bonus_expert(user, request=None):
     """Recebeu 25 ou mais bônus"""
     from apps.lineage.wallet.models import TransacaoBonus
     return TransacaoBonus.objects.filter(wallet__usuario=user, tipo='ENTRADA').count() >= 25
+
+
+# =========================== EVENTOS ===========================
+# Cada evento marca como pendentes as conquistas que o declaram em `eventos`
+
+registrar_evento_conquista(get_user_model(), 'usuario', lambda user: [user.pk])
+registrar_evento_conquista(PerfilGamer, 'perfil', lambda perfil: [perfil.user_id])
+registrar_evento_conquista(AddressUser, 'endereco', lambda endereco: [endereco.user_id])
+registrar_evento_conquista(Solicitation, 'solicitacoes', lambda solicitacao: [solicitacao.user_id])
+registrar_evento_conquista(Friendship, 'amigos', lambda amizade: [amizade.user_id])
+registrar_evento_conquista(ShopPurchase, 'compras', lambda compra: [compra.user_id])
+registrar_evento_conquista(Cart, 'carrinho', lambda carrinho: [carrinho.user_id])
+registrar_evento_conquista(Auction, 'leiloes', lambda leilao: [leilao.seller_id, leilao.highest_bidder_id])
+registrar_evento_conquista(Bid, 'lances', lambda lance: [lance.bidder_id])
+registrar_evento_conquista(PedidoPagamento, 'pedidos', lambda pedido: [pedido.usuario_id])
+registrar_evento_conquista(Pagamento, 'pagamentos', lambda pagamento: [pagamento.usuario_id])
+registrar_evento_conquista(TransacaoWallet, 'carteira', lambda transacao: [transacao.wallet.usuario_id])
+registrar_evento_conquista(TransacaoBonus, 'bonus', lambda transacao: [transacao.wallet.usuario_id])
+registrar_evento_conquista(InventoryItem, 'inventario', lambda item: [item.inventory.user_id])
+registrar_evento_conquista(InventoryLog, 'inventario_log', lambda log: [log.user_id])
+
+
+@receiver([post_save, post_delete], sender=Recompensa)
+def recompensa_alterada(sender, **kwargs):
+    invalidar_recompensas_conquistas()
@@ -1,24 +1,130 @@
+"""
+Motor de conquistas.
+
+A verificação carrega as conquistas e o conjunto já ganho pelo usuário em
+uma consulta cada e só executa validadores de conquistas ainda não ganhas.
+Além disso ela é dirigida por eventos: sinais dos modelos envolvidos
+(registrar_evento_conquista) marcam o usuário como pendente para um evento
+e apenas os validadores daquele evento são avaliados. Uma reavaliação
+completa acontece na primeira verificação do usuário e depois a cada
+CONQUISTAS_REAVALIACAO_COMPLETA segundos, cobrindo alterações que não
+disparam sinais (ex.: queryset.update()).
+"""
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+
 from apps.main.home.models import Conquista, ConquistaUsuario
-from .validators import VALIDADORES_CONQUISTAS
-from apps.lineage.games.utils import verificar_recompensas_por_conquista
+from .validators import VALIDADORES_CONQUISTAS, EVENTOS_CONQUISTAS
+from apps.lineage.games.utils import verificar_recompensas_conquistas
+
+
+CONQUISTAS_REAVALIACAO_COMPLETA = 60 * 60 * 24
+CONQUISTAS_PENDENTES_TTL = 60 * 60 * 24 * 7
+
+RECOMPENSAS_VERSAO_KEY = 'conquistas:recompensas:versao'
+
+
+def _pendente_key(user_id, evento):
+    return f'conquistas:pendente:{user_id}:{evento}'
+
+
+def _avaliado_key(user_id):
+    return f'conquistas:avaliado:{user_id}'
+
+
+def _recompensas_key(user_id):
+    return f'conquistas:recompensas:{user_id}'
+
+
+def eventos_registrados():
+    eventos = set()
+    for eventos_validador in EVENTOS_CONQUISTAS.values():
+        eventos.update(eventos_validador or ())
+    return eventos
+
+
+def marcar_conquistas_pendentes(user_ids, evento):
+    """Marca as conquistas ligadas a `evento` para reavaliação dos usuários"""
+    keys = {_pendente_key(user_id, evento): True for user_id in set(user_ids) if user_id}
+    if keys:
+        cache.set_many(keys, timeout=CONQUISTAS_PENDENTES_TTL)
+
+
+def invalidar_recompensas_conquistas():
+    """Força a conferência de recompensas de conquista na próxima verificação de cada usuário"""
+    try:
+        cache.incr(RECOMPENSAS_VERSAO_KEY)
+    except ValueError:
+        cache.set(RECOMPENSAS_VERSAO_KEY, 1, timeout=None)
+
+
+def registrar_evento_conquista(model, evento, usuarios):
+    """
+    Liga post_save/post_delete de `model` ao evento. `usuarios(instance)`
+    retorna os ids dos usuários afetados pela alteração.
+    """
+    def handler(sender, instance, **kwargs):
+        try:
+            marcar_conquistas_pendentes(usuarios(instance), evento)
+        except Exception:
+            # Na dúvida, a reavaliação completa periódica cobre o usuário
+            pass
+
+    uid = f'conquistas:{evento}:{model._meta.label}'
+    post_save.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+
+
+def _codigos_para_avaliar(user):
+    """
+    Retorna (códigos a avaliar, avaliação completa?). Consome as marcações
+    pendentes antes de avaliar, para não perder eventos que cheguem durante
+    a verificação.
+    """
+    if cache.get(_avaliado_key(user.pk)) is None:
+        cache.delete_many([_pendente_key(user.pk, evento) for evento in eventos_registrados()])
+        return set(VALIDADORES_CONQUISTAS), True
+
+    keys = {_pendente_key(user.pk, evento): evento for evento in eventos_registrados()}
+    pendentes = {keys[key] for key in cache.get_many(list(keys))}
+    if pendentes:
+        cache.delete_many([_pendente_key(user.pk, evento) for evento in pendentes])
+
+    codigos = {
+        codigo for codigo, eventos in EVENTOS_CONQUISTAS.items()
+        if eventos is None or eventos & pendentes
+    }
+    return codigos, False
 
 
 def verificar_conquistas(user, request=None):
     conquistas_ganhas = []
 
-    for codigo, func_validadora in VALIDADORES_CONQUISTAS.items():
-        conquista = Conquista.objects.filter(codigo=codigo).first()
-        if not conquista:
-            continue  # ignora se a conquista não existir
+    codigos, completa = _codigos_para_avaliar(user)
+    conquistas = {conquista.codigo: conquista for conquista in Conquista.objects.all()}
+    codigos_ganhos = set(
+        ConquistaUsuario.objects.filter(usuario=user).values_list('conquista__codigo', flat=True)
+    )
 
-        conquista_ja_ganha = ConquistaUsuario.objects.filter(usuario=user, conquista=conquista).exists()
+    for codigo, func_validadora in VALIDADORES_CONQUISTAS.items():
+        conquista = conquistas.get(codigo)
+        if not conquista or codigo in codigos_ganhos or codigo not in codigos:
+            continue  # inexistente, já ganha ou sem eventos pendentes
 
-        if not conquista_ja_ganha and func_validadora(user, request=request):
+        if func_validadora(user, request=request):
             # ✅ Ganhou agora
             ConquistaUsuario.objects.create(usuario=user, conquista=conquista)
             conquistas_ganhas.append(conquista)
+            codigos_ganhos.add(codigo)
+
+    if completa:
+        cache.set(_avaliado_key(user.pk), True, timeout=CONQUISTAS_REAVALIACAO_COMPLETA)
 
-        # ✅ Verifica recompensa SEMPRE, seja nova ou já existente
-        verificar_recompensas_por_conquista(user, codigo, request)
+    # ✅ Recompensas: conferidas quando há conquista nova, na avaliação
+    # completa ou quando alguma Recompensa foi alterada desde a última vez
+    versao_recompensas = cache.get(RECOMPENSAS_VERSAO_KEY, 0)
+    if conquistas_ganhas or completa or cache.get(_recompensas_key(user.pk)) != versao_recompensas:
+        verificar_recompensas_conquistas(user, codigos_ganhos, request)
+        cache.set(_recompensas_key(user.pk), versao_recompensas, timeout=CONQUISTAS_REAVALIACAO_COMPLETA)
 
     return conquistas_ganhas
@@ -1,8 +1,13 @@
 VALIDADORES_CONQUISTAS = {}
 
+# Eventos que podem mudar o resultado de cada validador (ver utils/services.py).
+# Validadores sem eventos (None) são avaliados em toda verificação.
+EVENTOS_CONQUISTAS = {}
 
-def registrar_validador(codigo):
+
+def registrar_validador(codigo, eventos=None):
     def wrapper(func):
         VALIDADORES_CONQUISTAS[codigo] = func
+        EVENTOS_CONQUISTAS[codigo] = frozenset(eventos) if eventos else None
         return func
     return wrapper